@@ -0,0 +1,355 @@
+"""
+Backtest the app's trend and liquidity rules over candle history.
+
+Every coin is replayed through the same path the app uses — rolling
+indicators (indicator_engine), the model, normalize_score and the
+0.35/0.65 liquidity cut-offs, and predict_trend's ±1% rule with its
+volume confirmation — and each call is checked against what happened next:
+
+  trend      a Bullish/Bearish call is a hit when the close --horizon bars
+             later moved the same way; reported per direction and per
+             volume note (volume vs the mean of the previous
+             --volume-window bars: >1.5× confirms, <0.5× is weak)
+  liquidity  the forward Amihud ratio (|return| / dollar volume over the
+             next --horizon bars) is split into per-coin terciles, most
+             illiquid = Low; a level is a hit when it names the right tercile
+
+Within a coin everything is array maths (predictions in --block sized
+batches, indicator state carried across blocks); coins are spread over a
+process pool and each worker loads the model once. Workers read the
+memory-mapped history store directly, so only per-coin counts cross
+process boundaries.
+
+    python backtest.py --store data/history --horizon 5
+    python backtest.py candles.csv --output backtest.json
+    python backtest.py --synthetic 200 --bars 525600     # 200 coins × a year of minute bars
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from indicator_engine import IndicatorEngine
+from liquidity import (
+    LIQUIDITY_LEVELS, build_feature_matrix, liquidity_level_index, normalize_score_array,
+    trend_signal_array,
+)
+
+DEFAULT_BLOCK = 1 << 18
+VOLUME_NOTES = ('none', 'confirmed', 'weak')  # same order as predict_trend's notes
+DIRECTIONS = {1: 'bullish', -1: 'bearish'}
+
+_predictor = None
+
+
+def _init_worker(model_path):
+    """
+    Load the model once per worker process, single-threaded (the pool
+    already has one process per core).
+    """
+    global _predictor
+    if model_path is False:
+        return
+    import warnings
+
+    import model_cache
+    from feature_pipeline import FeaturePipeline
+
+    warnings.simplefilter('ignore')
+    _predictor = model_cache.get_model(model_path)
+    # not getattr(..., 'estimator'): sklearn forests use that name for their base tree
+    estimator = _predictor.estimator if isinstance(_predictor, FeaturePipeline) else _predictor
+    if hasattr(estimator, 'set_params') and 'n_jobs' in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+
+
+def volume_notes(volume, window):
+    """
+    0 / 1 / 2 (no note / confirmed / weak) per candle: volume against the
+    mean of the previous `window` candles. The first `window` candles get 0.
+    """
+    cumsum = np.concatenate([[0.0], np.cumsum(volume)])
+    notes = np.zeros(len(volume), dtype=np.int8)
+    if len(volume) > window:
+        avg = (cumsum[window:-1] - cumsum[:-window - 1]) / window
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = volume[window:] / avg
+        notes[window:] = np.where(avg > 0, np.where(ratio > 1.5, 1, np.where(ratio < 0.5, 2, 0)), 0)
+    return notes
+
+
+def forward_amihud(close, volume, horizon):
+    """
+    |close[t+h] / close[t] - 1| / dollar volume of candles t+1 … t+h, for
+    every t with h candles after it.
+    """
+    dollar = np.concatenate([[0.0], np.cumsum(close * volume)])
+    n = len(close) - horizon
+    traded = dollar[horizon + 1:] - dollar[1:n + 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.abs(close[horizon:] / close[:n] - 1) / traded
+
+
+def _scores(ohlcv, block):
+    """
+    Normalised liquidity score per candle: rolling indicators and one
+    predict per block of rows.
+    """
+    engine = IndicatorEngine()
+    scores = np.empty(len(ohlcv[0]))
+    for lo in range(0, len(scores), block):
+        o, h, l, c, v = (a[lo:lo + block] for a in ohlcv)
+        X = build_feature_matrix(o, h, l, c, v, indicators=engine.backfill(None, c))
+        scores[lo:lo + block] = normalize_score_array(_predictor.predict(X), v, X[:, 5])
+    return scores
+
+
+def evaluate_coin(ohlcv, horizon=1, threshold_pct=1.0, volume_window=20, block=DEFAULT_BLOCK):
+    """
+    Backtest one coin's (open, high, low, close, volume) arrays. Returns
+    small count arrays (see merge()), so results are cheap to ship between
+    processes and to add up.
+    """
+    o, h, l, c, v = (np.ascontiguousarray(a, dtype=np.float64) for a in ohlcv)
+    n = len(c) - horizon
+    result = {'rows': len(c), 'evaluated': max(n, 0)}
+    if n <= 0:
+        return result
+
+    fwd = c[horizon:] / c[:n] - 1
+    signal = trend_signal_array(o[:n], c[:n], threshold_pct)
+    notes = volume_notes(v, volume_window)[:n]
+    moved = np.sign(fwd).astype(np.int8)
+    # [direction (bearish, bullish), note] -> calls / hits / summed signed return
+    calls = np.zeros((2, len(VOLUME_NOTES)), dtype=np.int64)
+    hits = np.zeros_like(calls)
+    signed = np.zeros(calls.shape)
+    active = signal != 0
+    cell = (signal[active] > 0).astype(np.intp) * len(VOLUME_NOTES) + notes[active]
+    calls.flat[:] = np.bincount(cell, minlength=calls.size)
+    hits.flat[:] = np.bincount(cell, weights=moved[active] == signal[active], minlength=calls.size)
+    signed.flat[:] = np.bincount(cell, weights=fwd[active] * signal[active], minlength=calls.size)
+    result['trend'] = {'calls': calls, 'hits': hits, 'signed_return': signed,
+                       'up_moves': int((moved > 0).sum()), 'down_moves': int((moved < 0).sum())}
+
+    if _predictor is not None:
+        level = liquidity_level_index(_scores((o, h, l, c, v), block))[:n]
+        amihud = forward_amihud(c, v, horizon)
+        valid = np.isfinite(amihud)
+        confusion = np.zeros((len(LIQUIDITY_LEVELS),) * 2, dtype=np.int64)
+        if valid.sum() >= len(LIQUIDITY_LEVELS):
+            cuts = np.quantile(amihud[valid], (1 / 3, 2 / 3))
+            # most illiquid tercile is Low (0), least illiquid is High (2)
+            actual = 2 - np.searchsorted(cuts, amihud[valid], side='right')
+            np.add.at(confusion, (level[valid], actual), 1)
+        result['liquidity'] = {'confusion': confusion}
+    return result
+
+
+def merge(total, part):
+    """
+    Add one coin's result into a running total (nested dicts of counts/arrays).
+    """
+    for key, value in part.items():
+        if isinstance(value, dict):
+            merge(total.setdefault(key, {}), value)
+        elif key in total:
+            total[key] = total[key] + value
+        else:
+            total[key] = value.copy() if isinstance(value, np.ndarray) else value
+    return total
+
+
+def synthetic_ohlcv(seed, bars):
+    """
+    Geometric random-walk minute candles with drifting volatility and
+    lognormal volume, reproducible from seed.
+    """
+    rng = np.random.default_rng(seed)
+    vol = 0.002 * np.exp(np.cumsum(rng.normal(0, 0.01, bars)).clip(-2, 2))
+    close = 10 ** rng.uniform(-1, 4) * np.exp(np.cumsum(rng.normal(0, vol)))
+    open_p = np.concatenate([[close[0]], close[:-1]])
+    spread = np.abs(rng.normal(0, vol)) * close
+    high = np.maximum(open_p, close) + spread
+    low = np.maximum(np.minimum(open_p, close) - spread, close * 1e-3)
+    volume = rng.lognormal(10, 1, bars) * (1 + 50 * np.abs(close / open_p - 1))
+    return open_p, high, low, close, volume
+
+
+def _run_coin(source, coin, params):
+    """
+    Worker entry point: load one coin's candles and backtest them.
+    """
+    start = time.perf_counter()
+    if source[0] == 'synthetic':
+        ohlcv = synthetic_ohlcv((source[1], coin), source[2])
+    else:
+        from history_store import HistoryStore
+
+        _, root, range_start, range_end = source
+        ohlcv = HistoryStore(root).range(coin, range_start, range_end)[1:]
+    result = evaluate_coin(ohlcv, **params)
+    result['seconds'] = time.perf_counter() - start
+    return coin, result
+
+
+def _rate(hits, calls):
+    return float(hits / calls) if calls else None
+
+
+def summarise(total, per_coin, wall_seconds, workers):
+    """
+    JSON-ready report: hit rates overall, per direction/volume note and per
+    liquidity level, plus per-coin trend hit rates and runtime.
+    """
+    report = {'coins': len(per_coin), 'rows': total.get('rows', 0), 'evaluated': total.get('evaluated', 0)}
+    trend = total.get('trend')
+    if trend:
+        calls, hits, signed = trend['calls'], trend['hits'], trend['signed_return']
+        moves = trend['up_moves'] + trend['down_moves']
+        report['trend'] = {
+            'calls': int(calls.sum()),
+            'hit_rate': _rate(hits.sum(), calls.sum()),
+            'base_rate_up': _rate(trend['up_moves'], moves),
+            'by_direction': {
+                DIRECTIONS[d]: {
+                    'calls': int(calls[i].sum()),
+                    'hit_rate': _rate(hits[i].sum(), calls[i].sum()),
+                    'mean_signed_return': _rate(signed[i].sum(), calls[i].sum()),
+                    'by_volume': {note: {'calls': int(calls[i, j]), 'hit_rate': _rate(hits[i, j], calls[i, j])}
+                                  for j, note in enumerate(VOLUME_NOTES)},
+                } for i, d in enumerate((-1, 1))
+            },
+        }
+    liquidity = total.get('liquidity')
+    if liquidity:
+        confusion = liquidity['confusion']
+        report['liquidity'] = {
+            'scored': int(confusion.sum()),
+            'hit_rate': _rate(np.trace(confusion), confusion.sum()),
+            'by_level': {lv: {'calls': int(confusion[i].sum()), 'hit_rate': _rate(confusion[i, i], confusion[i].sum())}
+                         for i, lv in enumerate(LIQUIDITY_LEVELS)},
+            'confusion': confusion.tolist(),
+        }
+    report['per_coin'] = {
+        str(coin): {'rows': r['rows'],
+                    'trend_hit_rate': _rate(r['trend']['hits'].sum(), r['trend']['calls'].sum()) if 'trend' in r else None,
+                    'seconds': r['seconds']}
+        for coin, r in sorted(per_coin.items(), key=lambda item: str(item[0]))
+    }
+    report['runtime'] = {'wall_s': wall_seconds, 'workers': workers,
+                         'rows_per_s': report['rows'] / wall_seconds if wall_seconds else None,
+                         'coin_cpu_s': sum(r['seconds'] for r in per_coin.values())}
+    return report
+
+
+def run(source, coins, params, model_path=None, workers=None, progress=None):
+    """
+    Backtest every coin, fanned out over a process pool (inline when
+    workers == 1). model_path=False skips the model and the liquidity check.
+    Returns the summarised report.
+    """
+    workers = workers or os.cpu_count() or 1
+    total, per_coin = {}, {}
+    start = time.perf_counter()
+
+    def collect(coin, result):
+        per_coin[coin] = result
+        merge(total, {k: v for k, v in result.items() if k != 'seconds'})
+        if progress:
+            progress(len(per_coin), len(coins), coin)
+
+    if workers == 1:
+        _init_worker(model_path)
+        for coin in coins:
+            collect(*_run_coin(source, coin, params))
+    else:
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model_path,)) as pool:
+            futures = [pool.submit(_run_coin, source, coin, params) for coin in coins]
+            for future in as_completed(futures):
+                collect(*future.result())
+    return summarise(total, per_coin, time.perf_counter() - start, workers)
+
+
+def _print_report(report):
+    rt = report['runtime']
+    print(f"\n{report['coins']:,} coins, {report['rows']:,} candles in {rt['wall_s']:.1f} s "
+          f"({rt['rows_per_s']:,.0f} candles/s, {rt['workers']} worker(s))", file=sys.stderr)
+    trend = report.get('trend')
+    if trend:
+        print(f"trend      {trend['calls']:,} calls, hit rate {trend['hit_rate'] or 0:.1%} "
+              f"(base rate up {trend['base_rate_up'] or 0:.1%})", file=sys.stderr)
+        for name, d in trend['by_direction'].items():
+            notes = ', '.join(f"{note} {v['hit_rate']:.1%} of {v['calls']:,}"
+                              for note, v in d['by_volume'].items() if v['calls'])
+            print(f"  {name:<8} {d['calls']:>12,} calls  hit {d['hit_rate'] or 0:.1%}  [{notes}]", file=sys.stderr)
+    liquidity = report.get('liquidity')
+    if liquidity:
+        print(f"liquidity  {liquidity['scored']:,} scored, hit rate {liquidity['hit_rate'] or 0:.1%} "
+              "(chance 33.3%)", file=sys.stderr)
+        for lv, v in liquidity['by_level'].items():
+            print(f"  {lv:<8} {v['calls']:>12,} calls  hit {v['hit_rate'] or 0:.1%}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest the trend and liquidity rules over history.")
+    parser.add_argument('input', nargs='?', help="CSV/Parquet of candles (imported into a temporary store)")
+    parser.add_argument('--store', default=None, help="history_store directory to replay")
+    parser.add_argument('--synthetic', type=int, default=None, metavar='COINS',
+                        help="generate this many random-walk coins instead of reading data")
+    parser.add_argument('--bars', type=int, default=525_600, help="candles per synthetic coin")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--coins', default=None, help="comma-separated subset of the store's coins")
+    parser.add_argument('--start', default=None)
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--horizon', type=int, default=1, help="candles ahead a call is judged on")
+    parser.add_argument('--threshold', type=float, default=1.0, help="trend threshold, percent")
+    parser.add_argument('--volume-window', type=int, default=20)
+    parser.add_argument('--block', type=int, default=DEFAULT_BLOCK, help="rows per predict call")
+    parser.add_argument('--model', default=None)
+    parser.add_argument('--no-model', action='store_true', help="trend rule only (skip predictions)")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('--output', default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+    if sum(x is not None for x in (args.input, args.store, args.synthetic)) != 1:
+        parser.error("give exactly one of: input file, --store, --synthetic")
+
+    params = {'horizon': args.horizon, 'threshold_pct': args.threshold,
+              'volume_window': args.volume_window, 'block': args.block}
+    model_path = False if args.no_model else args.model
+
+    def report_progress(done, total, coin):
+        print(f"\r{done:,}/{total:,} coins", end='', file=sys.stderr, flush=True)
+
+    with tempfile.TemporaryDirectory(prefix='backtest-') as scratch:
+        if args.synthetic is not None:
+            source, coins = ('synthetic', args.seed, args.bars), list(range(args.synthetic))
+        else:
+            from history_store import HistoryStore, import_file
+
+            root = args.store
+            if args.input:
+                root = os.path.join(scratch, 'history')
+                written = import_file(HistoryStore(root), args.input)
+                print(f"Imported {written:,} candles", file=sys.stderr)
+            source = ('store', root, args.start, args.end)
+            coins = args.coins.split(',') if args.coins else HistoryStore(root).coins()
+        if not coins:
+            raise SystemExit("no coins to backtest")
+        report = run(source, coins, params, model_path, args.workers, report_progress)
+
+    report['params'] = dict(params, model=None if args.no_model else (args.model or 'default'))
+    _print_report(report)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Report: {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
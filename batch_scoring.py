@@ -0,0 +1,302 @@
+"""
+Batch scoring for files of OHLCV candles.
+
+Reads CSV or Parquet input in fixed-size chunks, builds the 10 model
+features with vectorised indicator maths, scores each chunk with a single
+predict call and streams the scored rows to the output file, so memory is
+bounded by the chunk size rather than the file size.
+
+Rows are treated as a time series (per coin when a coin/symbol column is
+present): SMA/EMA/RSI/MACD come from indicator_engine, whose state carries
+across chunks. --proxy-indicators restores the single-candle proxies.
+--interval adds raw_score_p<q> columns, per-tree quantiles from the
+compiled forest computed in the same pass as the score; --explain adds
+contrib_<feature> columns, each feature's tree-path share of raw_score.
+
+    python batch_scoring.py candles.csv scored.csv --chunksize 50000
+    python batch_scoring.py candles.csv scored.csv --interval 0.05,0.95 --explain
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import model_cache
+from indicator_engine import IndicatorEngine
+from liquidity import (
+    FEATURE_COLUMNS, OHLCV_COLUMNS, build_feature_matrix,
+    normalize_score_array, liquidity_level_array, predict_trend_array,
+)
+
+DEFAULT_CHUNKSIZE = 50_000
+COIN_COLUMNS = ('coin', 'symbol')
+
+
+def _is_parquet(name):
+    return str(name).lower().endswith(('.parquet', '.pq'))
+
+
+def _source_name(source, name=None):
+    if name:
+        return name
+    if isinstance(source, (str, os.PathLike)):
+        return os.fspath(source)
+    return getattr(source, 'name', '')
+
+
+def _stream_size(fh):
+    try:
+        return os.fstat(fh.fileno()).st_size
+    except (AttributeError, OSError, ValueError):
+        pos = fh.tell()
+        size = fh.seek(0, os.SEEK_END)
+        fh.seek(pos)
+        return size
+
+
+def normalise_columns(frame):
+    """
+    Map Open/High/Low/Close/Volume case-insensitively onto the canonical names.
+    """
+    lookup = {str(col).strip().lower(): col for col in frame.columns}
+    missing = [c for c in OHLCV_COLUMNS if c.lower() not in lookup]
+    if missing:
+        raise ValueError(f"Input is missing required column(s): {', '.join(missing)}")
+    renames = {lookup[c.lower()]: c for c in OHLCV_COLUMNS if lookup[c.lower()] != c}
+    return frame.rename(columns=renames) if renames else frame
+
+
+def iter_ohlcv_chunks(source, chunksize=DEFAULT_CHUNKSIZE, name=None):
+    """
+    Yield (frame, fraction_done) chunks from a CSV/Parquet path or file object.
+    """
+    if _is_parquet(_source_name(source, name)):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(source)
+        total = parquet.metadata.num_rows or 1
+        done = 0
+        for batch in parquet.iter_batches(batch_size=chunksize):
+            frame = batch.to_pandas()
+            done += len(frame)
+            yield frame, min(done / total, 1.0)
+        return
+
+    owned = isinstance(source, (str, os.PathLike))
+    fh = open(source, 'rb') if owned else source
+    try:
+        size = _stream_size(fh) or 1
+        with pd.read_csv(fh, chunksize=chunksize) as reader:
+            for frame in reader:
+                yield frame, min(fh.tell() / size, 1.0)
+    finally:
+        if owned:
+            fh.close()
+
+
+def coin_column(frame):
+    lookup = {str(col).strip().lower(): col for col in frame.columns}
+    for name in COIN_COLUMNS:
+        if name in lookup:
+            return lookup[name]
+    return None
+
+
+def rolling_indicator_arrays(engine, frame, close):
+    """
+    Advance engine over this chunk (grouped by coin, in row order) and return
+    the indicator arrays aligned with the rows. Non-finite closes are skipped
+    so they can't poison the EMA state; their indicators are NaN.
+    """
+    out = np.full((4, len(close)), np.nan)
+    coin_col = coin_column(frame)
+    if coin_col is None:
+        groups = {None: np.arange(len(close))}
+    else:
+        groups = frame.groupby(coin_col, sort=False, dropna=False).indices
+    for coin, positions in groups.items():
+        positions = positions[np.isfinite(close[positions])]
+        if len(positions):
+            out[:, positions] = engine.backfill(coin, close[positions])
+    return tuple(out)
+
+
+def interval_columns(quantiles):
+    return [f'raw_score_p{q * 100:g}' for q in quantiles]
+
+
+def contribution_columns(features=FEATURE_COLUMNS):
+    return [f'contrib_{f}' for f in features]
+
+
+def score_frame(model, frame, engine=None, quantiles=None, explain=False):
+    """
+    Add the model features, raw_score and the post-processed liquidity
+    score/level and trend to one chunk of candles.
+    With an IndicatorEngine the indicators are rolling values; without one
+    they are the single-candle proxies. Rows with missing or non-numeric
+    OHLCV values get a NaN score. With quantiles, model must have
+    predict_interval (a compiled forest) and the per-tree quantiles are
+    added as raw_score_p<q> columns; with explain, the model's
+    contributions() as contrib_<feature> columns (the shared bias is left
+    out: it is raw_score minus their sum).
+    """
+    frame = normalise_columns(frame)
+    ohlcv = [pd.to_numeric(frame[c], errors='coerce').to_numpy(dtype=np.float64)
+             for c in OHLCV_COLUMNS]
+    indicators = None
+    if engine is not None:
+        indicators = rolling_indicator_arrays(engine, frame, ohlcv[3])
+    X = build_feature_matrix(*ohlcv, indicators=indicators)
+
+    raw_score = np.full(len(X), np.nan)
+    bounds = np.full((len(X), len(quantiles or ())), np.nan)
+    contributions = np.full((len(X), len(FEATURE_COLUMNS) if explain else 0), np.nan)
+    valid = np.isfinite(X).all(axis=1)
+    if valid.any():
+        if quantiles:
+            raw_score[valid], bounds[valid] = model.predict_interval(X[valid], quantiles)
+        else:
+            raw_score[valid] = model.predict(X[valid])
+        if explain:
+            contributions[valid] = model.contributions(X[valid])[1]
+
+    out = frame.copy()
+    for i, col in enumerate(FEATURE_COLUMNS[len(OHLCV_COLUMNS):], start=len(OHLCV_COLUMNS)):
+        out[col] = X[:, i]
+    out['raw_score'] = raw_score
+    for col, values in zip(interval_columns(quantiles or ()), bounds.T):
+        out[col] = values
+    for col, values in zip(contribution_columns(), contributions.T):
+        out[col] = values
+    score = np.where(valid, normalize_score_array(raw_score, ohlcv[4], X[:, 5]), np.nan)
+    out['liquidity_score'] = score
+    out['liquidity_level'] = np.where(valid, liquidity_level_array(score), '')
+    out['trend'] = predict_trend_array(ohlcv[0], ohlcv[3], ohlcv[4])
+    return out
+
+
+def latest_candles(source, chunksize=DEFAULT_CHUNKSIZE, name=None):
+    """
+    The last complete OHLCV row per coin in a file: (coins, (n, 5) array),
+    coins in order of first appearance. Without a coin/symbol column the
+    whole file is one coin, ''.
+    """
+    latest = {}
+    for frame, _ in iter_ohlcv_chunks(source, chunksize, name):
+        frame = normalise_columns(frame)
+        ohlcv = np.column_stack([pd.to_numeric(frame[c], errors='coerce').to_numpy(dtype=np.float64)
+                                 for c in OHLCV_COLUMNS])
+        valid = np.isfinite(ohlcv).all(axis=1)
+        coin_col = coin_column(frame)
+        coins = frame[coin_col].astype(str).to_numpy() if coin_col else np.full(len(frame), '')
+        coins, ohlcv = coins[valid], ohlcv[valid]
+        # last occurrence of each coin in this chunk
+        _, last = np.unique(coins[::-1], return_index=True)
+        for i in np.sort(len(coins) - 1 - last):
+            latest[coins[i]] = ohlcv[i]
+    if not latest:
+        return [], np.empty((0, len(OHLCV_COLUMNS)))
+    return list(latest), np.array(list(latest.values()))
+
+
+def score_chunks(model, source, chunksize=DEFAULT_CHUNKSIZE, name=None, rolling=True, quantiles=None,
+                 explain=False):
+    """
+    Yield (scored_frame, fraction_done) for each chunk of the source.
+    """
+    engine = IndicatorEngine() if rolling else None
+    for frame, fraction in iter_ohlcv_chunks(source, chunksize, name):
+        yield score_frame(model, frame, engine, quantiles, explain), fraction
+
+
+class _CsvSink:
+    def __init__(self, dest):
+        self._fh = open(dest, 'w', newline='', encoding='utf-8')
+        self._header = True
+
+    def write(self, frame):
+        frame.to_csv(self._fh, header=self._header, index=False)
+        self._header = False
+
+    def close(self):
+        self._fh.close()
+
+
+class _ParquetSink:
+    def __init__(self, dest):
+        self._dest = dest
+        self._writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self._dest, table.schema)
+        else:
+            table = table.cast(self._writer.schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def score_file(model, source, dest, chunksize=DEFAULT_CHUNKSIZE, name=None, progress=None,
+               rolling=True, quantiles=None, explain=False):
+    """
+    Score every row of source into dest (CSV or Parquet, by extension).
+    progress(fraction_done, rows_done) is called after each chunk.
+    Returns the number of rows written.
+    """
+    sink = _ParquetSink(dest) if _is_parquet(dest) else _CsvSink(dest)
+    rows = 0
+    try:
+        for scored, fraction in score_chunks(model, source, chunksize, name, rolling, quantiles, explain):
+            sink.write(scored)
+            rows += len(scored)
+            if progress:
+                progress(fraction, rows)
+    finally:
+        sink.close()
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a CSV/Parquet file of OHLCV candles.")
+    parser.add_argument('input', help="CSV or Parquet file with Open, High, Low, Close, Volume columns")
+    parser.add_argument('output', help="destination .csv or .parquet file")
+    parser.add_argument('--model', default=None, help="model pickle (default: bundled model)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument('--proxy-indicators', action='store_true',
+                        help="use single-candle indicator proxies instead of rolling history")
+    parser.add_argument('--interval', nargs='?', const='0.05,0.95', default=None, metavar='Q1,Q2',
+                        help="add per-tree quantile columns (default 0.05,0.95)")
+    parser.add_argument('--explain', action='store_true', help="add per-feature contribution columns")
+    args = parser.parse_args(argv)
+
+    quantiles = tuple(float(q) for q in args.interval.split(',')) if args.interval else None
+    if quantiles or args.explain:
+        from forest_engine import compile_model
+
+        try:
+            model = model_cache.get_cache(args.model).derived('flat_forest', compile_model)
+        except TypeError as e:
+            raise SystemExit(f"--interval/--explain need a tree ensemble: {e}")
+    else:
+        model = model_cache.get_model(args.model)
+
+    def report(fraction, rows):
+        print(f"\r{fraction:6.1%}  {rows:,} rows", end='', file=sys.stderr, flush=True)
+
+    rows = score_file(model, args.input, args.output, args.chunksize, progress=report,
+                      rolling=not args.proxy_indicators, quantiles=quantiles, explain=args.explain)
+    print(f"\nWrote {rows:,} scored rows to {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,202 @@
+"""
+Repeatable timings for every stage of a prediction in final.py.
+
+Stages: joblib.load of the model, compute_indicators, the one-row
+input DataFrame, model.predict at batch sizes 1 … 100k (sklearn and the
+compiled FlatForest, plus the FlatForest's per-tree quantile intervals
+and tree-path contributions), the normalize_score / classify_liquidity
+post-processing (scalar and array forms), and the per-stage cost of
+instrumentation.timed.
+
+Results go to benchmarks/results.json. --save-baseline stores them as
+benchmarks/baseline.json; later runs compare each stage's median against
+it and flag (and exit non-zero on) any that got slower than --threshold.
+
+    python benchmarks.py --save-baseline
+    python benchmarks.py --threshold 0.25
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import instrumentation
+import model_cache
+from feature_pipeline import FeaturePipeline
+from forest_engine import FlatForest
+from liquidity import (
+    FEATURE_COLUMNS, build_feature_matrix, compute_indicators,
+    normalize_score, classify_liquidity, normalize_score_array, classify_liquidity_array,
+)
+
+BENCH_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks')
+RESULTS_PATH = os.path.join(BENCH_DIR, 'results.json')
+BASELINE_PATH = os.path.join(BENCH_DIR, 'baseline.json')
+
+BATCH_SIZES = (1, 10, 100, 1_000, 10_000, 100_000)
+DEMO_CANDLE = (56787.5, 64776.4, 55000.0, 63000.0, 123456.789)
+
+
+def _time(stmt, repeat=5, autorange=True):
+    """
+    Per-call seconds (min, median) for stmt, timeit-style: with autorange the
+    loop count is scaled so each repeat runs for at least 0.2 s, otherwise
+    each repeat is a single call (for slow stages).
+    """
+    timer = timeit.Timer(stmt)
+    number = timer.autorange()[0] if autorange else 1
+    runs = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+    return {'min_s': min(runs), 'median_s': float(np.median(runs)), 'number': number, 'repeat': repeat}
+
+
+def _synthetic_X(n, seed=0):
+    rng = np.random.default_rng(seed)
+    open_p = rng.lognormal(3, 2, n)
+    close_p = open_p * rng.uniform(0.95, 1.05, n)
+    return build_feature_matrix(open_p, np.maximum(open_p, close_p) * 1.01,
+                                np.minimum(open_p, close_p) * 0.99, close_p, rng.lognormal(12, 2, n))
+
+
+def run(model_path=None, max_batch=max(BATCH_SIZES), quick=False):
+    model_path = model_path or model_cache.default_model_path()
+    repeat = 3 if quick else 5
+    results = {}
+
+    def record(name, stmt, **kw):
+        results[name] = _time(stmt, repeat=repeat, **kw)
+        print(f"  {name:<32} {results[name]['median_s'] * 1e3:>12.4f} ms", file=sys.stderr)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+
+        record('joblib_load', lambda: joblib.load(model_path), autorange=False)
+        model = joblib.load(model_path)
+        flat = FlatForest.from_sklearn(model)
+
+        o, h, l, c, v = DEMO_CANDLE
+        record('compute_indicators', lambda: compute_indicators(o, h, l, c, v))
+
+        sma_5, ema_12, rsi, macd = compute_indicators(o, h, l, c, v)
+        record('input_dataframe_1row', lambda: pd.DataFrame({
+            'Open': [o], 'High': [h], 'Low': [l], 'Close': [c], 'Volume': [v],
+            'Market Cap': [c * v], 'SMA_5': [sma_5], 'EMA_12': [ema_12], 'RSI': [rsi], 'MACD': [macd],
+        }))
+        record('input_ndarray_1row', lambda: np.array([[o, h, l, c, v, c * v, sma_5, ema_12, rsi, macd]],
+                                                       dtype=np.float64))
+
+        X_all = _synthetic_X(max_batch)
+        frame_1 = pd.DataFrame(X_all[:1], columns=FEATURE_COLUMNS)
+        record('predict_sklearn_dataframe_1', lambda: model.predict(frame_1))
+        for n in BATCH_SIZES:
+            if n > max_batch:
+                break
+            X = X_all[:n]
+            big = n >= 10_000
+            record(f'predict_sklearn_{n}', lambda: model.predict(X), autorange=not big)
+            record(f'predict_flat_{n}', lambda: flat.predict(X), autorange=not big)
+            record(f'predict_interval_flat_{n}', lambda: flat.predict_interval(X), autorange=not big)
+            record(f'contributions_flat_{n}', lambda: flat.contributions(X), autorange=not big)
+
+        pipeline = FeaturePipeline(FEATURE_COLUMNS, flat)
+        record('predict_pipeline_flat_1', lambda: pipeline.predict(X_all[:1]))
+
+        raw = model.predict(X_all[:1])[0]
+        record('normalize_classify_scalar', lambda: classify_liquidity(normalize_score(raw, v, c * v)))
+
+        def timed_noop():
+            with instrumentation.timed('benchmark'):
+                pass
+
+        record('instrumentation_timed', timed_noop)
+
+        raw_all = model.predict(X_all)
+        record(f'normalize_classify_array_{max_batch}',
+               lambda: classify_liquidity_array(normalize_score_array(raw_all, X_all[:, 4], X_all[:, 5])),
+               autorange=False)
+
+    import sklearn
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'sklearn': sklearn.__version__,
+            'model': os.path.basename(model_path),
+            'quick': quick,
+        },
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """
+    Stages whose median is more than threshold (fractional) slower than baseline.
+    """
+    regressions = []
+    for name, now in current['results'].items():
+        before = baseline['results'].get(name)
+        if not before:
+            continue
+        ratio = now['median_s'] / before['median_s']
+        if ratio > 1 + threshold:
+            regressions.append({'stage': name, 'baseline_s': before['median_s'],
+                                'current_s': now['median_s'], 'ratio': ratio})
+    return regressions
+
+
+def _write(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as fh:
+        json.dump(data, fh, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark load / features / predict / post-processing.")
+    parser.add_argument('--model', default=None, help="model pickle (default: bundled model)")
+    parser.add_argument('--output', default=RESULTS_PATH)
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="flag stages slower than baseline by more than this fraction")
+    parser.add_argument('--max-batch', type=int, default=max(BATCH_SIZES))
+    parser.add_argument('--quick', action='store_true', help="fewer repeats")
+    args = parser.parse_args(argv)
+
+    print("Running benchmarks…", file=sys.stderr)
+    current = run(args.model, args.max_batch, args.quick)
+
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        current['baseline'] = {'path': args.baseline, 'timestamp': baseline['meta'].get('timestamp'),
+                               'threshold': args.threshold}
+        current['regressions'] = compare(current, baseline, args.threshold)
+    else:
+        current['regressions'] = []
+
+    _write(args.output, current)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    if args.save_baseline:
+        _write(args.baseline, current)
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+
+    for r in current['regressions']:
+        print(f"REGRESSION {r['stage']}: {r['baseline_s'] * 1e3:.4f} ms -> "
+              f"{r['current_s'] * 1e3:.4f} ms ({r['ratio']:.2f}×)", file=sys.stderr)
+    if current['regressions']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""
+Build the app's static UI assets into static/ so the page no longer pulls
+its background and navbar icons from remote URLs on every render.
+
+    python build_assets.py
+
+Background: the repo's JPEG, resized to a few widths and written as WebP
+plus a progressive, optimised JPEG fallback. Icons: the navbar's Twitter /
+Facebook PNGs, fetched once and stored at 1x and 2x; if they can't be
+fetched (offline build) the app keeps using the remote URLs.
+
+Streamlit serves static/ at app/static/ (enableStaticServing in
+.streamlit/config.toml); ui_assets.py picks up whatever was built here.
+"""
+import argparse
+import io
+import os
+import sys
+import urllib.request
+
+from PIL import Image
+
+from ui_assets import BACKGROUND_SOURCE, BACKGROUND_WIDTHS, ICON_SIZES, ICON_URLS, STATIC_DIR
+
+JPEG_QUALITY = 78
+WEBP_QUALITY = 72
+
+
+def _save(image, path, **params):
+    image.save(path, **params)
+    return os.path.getsize(path)
+
+
+def build_background(source=BACKGROUND_SOURCE, out_dir=STATIC_DIR, widths=BACKGROUND_WIDTHS):
+    """
+    bg-<width>.webp / bg-<width>.jpg for each width no larger than the source.
+    """
+    written = {}
+    with Image.open(source) as original:
+        original = original.convert('RGB')
+        for width in widths:
+            if width > original.width:
+                continue
+            height = round(original.height * width / original.width)
+            image = original if width == original.width else original.resize((width, height), Image.LANCZOS)
+            stem = os.path.join(out_dir, f'bg-{width}')
+            written[f'{stem}.webp'] = _save(image, f'{stem}.webp', quality=WEBP_QUALITY, method=6)
+            written[f'{stem}.jpg'] = _save(image, f'{stem}.jpg', quality=JPEG_QUALITY,
+                                           optimize=True, progressive=True)
+    return written
+
+
+def build_icons(out_dir=STATIC_DIR, urls=ICON_URLS, sizes=ICON_SIZES, timeout=10):
+    """
+    <name>-<size>.png for each icon; icons that can't be fetched are skipped.
+    """
+    written = {}
+    for name, url in urls.items():
+        try:
+            with urllib.request.urlopen(url, timeout=timeout) as resp:
+                data = resp.read()
+        except OSError as e:
+            print(f"  skipped {name} icon ({e}); the app will use {url}", file=sys.stderr)
+            continue
+        with Image.open(io.BytesIO(data)) as original:
+            original = original.convert('RGBA')
+            for size in sizes:
+                path = os.path.join(out_dir, f'{name}-{size}.png')
+                icon = original.resize((size, size), Image.LANCZOS)
+                written[path] = _save(icon, path, optimize=True)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompress the app's background and icons into static/.")
+    parser.add_argument('--source', default=BACKGROUND_SOURCE, help="background image")
+    parser.add_argument('--output', default=STATIC_DIR)
+    parser.add_argument('--no-icons', action='store_true', help="skip fetching the navbar icons")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output, exist_ok=True)
+    written = build_background(args.source, args.output)
+    if not args.no_icons:
+        written.update(build_icons(args.output))
+
+    print(f"Source: {args.source} ({os.path.getsize(args.source) / 1024:,.1f} KiB)", file=sys.stderr)
+    for path, size in written.items():
+        print(f"  {os.path.relpath(path):<28} {size / 1024:8.1f} KiB", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
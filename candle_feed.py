@@ -0,0 +1,396 @@
+"""
+Local live candle feeds for the app's streaming mode.
+
+A feed reads newline-delimited candles from one source on a background
+thread and fans them out to subscribers:
+
+    file:/path/to/candles.log   tail a file that another process appends to
+    /path/to/candles.log        (same)
+    tcp://127.0.0.1:9009        listen on a localhost socket; any number of
+                                producers connect and write lines
+
+Each line is a JSON object ({"coin": "Bitcoin", "open": .., "high": ..,
+"low": .., "close": .., "volume": ..}; keys are case-insensitive and coin
+is optional) or CSV: "coin,open,high,low,close,volume" or
+"open,high,low,close,volume". Malformed lines are counted and skipped.
+
+Every subscriber has its own bounded queue. If a slow consumer lets it
+fill, the oldest candles are dropped and counted, so the monitor always
+works on the newest data.
+
+Feeds are process-wide (one reader per source, shared by every session)
+and stop when their last subscriber leaves. A stand-in producer replays
+synthetic random-walk candles, or a CSV, into either kind of source:
+
+    python candle_feed.py tcp://127.0.0.1:9009 --rate 20
+    python candle_feed.py candles.log --csv candles.csv --rate 100
+"""
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import socket
+import socketserver
+import sys
+import threading
+import time
+from collections import deque, namedtuple
+
+Candle = namedtuple('Candle', 'coin open high low close volume received')
+
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+DEFAULT_QUEUE = 1_000
+
+
+def parse_candle(line, received=None):
+    """
+    One JSON or CSV line -> Candle; ValueError if it isn't a valid candle.
+    received defaults to time.perf_counter() (for update latency).
+    """
+    line = line.strip()
+    if not line:
+        raise ValueError("empty line")
+    coin = None
+    if line.startswith('{'):
+        try:
+            payload = {str(k).lower(): v for k, v in json.loads(line).items()}
+        except (json.JSONDecodeError, AttributeError):
+            raise ValueError("invalid JSON candle")
+        coin = payload.get('coin') or payload.get('symbol')
+        try:
+            values = [payload[f] for f in CANDLE_FIELDS]
+        except KeyError as e:
+            raise ValueError(f"missing field {e.args[0]!r}")
+    else:
+        values = [v.strip() for v in line.split(',')]
+        if len(values) == len(CANDLE_FIELDS) + 1:
+            coin, values = values[0], values[1:]
+        elif len(values) != len(CANDLE_FIELDS):
+            raise ValueError(f"expected {len(CANDLE_FIELDS)} or {len(CANDLE_FIELDS) + 1} CSV fields")
+    try:
+        open_p, high_p, low_p, close_p, volume = (float(v) for v in values)
+    except (TypeError, ValueError):
+        raise ValueError(f"fields {', '.join(CANDLE_FIELDS)} must be numbers")
+    if not all(map(math.isfinite, (open_p, high_p, low_p, close_p, volume))):
+        raise ValueError("fields must be finite numbers")
+    return Candle(str(coin) if coin else '', open_p, high_p, low_p, close_p, volume,
+                  time.perf_counter() if received is None else received)
+
+
+# --- sources: open() runs in the caller (so errors surface there), run()
+# on the feed's thread, calling emit(line) for every line read ---
+class FileTailSource:
+    """
+    Follow a file like `tail -F`: new lines only (unless from_start), and
+    reopen from the top if the file is truncated or replaced.
+    """
+
+    def __init__(self, path, from_start=False, poll_interval=0.1):
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+
+    def describe(self):
+        return f"file:{self.path}"
+
+    def open(self):
+        pass
+
+    def run(self, emit, stop):
+        fh, partial, first = None, '', True
+        try:
+            while not stop.is_set():
+                if fh is None:
+                    try:
+                        fh = open(self.path, 'r', encoding='utf-8', errors='replace')
+                    except FileNotFoundError:
+                        stop.wait(self.poll_interval)
+                        continue
+                    if first and not self.from_start:
+                        fh.seek(0, os.SEEK_END)
+                    first, partial = False, ''
+
+                line = fh.readline()
+                if line:
+                    if not line.endswith('\n'):  # writer is mid-line
+                        partial += line
+                        continue
+                    emit(partial + line)
+                    partial = ''
+                    continue
+
+                try:
+                    st = os.stat(self.path)
+                    rotated = st.st_ino != os.fstat(fh.fileno()).st_ino or st.st_size < fh.tell()
+                except FileNotFoundError:
+                    rotated = True
+                if rotated:
+                    fh.close()
+                    fh = None
+                else:
+                    stop.wait(self.poll_interval)
+        finally:
+            if fh is not None:
+                fh.close()
+
+
+class SocketSource:
+    """
+    Line-oriented TCP listener on localhost; every connected producer's
+    lines go into the feed.
+    """
+
+    def __init__(self, host='127.0.0.1', port=9009):
+        self.host = host
+        self.port = port
+        self._server = None
+        self._emit = None
+
+    def describe(self):
+        return f"tcp://{self.host}:{self.port}"
+
+    def open(self):
+        source = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw in self.rfile:
+                    if source._emit is None:
+                        break
+                    source._emit(raw.decode('utf-8', errors='replace'))
+
+        class Server(socketserver.ThreadingTCPServer):
+            allow_reuse_address = True
+            daemon_threads = True
+
+        self._server = Server((self.host, self.port), Handler)
+        self._server.timeout = 0.2
+
+    def run(self, emit, stop):
+        self._emit = emit
+        try:
+            while not stop.is_set():
+                self._server.handle_request()
+        finally:
+            self._emit = None
+            self._server.server_close()
+
+
+def source_from_spec(spec):
+    spec = spec.strip()
+    if spec.startswith('tcp://'):
+        host, _, port = spec[len('tcp://'):].rpartition(':')
+        if not port.isdigit():
+            raise ValueError(f"expected tcp://host:port, got {spec!r}")
+        return SocketSource(host or '127.0.0.1', int(port))
+    if spec.startswith('file:'):
+        spec = spec[len('file:'):]
+    if not spec:
+        raise ValueError("empty feed source")
+    return FileTailSource(spec)
+
+
+class Subscription:
+    """
+    One consumer's bounded view of a feed.
+    """
+
+    def __init__(self, feed, maxlen):
+        self.feed = feed
+        self.maxlen = maxlen
+        self._queue = deque()
+        self._lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+
+    def _push(self, candle):
+        with self._lock:
+            if len(self._queue) >= self.maxlen:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(candle)
+            self.received += 1
+
+    def drain(self):
+        """
+        Every queued candle, oldest first.
+        """
+        with self._lock:
+            candles = list(self._queue)
+            self._queue.clear()
+            return candles
+
+    def close(self):
+        self.feed._unsubscribe(self)
+
+    def stats(self):
+        with self._lock:
+            return {'received': self.received, 'dropped': self.dropped, 'queued': len(self._queue),
+                    'max_queue': self.maxlen}
+
+
+class CandleFeed:
+    def __init__(self, source, spec=None):
+        self.source = source
+        self.spec = spec or source.describe()
+        self.lines = 0
+        self.rejected = 0
+        self.error = None
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'candle-feed {self.spec}', daemon=True)
+
+    def start(self):
+        self.source.open()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self):
+        return self._thread.is_alive()
+
+    def _emit(self, line):
+        try:
+            candle = parse_candle(line)
+        except ValueError:
+            with self._lock:
+                self.lines += 1
+                self.rejected += 1
+            return
+        with self._lock:
+            self.lines += 1
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub._push(candle)
+
+    def _run(self):
+        try:
+            self.source.run(self._emit, self._stop)
+        except Exception as e:  # surfaced through stats() / the UI
+            self.error = f"{type(e).__name__}: {e}"
+
+    def subscribe(self, maxlen=DEFAULT_QUEUE):
+        sub = Subscription(self, maxlen)
+        with self._lock:
+            self._subscribers.append(sub)
+        return sub
+
+    def _unsubscribe(self, sub):
+        with self._lock:
+            if sub in self._subscribers:
+                self._subscribers.remove(sub)
+            idle = not self._subscribers
+        if idle:
+            _release(self)
+
+    def stats(self):
+        with self._lock:
+            return {'source': self.spec, 'running': self.running, 'lines': self.lines,
+                    'rejected': self.rejected, 'subscribers': len(self._subscribers), 'error': self.error}
+
+
+_feeds = {}
+_feeds_lock = threading.Lock()
+
+
+def open_feed(spec):
+    """
+    The running feed for a source spec, started on first use.
+    """
+    source = source_from_spec(spec)
+    key = source.describe()
+    with _feeds_lock:
+        feed = _feeds.get(key)
+        if feed is None or not feed.running:
+            feed = _feeds[key] = CandleFeed(source, key).start()
+        return feed
+
+
+def _release(feed):
+    with _feeds_lock:
+        if _feeds.get(feed.spec) is feed:
+            del _feeds[feed.spec]
+    feed.stop()
+
+
+# --- stand-in producer ---
+def _random_walk(coins, seed=0):
+    rng = random.Random(seed)
+    prices = {coin: 10 ** rng.uniform(-1, 4) for coin in coins}
+    while True:
+        for coin in coins:
+            open_p = prices[coin]
+            close_p = open_p * (1 + rng.gauss(0, 0.01))
+            high_p = max(open_p, close_p) * (1 + abs(rng.gauss(0, 0.003)))
+            low_p = min(open_p, close_p) * (1 - abs(rng.gauss(0, 0.003)))
+            volume = 10 ** rng.uniform(4, 8)
+            prices[coin] = close_p
+            yield {'coin': coin, 'open': open_p, 'high': high_p, 'low': low_p, 'close': close_p,
+                   'volume': volume}
+
+
+def _csv_candles(path):
+    with open(path, newline='') as fh:
+        for row in csv.DictReader(fh):
+            row = {k.strip().lower(): v for k, v in row.items() if k}
+            yield {'coin': row.get('coin') or row.get('symbol') or '',
+                   **{f: float(row[f]) for f in CANDLE_FIELDS}}
+
+
+def replay(target, candles, rate=10.0, limit=None):
+    """
+    Write candles to a tcp://host:port feed or append them to a file,
+    at rate candles per second (0 = as fast as possible).
+    """
+    if target.startswith('tcp://'):
+        host, _, port = target[len('tcp://'):].rpartition(':')
+        sock = socket.create_connection((host or '127.0.0.1', int(port)))
+        out = sock.makefile('w', encoding='utf-8')
+    else:
+        sock, out = None, open(target[len('file:'):] if target.startswith('file:') else target, 'a')
+    interval = 1.0 / rate if rate > 0 else 0.0
+    sent = 0
+    try:
+        next_at = time.perf_counter()
+        for candle in candles:
+            if limit is not None and sent >= limit:
+                break
+            out.write(json.dumps(candle) + '\n')
+            out.flush()
+            sent += 1
+            if interval:
+                next_at += interval
+                time.sleep(max(0.0, next_at - time.perf_counter()))
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
+    finally:
+        out.close()
+        if sock is not None:
+            sock.close()
+    return sent
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay candles into a live feed (stand-in for an exchange).")
+    parser.add_argument('target', help="tcp://host:port or a file to append to")
+    parser.add_argument('--csv', default=None, help="replay OHLCV rows from this CSV instead of a random walk")
+    parser.add_argument('--coins', default='Bitcoin,Ethereum,Solana', help="coins for the random walk")
+    parser.add_argument('--rate', type=float, default=10.0, help="candles per second (0 = unthrottled)")
+    parser.add_argument('--limit', type=int, default=None, help="stop after this many candles")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    candles = _csv_candles(args.csv) if args.csv else _random_walk(args.coins.split(','), args.seed)
+    print(f"Replaying into {args.target} at {args.rate:g}/s (Ctrl-C to stop)…", file=sys.stderr)
+    sent = replay(args.target, candles, args.rate, args.limit)
+    print(f"Sent {sent:,} candles", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+"""
+Multi-coin liquidity dashboard: the latest candle of every tracked coin,
+scored in one batched pass.
+
+CandleBook keeps the newest OHLCV row per coin in a single (n, 5) array,
+so assembling the feature matrix is a slice rather than n DataFrame
+builds, and score_book() runs one predict over all coins. A refresh costs
+roughly the same for 20 coins as for a few hundred:
+
+    python dashboard.py --bench
+"""
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from liquidity import (
+    OHLCV_COLUMNS, build_feature_matrix, compute_indicators_array,
+    normalize_score_array, liquidity_level_array, trend_signal_array, predict_trend_array,
+)
+
+TREND_LABELS = {1: '📈 Bullish', 0: '⚖️ Sideways', -1: '📉 Bearish'}
+
+
+class CandleBook:
+    """
+    Latest candle per coin. Rows are appended for new coins and overwritten
+    in place for known ones; the array grows by doubling.
+    """
+
+    def __init__(self, capacity=32):
+        self._index = {}
+        self._coins = []
+        self._rows = np.empty((capacity, len(OHLCV_COLUMNS)))
+        self._updated = np.empty(capacity)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._coins)
+
+    def _slot(self, coin):
+        slot = self._index.get(coin)
+        if slot is None:
+            slot = self._index[coin] = len(self._coins)
+            self._coins.append(coin)
+            if slot == len(self._rows):
+                self._rows = np.concatenate([self._rows, np.empty_like(self._rows)])
+                self._updated = np.concatenate([self._updated, np.empty_like(self._updated)])
+        return slot
+
+    def update(self, coin, candle, at=None):
+        self.update_many([coin], [candle], at)
+
+    def update_many(self, coins, candles, at=None):
+        """
+        Store (n, 5) OHLCV rows for coins; when a coin repeats, its last row wins.
+        """
+        candles = np.asarray(candles, dtype=np.float64).reshape(-1, len(OHLCV_COLUMNS))
+        with self._lock:
+            slots = np.fromiter((self._slot(c) for c in coins), dtype=np.intp, count=len(candles))
+            _, last = np.unique(slots[::-1], return_index=True)
+            keep = len(slots) - 1 - last
+            self._rows[slots[keep]] = candles[keep]
+            self._updated[slots[keep]] = time.time() if at is None else at
+
+    def snapshot(self):
+        """
+        (coins, (n, 5) OHLCV copy, update times) for every coin in the book.
+        """
+        with self._lock:
+            n = len(self._coins)
+            return list(self._coins), self._rows[:n].copy(), self._updated[:n].copy()
+
+
+def score_book(book, predictor, engine=None):
+    """
+    Score every coin in the book with one predict call.
+    Indicators are the coin's rolling values when engine has history for
+    it, otherwise the single-candle proxies. Returns a dict of columns,
+    one entry per coin, highest liquidity score first.
+    """
+    coins, rows, updated = book.snapshot()
+    if not coins:
+        return None
+    open_p, high_p, low_p, close_p, volume = rows.T
+    indicators = np.array(compute_indicators_array(open_p, high_p, low_p, close_p))
+    rolling = np.zeros(len(coins), dtype=bool)
+    if engine is not None:
+        for i, coin in enumerate(coins):
+            latest = engine.latest(coin)
+            if latest is not None:
+                indicators[:, i] = latest
+                rolling[i] = True
+
+    X = build_feature_matrix(open_p, high_p, low_p, close_p, volume, indicators=indicators)
+    score = normalize_score_array(predictor.predict(X), volume, X[:, 5])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change_pct = np.where(open_p != 0, (close_p - open_p) / open_p * 100, 0.0)
+
+    order = np.argsort(-score, kind='stable')
+    return {
+        'Coin': np.asarray(coins, dtype=object)[order],
+        'Liquidity Score': score[order],
+        'Liquidity': liquidity_level_array(score)[order],
+        'Trend': np.array([TREND_LABELS[s] for s in trend_signal_array(open_p, close_p).tolist()])[order],
+        'Change %': change_pct[order],
+        'Close': close_p[order],
+        'Volume': volume[order],
+        'Vol × Close': X[order, 5],
+        'Indicators': np.where(rolling, 'rolling', 'proxy')[order],
+        'Updated': updated[order],
+    }
+
+
+def _random_candles(n, seed=0):
+    rng = np.random.default_rng(seed)
+    open_p = rng.lognormal(3, 2, n)
+    close_p = open_p * rng.uniform(0.95, 1.05, n)
+    return np.column_stack([open_p, np.maximum(open_p, close_p) * 1.01,
+                            np.minimum(open_p, close_p) * 0.99, close_p, rng.lognormal(12, 2, n)])
+
+
+def bench(coin_counts=(20, 100, 500), repeat=5, model_path=None):
+    """
+    Refresh time for a whole book, batched vs one predict per coin (the
+    single-coin path's cost times n).
+    """
+    import model_cache
+    from forest_engine import compile_model
+
+    cache = model_cache.get_cache(model_path)
+    predictor = cache.derived('flat_forest', compile_model)
+    results = []
+    for n in coin_counts:
+        book = CandleBook()
+        book.update_many([f'coin-{i}' for i in range(n)], _random_candles(n))
+        coins, rows, _ = book.snapshot()
+
+        def per_coin():
+            for row in rows:
+                X = build_feature_matrix(*row[:, None])
+                predictor.predict(X)
+                predict_trend_array(row[0], row[3], row[4])
+
+        timings = {}
+        for name, fn in (('batched', lambda: score_book(book, predictor)), ('per_coin', per_coin)):
+            runs = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                fn()
+                runs.append(time.perf_counter() - start)
+            timings[name] = float(np.median(runs))
+        results.append({'coins': n, **timings})
+        print(f"  {n:>5} coins   batched {timings['batched'] * 1e3:8.2f} ms   "
+              f"per-coin {timings['per_coin'] * 1e3:8.2f} ms", file=sys.stderr)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Multi-coin dashboard scoring.")
+    parser.add_argument('--bench', action='store_true', help="time batched vs per-coin refreshes")
+    parser.add_argument('--coins', default='20,100,500', help="book sizes for --bench")
+    parser.add_argument('--model', default=None)
+    args = parser.parse_args(argv)
+    if args.bench:
+        bench(tuple(int(n) for n in args.coins.split(',')), model_path=args.model)
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
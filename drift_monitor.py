@@ -0,0 +1,332 @@
+"""
+Streaming drift check of the model's inputs against its training data.
+
+train.py writes a summary of the training rows next to the model
+(<model>.drift.json): per-feature count / mean / std / min / max and a
+histogram over fixed bins cut at the training deciles. A DriftMonitor
+built from it folds every incoming feature matrix into the same
+statistics — Welford/Chan running moments and bin counts, O(features ×
+bins) memory whatever the traffic, no raw rows kept — and report()
+compares the two:
+
+    psi        population stability index over the bins
+               (< 0.1 stable, 0.1–0.25 moderate, > 0.25 drifted)
+    shift      live mean minus training mean, in training standard deviations
+    outside    fraction of live values beyond the training min/max
+
+Columns are compared by position, as the model sees them: if the caller's
+features differ from the ones the model was trained on (names are in the
+report), that is exactly the drift this is meant to show.
+
+    python drift_monitor.py summarize coin_gecko_2022-03-17.csv    # summary for the app's model
+    python drift_monitor.py check candles.csv                       # score a file against it
+
+The app and scoring service pick the summary up automatically
+($CRYPTO_LIQUIDITY_DRIFT_SUMMARY overrides the location).
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+SUMMARY_FORMAT = 1
+SUMMARY_ENV_VAR = 'CRYPTO_LIQUIDITY_DRIFT_SUMMARY'
+DEFAULT_BINS = 10
+PSI_MODERATE, PSI_DRIFT = 0.1, 0.25
+MIN_COUNT = 100  # live rows needed before a feature is judged
+_PSI_FLOOR = 1e-4  # empty bins would make PSI infinite
+
+
+def summary_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '.drift.json'
+
+
+def _bin_index(X, edges):
+    # bin of every value: number of interior edges <= x, one broadcast for all features
+    return (X[:, :, None] >= edges[None, :, :]).sum(axis=2)
+
+
+def _moments(X):
+    """
+    Per-column (count, mean, M2) over the finite values of X.
+    """
+    finite = np.isfinite(X)
+    count = finite.sum(axis=0)
+    safe = np.maximum(count, 1)
+    mean = np.where(finite, X, 0.0).sum(axis=0) / safe
+    m2 = (np.where(finite, X - mean, 0.0) ** 2).sum(axis=0)
+    return count, mean, m2
+
+
+def summarize(X, features, bins=DEFAULT_BINS, metadata=None):
+    """
+    Training-side summary of an (n, n_features) array, as a JSON-ready dict.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if X.ndim != 2 or X.shape[1] != len(features):
+        raise ValueError(f"expected (n, {len(features)}) rows, got shape {X.shape}")
+    edges = np.array([np.nanquantile(np.where(np.isfinite(col), col, np.nan), np.arange(1, bins) / bins)
+                      for col in X.T])
+    monitor = DriftMonitor(features, edges)
+    monitor.update(X)
+    state = monitor.state()
+    return {
+        'format': SUMMARY_FORMAT,
+        'features': list(features),
+        'edges': edges.tolist(),
+        'count': state['count'].tolist(),
+        'mean': state['mean'].tolist(),
+        'std': state['std'].tolist(),
+        'min': state['min'].tolist(),
+        'max': state['max'].tolist(),
+        'hist': state['hist'].tolist(),
+        'created': time.time(),
+        'metadata': dict(metadata or {}),
+    }
+
+
+def save_summary(summary, path):
+    """
+    Write atomically, as the model next to it is.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'w') as fh:
+        json.dump(summary, fh, indent=1)
+    os.replace(tmp, path)
+
+
+def load_summary(path):
+    with open(path) as fh:
+        summary = json.load(fh)
+    if summary.get('format') != SUMMARY_FORMAT:
+        raise ValueError(f"{path}: unsupported drift summary format {summary.get('format')!r}")
+    return summary
+
+
+class DriftMonitor:
+    """
+    Running per-feature moments, range and fixed-bin histogram. update() is
+    thread-safe, so one monitor can serve every session in the process.
+    """
+
+    def __init__(self, features, edges, reference=None):
+        self.features = tuple(features)
+        self.edges = np.ascontiguousarray(edges, dtype=np.float64)
+        if self.edges.ndim != 2 or len(self.edges) != len(self.features):
+            raise ValueError(f"need one row of bin edges per feature, got shape {self.edges.shape}")
+        self.reference = reference
+        n, n_bins = len(self.features), self.edges.shape[1] + 1
+        self._count = np.zeros(n, dtype=np.int64)
+        self._mean = np.zeros(n)
+        self._m2 = np.zeros(n)
+        self._min = np.full(n, np.inf)
+        self._max = np.full(n, -np.inf)
+        self._nonfinite = np.zeros(n, dtype=np.int64)
+        self._outside = np.zeros(n, dtype=np.int64)
+        self._hist = np.zeros(n * n_bins, dtype=np.int64)
+        self._bin_offsets = np.arange(n) * n_bins
+        self._lock = threading.Lock()
+        if reference is not None:
+            self._ref_min = np.asarray(reference['min'], dtype=np.float64)
+            self._ref_max = np.asarray(reference['max'], dtype=np.float64)
+
+    @classmethod
+    def from_summary(cls, summary):
+        return cls(summary['features'], summary['edges'], reference=summary)
+
+    def update(self, X):
+        """
+        Fold an (n, n_features) array — or one row — into the statistics.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != len(self.features):
+            raise ValueError(f"Expected {len(self.features)} features, got {X.shape[1]}")
+        if not len(X):
+            return
+        count, mean, m2 = _moments(X)
+        finite = np.isfinite(X)
+        bins = np.where(finite, _bin_index(X, self.edges), -1) + self._bin_offsets
+        hist = np.bincount(bins[finite], minlength=len(self._hist))
+        low, high = np.where(finite, X, np.inf).min(axis=0), np.where(finite, X, -np.inf).max(axis=0)
+        outside = None
+        if self.reference is not None:
+            outside = (finite & ((X < self._ref_min) | (X > self._ref_max))).sum(axis=0)
+
+        with self._lock:
+            # Chan et al.'s pairwise merge of (count, mean, M2)
+            total = self._count + count
+            safe = np.maximum(total, 1)
+            delta = mean - self._mean
+            self._mean += delta * count / safe
+            self._m2 += m2 + delta ** 2 * self._count * count / safe
+            self._count = total
+            self._min = np.minimum(self._min, low)
+            self._max = np.maximum(self._max, high)
+            self._nonfinite += len(X) - count
+            self._hist += hist
+            if outside is not None:
+                self._outside += outside
+
+    def state(self):
+        with self._lock:
+            count = self._count.copy()
+            return {
+                'count': count,
+                'mean': self._mean.copy(),
+                'std': np.sqrt(self._m2 / np.maximum(count - 1, 1)),
+                'min': self._min.copy(),
+                'max': self._max.copy(),
+                'nonfinite': self._nonfinite.copy(),
+                'outside': self._outside.copy(),
+                'hist': self._hist.reshape(len(self.features), -1).copy(),
+            }
+
+    def reset(self):
+        with self._lock:
+            for a in (self._count, self._mean, self._m2, self._nonfinite, self._outside, self._hist):
+                a[:] = 0
+            self._min[:] = np.inf
+            self._max[:] = -np.inf
+
+    def report(self, features=None, min_count=MIN_COUNT):
+        """
+        Per-feature comparison with the training summary. features names the
+        caller's columns (defaults to the training names). status is 'drift',
+        'moderate', 'stable', or 'insufficient' below min_count live values.
+        """
+        if self.reference is None:
+            raise ValueError("monitor has no training summary to compare with")
+        live = self.state()
+        ref = self.reference
+        ref_hist = np.asarray(ref['hist'], dtype=np.float64)
+        p = np.maximum(ref_hist / np.maximum(ref_hist.sum(axis=1, keepdims=True), 1), _PSI_FLOOR)
+        q = np.maximum(live['hist'] / np.maximum(live['hist'].sum(axis=1, keepdims=True), 1), _PSI_FLOOR)
+        psi = ((q - p) * np.log(q / p)).sum(axis=1)
+        ref_std = np.asarray(ref['std'], dtype=np.float64)
+        shift = (live['mean'] - np.asarray(ref['mean'])) / np.where(ref_std > 0, ref_std, 1.0)
+
+        rows = []
+        for i, name in enumerate(features or self.features):
+            n = int(live['count'][i])
+            if n < min_count:
+                status = 'insufficient'
+            else:
+                status = 'drift' if psi[i] > PSI_DRIFT else 'moderate' if psi[i] > PSI_MODERATE else 'stable'
+            rows.append({
+                'feature': name,
+                'trained_on': self.features[i],
+                'count': n,
+                'nonfinite': int(live['nonfinite'][i]),
+                'mean': float(live['mean'][i]) if n else None,
+                'train_mean': float(ref['mean'][i]),
+                'shift_sd': float(shift[i]) if n else None,
+                'outside': float(live['outside'][i] / n) if n else None,
+                'psi': float(psi[i]) if n else None,
+                'status': status,
+            })
+        return {
+            'count': int(live['count'].max()),
+            'drifted': [r['feature'] for r in rows if r['status'] == 'drift'],
+            'features': rows,
+        }
+
+
+def load_monitor(model_path):
+    """
+    A monitor for the model at model_path, from $CRYPTO_LIQUIDITY_DRIFT_SUMMARY
+    or <model>.drift.json; None when there is no summary.
+    """
+    path = os.environ.get(SUMMARY_ENV_VAR) or summary_path_for(model_path)
+    if not os.path.exists(path):
+        return None
+    return DriftMonitor.from_summary(load_summary(path))
+
+
+def get_monitor(cache=None):
+    """
+    The process-wide monitor for the cached model, started afresh with
+    every model reload; None without a training summary.
+    """
+    import model_cache
+
+    cache = cache or model_cache.get_cache()
+    return cache.derived('drift_monitor', lambda _: load_monitor(cache.path))
+
+
+def _fmt(value, spec):
+    return '-' if value is None else format(value, spec)
+
+
+def format_report(report):
+    lines = [f"{'feature':<12} {'trained on':<15} {'count':>8} {'psi':>7} {'shift sd':>9} "
+             f"{'outside':>8} {'status':<12}"]
+    for r in report['features']:
+        lines.append(f"{r['feature']:<12} {r['trained_on']:<15} {r['count']:>8,} {_fmt(r['psi'], '.3f'):>7} "
+                     f"{_fmt(r['shift_sd'], '+.2f'):>9} {_fmt(r['outside'], '.1%'):>8} {r['status']:<12}")
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    import model_cache
+
+    parser = argparse.ArgumentParser(description="Training-data summaries and input drift checks.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_sum = sub.add_parser('summarize', help="write the training summary for a model")
+    p_sum.add_argument('data', help="snapshot CSV the model was trained on")
+    p_sum.add_argument('--model', default=None, help="model it describes (default: the app's model)")
+    p_sum.add_argument('--output', default=None, help="default: <model>.drift.json")
+    p_sum.add_argument('--bins', type=int, default=DEFAULT_BINS)
+
+    p_check = sub.add_parser('check', help="score a candle file against the summary")
+    p_check.add_argument('input', help="CSV or Parquet file with Open, High, Low, Close, Volume columns")
+    p_check.add_argument('--model', default=None)
+    p_check.add_argument('--summary', default=None, help="default: <model>.drift.json")
+    p_check.add_argument('--chunksize', type=int, default=50_000)
+    p_check.add_argument('--json', action='store_true', help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or model_cache.default_model_path()
+    if args.command == 'summarize':
+        from train import load_prepared
+        from training_data import MODEL_FEATURES, split
+
+        frame, _ = load_prepared(args.data)
+        X_train = split(frame)[0]
+        output = args.output or summary_path_for(model_path)
+        save_summary(summarize(X_train.to_numpy(dtype=np.float64), MODEL_FEATURES, args.bins, {
+            'data': os.path.abspath(args.data), 'rows': 'training split'}), output)
+        print(f"Summary of {len(X_train):,} training rows: {output}", file=sys.stderr)
+        return
+
+    import pandas as pd
+
+    from batch_scoring import iter_ohlcv_chunks, normalise_columns, rolling_indicator_arrays
+    from indicator_engine import IndicatorEngine
+    from liquidity import FEATURE_COLUMNS, OHLCV_COLUMNS, build_feature_matrix
+
+    summary_path = args.summary or os.environ.get(SUMMARY_ENV_VAR) or summary_path_for(model_path)
+    if not os.path.exists(summary_path):
+        raise SystemExit(f"no training summary at {summary_path} (run: drift_monitor.py summarize DATA)")
+    monitor = DriftMonitor.from_summary(load_summary(summary_path))
+    engine = IndicatorEngine()
+    # the same features batch_scoring feeds the model
+    for frame, _ in iter_ohlcv_chunks(args.input, args.chunksize):
+        frame = normalise_columns(frame)
+        ohlcv = [pd.to_numeric(frame[c], errors='coerce').to_numpy(dtype=np.float64) for c in OHLCV_COLUMNS]
+        monitor.update(build_feature_matrix(*ohlcv, indicators=rolling_indicator_arrays(engine, frame, ohlcv[3])))
+    report = monitor.report(FEATURE_COLUMNS)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    if report['drifted']:
+        print(f"Drift in: {', '.join(report['drifted'])}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
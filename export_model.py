@@ -0,0 +1,258 @@
+"""
+Export a smaller forest artifact and report what it costs in accuracy.
+
+Starting from the pickled RandomForestRegressor, the export can
+  * cap tree depth (nodes at the cap become leaves holding their mean),
+  * keep only the N trees that best reproduce the full forest, chosen
+    greedily on the training rows (or on synthetic rows without data),
+  * store leaf values as float32/float16 and node indices in the
+    narrowest integer type that fits.
+Thresholds are always stored as float32, which is exact for the float32
+inputs the trees compare against.
+
+The result is a FlatForest .npz that model_cache and the app load like the
+pickle. The JSON report compares the two artifacts on the notebook's
+held-out split (MAE / RMSE / R²) when --data points at the CoinGecko CSV.
+
+    python export_model.py --data coin_gecko_2022-03-17.csv --max-depth 12 --n-trees 40
+    python export_model.py --data coin_gecko_2022-03-17.csv --sweep
+"""
+import argparse
+import json
+import os
+
+import numpy as np
+
+import model_cache
+from forest_engine import FlatForest
+
+VALUE_DTYPES = {'float64': np.float64, 'float32': np.float32, 'float16': np.float16}
+
+
+def _node_depths(flat):
+    """
+    Depth of every reachable node (-1 for unreachable ones).
+    """
+    depth = np.full(flat.n_nodes, -1, dtype=np.int64)
+    frontier = flat.roots.astype(np.int64)
+    level = 0
+    while len(frontier):
+        depth[frontier] = level
+        children = np.concatenate([flat.left[frontier], flat.right[frontier]]).astype(np.int64)
+        children = np.unique(children[children != np.concatenate([frontier, frontier])])
+        frontier = children[depth[children] < 0]
+        level += 1
+    return depth
+
+
+def _subset(flat, keep_nodes, keep_trees):
+    """
+    Rebuild the arrays with only keep_nodes (closed under children) and the
+    roots of keep_trees, renumbering node indices.
+    """
+    new_index = np.cumsum(keep_nodes) - 1
+    depth = _node_depths(flat)
+    roots = flat.roots[keep_trees]
+    return FlatForest(
+        flat.feature[keep_nodes],
+        flat.threshold[keep_nodes],
+        new_index[flat.left[keep_nodes]],
+        new_index[flat.right[keep_nodes]],
+        flat.value[keep_nodes],
+        new_index[roots],
+        depth[keep_nodes].max() if keep_nodes.any() else 0,
+        flat.n_features,
+    )
+
+
+def cap_depth(flat, max_depth):
+    """
+    Turn every split at max_depth into a leaf and drop the subtrees below it.
+    """
+    depth = _node_depths(flat)
+    feature, threshold = flat.feature.copy(), flat.threshold.copy()
+    left, right = flat.left.copy(), flat.right.copy()
+
+    ids = np.arange(flat.n_nodes)
+    cut = depth == max_depth
+    feature[cut] = 0
+    threshold[cut] = np.inf
+    left[cut] = ids[cut]
+    right[cut] = ids[cut]
+
+    capped = FlatForest(feature, threshold, left, right, flat.value, flat.roots,
+                        min(flat.max_depth, max_depth), flat.n_features)
+    reachable = _node_depths(capped) >= 0
+    return _subset(capped, reachable, np.arange(flat.n_trees))
+
+
+def select_trees(flat, keep):
+    """
+    Keep only the trees with the given indices. They stay in their original
+    forest order, whatever the order of keep.
+    """
+    keep = np.asarray(keep)
+    tree_of_node = np.searchsorted(flat.roots, np.arange(flat.n_nodes), side='right') - 1
+    keep_nodes = np.isin(tree_of_node, keep)
+    order = np.argsort(flat.roots[keep])
+    return _subset(flat, keep_nodes, keep[order])
+
+
+def greedy_tree_order(flat, X, n_trees):
+    """
+    Forward selection of the n_trees whose mean best tracks the full forest on X.
+    """
+    per_tree = flat.tree_predictions(X)
+    target = per_tree.mean(axis=1)
+    chosen, running = [], np.zeros(len(X))
+    available = np.ones(flat.n_trees, dtype=bool)
+    for k in range(1, min(n_trees, flat.n_trees) + 1):
+        errors = (((running[:, None] + per_tree) / k - target[:, None]) ** 2).mean(axis=0)
+        errors[~available] = np.inf
+        best = int(np.argmin(errors))
+        chosen.append(best)
+        available[best] = False
+        running += per_tree[:, best]
+    return np.array(chosen)
+
+
+def narrow(flat, value_dtype=np.float32):
+    """
+    Same forest with narrow index types and reduced-precision node values.
+    """
+    index_dtype = np.int16 if flat.n_nodes <= np.iinfo(np.int16).max else np.int32
+    return FlatForest(
+        flat.feature.astype(np.int8 if flat.n_features <= 127 else np.int16),
+        flat.threshold,
+        flat.left.astype(index_dtype),
+        flat.right.astype(index_dtype),
+        flat.value.astype(value_dtype),
+        flat.roots.astype(index_dtype),
+        flat.max_depth,
+        flat.n_features,
+    )
+
+
+def compress(flat, calibration_X, max_depth=None, n_trees=None, value_dtype=np.float32):
+    if max_depth is not None and max_depth < flat.max_depth:
+        flat = cap_depth(flat, max_depth)
+    if n_trees is not None and n_trees < flat.n_trees:
+        flat = select_trees(flat, greedy_tree_order(flat, calibration_X, n_trees))
+    return narrow(flat, value_dtype)
+
+
+def _synthetic_rows(n_features, n_rows=5_000):
+    from liquidity import FEATURE_COLUMNS, build_feature_matrix
+
+    if n_features != len(FEATURE_COLUMNS):
+        raise SystemExit("--data is required for models that don't take the 10 app features")
+    rng = np.random.default_rng(0)
+    open_p = rng.lognormal(0, 4, n_rows)
+    close_p = open_p * rng.uniform(0.9, 1.1, n_rows)
+    return build_feature_matrix(open_p, np.maximum(open_p, close_p), np.minimum(open_p, close_p),
+                                close_p, rng.lognormal(12, 3, n_rows))
+
+
+def _describe(flat, file_bytes=None):
+    return {
+        'n_trees': flat.n_trees,
+        'n_nodes': flat.n_nodes,
+        'max_depth': flat.max_depth,
+        'memory_bytes': int(flat.nbytes),
+        'file_bytes': file_bytes,
+    }
+
+
+def evaluate(original, compressed, X_eval, y_eval=None):
+    """
+    Fidelity of compressed vs original on X_eval, plus hold-out metrics and
+    their deltas when targets are given.
+    """
+    before, after = original.predict(X_eval), compressed.predict(X_eval)
+    report = {
+        'fidelity': {
+            'rows': int(len(X_eval)),
+            'mean_abs_diff': float(np.abs(after - before).mean()),
+            'max_abs_diff': float(np.abs(after - before).max()),
+        },
+    }
+    if y_eval is not None:
+        from training_data import regression_metrics
+
+        base, small = regression_metrics(y_eval, before), regression_metrics(y_eval, after)
+        report['holdout'] = {
+            'original': base,
+            'compressed': small,
+            'delta': {k: small[k] - base[k] for k in base},
+        }
+    return report
+
+
+def _load_split(path):
+    from training_data import prepare_frame, read_snapshot, split
+
+    X_train, X_test, y_train, y_test = split(prepare_frame(read_snapshot(path)))
+    return (X_train.to_numpy(np.float64), X_test.to_numpy(np.float64), y_test.to_numpy(np.float64))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a smaller forest artifact plus an accuracy report.")
+    parser.add_argument('--model', default=None, help="model pickle (default: bundled model)")
+    parser.add_argument('--data', default=None, help="CoinGecko snapshot CSV for the held-out report")
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--n-trees', type=int, default=None)
+    parser.add_argument('--value-dtype', choices=sorted(VALUE_DTYPES), default='float32')
+    parser.add_argument('--output', default=None, help="artifact path (default: <model>.compact.npz)")
+    parser.add_argument('--sweep', action='store_true', help="print a size/accuracy table instead of exporting")
+    args = parser.parse_args(argv)
+
+    model_path = args.model or model_cache.default_model_path()
+    flat = FlatForest.from_sklearn(model_cache.get_model(model_path))
+
+    if args.data:
+        calibration_X, X_eval, y_eval = _load_split(args.data)
+    else:
+        calibration_X = X_eval = _synthetic_rows(flat.n_features)
+        y_eval = None
+
+    if args.sweep:
+        print(f"{'depth':>5} {'trees':>5} {'nodes':>8} {'KB':>8} {'max|Δ|':>10}"
+              + (f" {'ΔMAE':>10} {'ΔRMSE':>10} {'ΔR²':>8}" if y_eval is not None else ''))
+        for depth in (None, 16, 12, 10, 8, 6):
+            for n_trees in (None, 50, 25, 10):
+                small = compress(flat, calibration_X, depth, n_trees, VALUE_DTYPES[args.value_dtype])
+                result = evaluate(flat, small, X_eval, y_eval)
+                line = (f"{depth or '-':>5} {n_trees or flat.n_trees:>5} {small.n_nodes:>8,} "
+                        f"{small.nbytes / 1024:>8.0f} {result['fidelity']['max_abs_diff']:>10.2e}")
+                if 'holdout' in result:
+                    d = result['holdout']['delta']
+                    line += f" {d['MAE']:>+10.2e} {d['RMSE']:>+10.2e} {d['R2']:>+8.4f}"
+                print(line)
+        return
+
+    small = compress(flat, calibration_X, args.max_depth, args.n_trees, VALUE_DTYPES[args.value_dtype])
+    output = args.output or os.path.splitext(model_path)[0] + '.compact.npz'
+    small.save(output)
+
+    report = {
+        'settings': {'max_depth': args.max_depth, 'n_trees': args.n_trees,
+                     'value_dtype': args.value_dtype, 'data': args.data},
+        'original': _describe(flat, os.path.getsize(model_path)),
+        'compressed': _describe(small, os.path.getsize(output)),
+    }
+    report.update(evaluate(flat, small, X_eval, y_eval))
+
+    report_path = os.path.splitext(output)[0] + '.report.json'
+    with open(report_path, 'w') as fh:
+        json.dump(report, fh, indent=2)
+
+    print(f"Wrote {output} ({report['compressed']['file_bytes'] / 1e6:.2f} MB, "
+          f"was {report['original']['file_bytes'] / 1e6:.2f} MB)")
+    if 'holdout' in report:
+        d = report['holdout']['delta']
+        print(f"Held-out deltas: MAE {d['MAE']:+.3e}  RMSE {d['RMSE']:+.3e}  R² {d['R2']:+.4f}")
+    print(f"Report: {report_path}")
+
+
+if __name__ == '__main__':
+    main()
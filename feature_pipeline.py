@@ -0,0 +1,262 @@
+"""
+One serialized artifact for serving: feature order, optional
+standardisation and the estimator, predicting straight from float arrays.
+
+    pipe = FeaturePipeline(FEATURE_COLUMNS, model)
+    pipe.save('artifacts/crypto_liquidity_pipeline.pkl')
+    pipe.predict(np.array([[open_p, high_p, low_p, close_p, vol, mkt_cap, sma, ema, rsi, macd]]))
+
+predict() takes an (n, n_features) array — or one row — whose columns are
+already in pipe.features order; the only per-call check is the column
+count. Names are checked once, when the artifact is loaded, with
+check_schema(), which also accepts a bare sklearn model or FlatForest so
+callers don't need to care which kind of file they were given.
+
+The scaler is stored as its mean/scale arrays, so a pipeline around a
+compiled FlatForest unpickles without sklearn.
+
+    python feature_pipeline.py build --model crypto_liquidity_model.pkl --features app --compile
+    python feature_pipeline.py inspect artifacts/crypto_liquidity_pipeline.pkl --expect app
+"""
+import argparse
+import sys
+
+import numpy as np
+
+from model_cache import atomic_dump
+
+PIPELINE_FORMAT = 1
+DEFAULT_OUTPUT = 'artifacts/crypto_liquidity_pipeline.pkl'
+
+
+class SchemaError(ValueError):
+    """
+    A model's expected inputs don't match the features the caller builds.
+    """
+
+
+def _feature_sets():
+    # resolved lazily: training_data pulls in pandas
+    from liquidity import FEATURE_COLUMNS
+
+    def training():
+        from training_data import MODEL_FEATURES
+        return MODEL_FEATURES
+
+    return {'app': lambda: FEATURE_COLUMNS, 'training': training}
+
+
+def _n_features(model):
+    n = getattr(model, 'n_features_in_', None)
+    return getattr(model, 'n_features', None) if n is None else n
+
+
+class FeaturePipeline:
+    def __init__(self, features, estimator, mean=None, scale=None, metadata=None):
+        self.format = PIPELINE_FORMAT
+        self.features = tuple(str(f) for f in features)
+        self.estimator = estimator
+        self.mean = None if mean is None else np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = None if scale is None else np.ascontiguousarray(scale, dtype=np.float64)
+        self.metadata = dict(metadata or {})
+        self.validate()
+
+    @classmethod
+    def from_scaler(cls, features, estimator, scaler, metadata=None):
+        """
+        Wrap a fitted sklearn StandardScaler (with_mean/with_std honoured).
+        """
+        n = len(features)
+        mean = scaler.mean_ if getattr(scaler, 'with_mean', True) else np.zeros(n)
+        scale = scaler.scale_ if getattr(scaler, 'with_std', True) else np.ones(n)
+        return cls(features, estimator, mean, scale, metadata)
+
+    def validate(self):
+        """
+        Internal consistency: unique names, scaler and estimator widths
+        matching the feature list. Raises SchemaError.
+        """
+        n = len(self.features)
+        if len(set(self.features)) != n:
+            raise SchemaError(f"duplicate feature names in {self.features}")
+        if (self.mean is None) != (self.scale is None):
+            raise SchemaError("scaler needs both mean and scale")
+        if self.mean is not None:
+            if self.mean.shape != (n,) or self.scale.shape != (n,):
+                raise SchemaError(f"scaler has {self.mean.shape[-1]} columns, pipeline has {n} features")
+            if not np.all(self.scale > 0):
+                raise SchemaError("scaler has non-positive scale values")
+        expected = _n_features(self.estimator)
+        if expected is not None and expected != n:
+            raise SchemaError(f"estimator expects {expected} features, pipeline lists {n}")
+        names = getattr(self.estimator, 'feature_names_in_', None)
+        if names is not None and tuple(names) != self.features:
+            raise SchemaError(f"estimator was fitted on {list(names)}, pipeline lists {list(self.features)}")
+
+    def __setstate__(self, state):
+        # checked on every unpickle, so a bad artifact fails at load, not per request
+        self.__dict__.update(state)
+        if self.__dict__.get('format') != PIPELINE_FORMAT:
+            raise SchemaError(f"unsupported pipeline format {self.__dict__.get('format')!r}")
+        self.validate()
+
+    @property
+    def n_features_in_(self):
+        return len(self.features)
+
+    @property
+    def n_features(self):
+        return len(self.features)
+
+    @property
+    def scaled(self):
+        return self.mean is not None
+
+    @property
+    def nbytes(self):
+        from model_cache import _model_nbytes
+
+        return _model_nbytes(self.estimator)
+
+    def transform(self, X):
+        """
+        Validated (n, n_features) float64 rows, standardised if the pipeline scales.
+        """
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[-1] != len(self.features):
+            raise SchemaError(f"Expected {len(self.features)} features, got {X.shape[-1]}")
+        if self.mean is not None:
+            X = (X - self.mean) / self.scale
+        return X
+
+    def predict(self, X):
+        return self.estimator.predict(self.transform(X))
+
+    def predict_interval(self, X, quantiles=None):
+        """
+        (prediction, per-tree quantile bounds) from a compiled estimator; see
+        FlatForest.predict_interval.
+        """
+        if not hasattr(self.estimator, 'predict_interval'):
+            raise TypeError(f"{type(self.estimator).__name__} has no per-tree outputs; use compiled()")
+        X = self.transform(X)
+        if quantiles is None:
+            return self.estimator.predict_interval(X)
+        return self.estimator.predict_interval(X, quantiles)
+
+    def contributions(self, X):
+        """
+        (bias, per-feature contributions) from a compiled estimator, in
+        self.features order; see FlatForest.contributions.
+        """
+        if not hasattr(self.estimator, 'contributions'):
+            raise TypeError(f"{type(self.estimator).__name__} has no tree paths to explain; use compiled()")
+        return self.estimator.contributions(self.transform(X))
+
+    def predict_frame(self, frame):
+        """
+        Predict from a DataFrame by column name (off the hot path: batch/tools).
+        """
+        missing = [f for f in self.features if f not in frame.columns]
+        if missing:
+            raise SchemaError(f"missing feature column(s): {', '.join(missing)}")
+        return self.predict(frame[list(self.features)].to_numpy(dtype=np.float64))
+
+    def compiled(self):
+        """
+        The same pipeline around a FlatForest (self if it already is one).
+        """
+        from forest_engine import FlatForest
+
+        if isinstance(self.estimator, FlatForest):
+            return self
+        return FeaturePipeline(self.features, FlatForest.from_sklearn(self.estimator), self.mean,
+                               self.scale, dict(self.metadata, compiled=True))
+
+    def save(self, path):
+        atomic_dump(self, path)
+
+    def describe(self):
+        return {
+            'format': self.format,
+            'features': list(self.features),
+            'estimator': type(self.estimator).__name__,
+            'scaled': self.scaled,
+            'metadata': self.metadata,
+        }
+
+
+def check_schema(model, features):
+    """
+    Raise SchemaError unless model takes exactly these features, in this
+    order. A FeaturePipeline is checked by name; a bare model by its
+    fitted feature names if it has them, else by feature count. Returns
+    the model.
+    """
+    features = tuple(features)
+    if isinstance(model, FeaturePipeline):
+        if model.features != features:
+            raise SchemaError(f"pipeline features {list(model.features)} != expected {list(features)}")
+        return model
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None and tuple(names) != features:
+        raise SchemaError(f"model was fitted on {list(names)}, expected {list(features)}")
+    n = _n_features(model)
+    if n is not None and n != len(features):
+        raise SchemaError(f"model expects {n} features, expected {len(features)}: {list(features)}")
+    return model
+
+
+def main(argv=None):
+    import model_cache
+
+    parser = argparse.ArgumentParser(description="Build or inspect a serialized feature pipeline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="wrap a fitted model with its feature order")
+    p_build.add_argument('--model', default=None, help="model pickle (default: the app's model)")
+    p_build.add_argument('--features', choices=['app', 'training'], default='app',
+                         help="app: OHLCV + indicators (the bundled model); training: train.py's features")
+    p_build.add_argument('--output', default=DEFAULT_OUTPUT)
+    p_build.add_argument('--compile', action='store_true', help="store the forest as a FlatForest")
+
+    p_inspect = sub.add_parser('inspect', help="load (validating) and describe a pipeline")
+    p_inspect.add_argument('path')
+    p_inspect.add_argument('--expect', choices=['app', 'training'], default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == 'build':
+        model_path = args.model or model_cache.default_model_path()
+        model = model_cache.get_model(model_path)
+        if isinstance(model, FeaturePipeline):
+            raise SystemExit(f"{model_path} is already a pipeline")
+        features = _feature_sets()[args.features]()
+        pipe = FeaturePipeline(features, check_schema(model, features), metadata={
+            'source': model_path, 'source_sha256': model_cache.file_sha256(model_path),
+            'feature_set': args.features, 'scaler': 'none (model was trained on unscaled features)',
+        })
+        if args.compile:
+            pipe = pipe.compiled()
+        pipe.save(args.output)
+        print(f"Pipeline: {args.output} ({len(features)} features, {type(pipe.estimator).__name__})",
+              file=sys.stderr)
+    else:
+        try:
+            model = model_cache.get_model(args.path)
+            if args.expect:
+                check_schema(model, _feature_sets()[args.expect]())
+        except SchemaError as e:
+            raise SystemExit(f"schema mismatch: {e}")
+        if isinstance(model, FeaturePipeline):
+            for key, value in model.describe().items():
+                print(f"{key:<10} {value}")
+        else:
+            print(f"bare {type(model).__name__} with {_n_features(model)} features (no pipeline metadata)")
+
+
+if __name__ == '__main__':
+    # run from the importable module so pickles reference feature_pipeline.FeaturePipeline, not __main__
+    from feature_pipeline import main as _main
+    _main()
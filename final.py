@@ -1,171 +1,122 @@
+import time
+
+_run_started = time.perf_counter()
+
 import streamlit as st
 import streamlit.components.v1 as components
-import joblib
-import pandas as pd
-import numpy as np
 import os
+import tempfile
 
-# --- Navbar HTML ---
-navbar_html = """
-<nav style="background-color:#102a44; color:white; display:flex; align-items:center; padding:12px 30px; justify-content:space-between; border-radius:0 0 10px 10px; box-shadow:0 4px 8px rgba(0,0,0,0.1); font-family: 'Poppins', Arial, sans-serif; width: 100vw; position: fixed; top: 0; left: 0; z-index: 9999; box-sizing: border-box;">
-  <div style="display:flex; align-items:center;">
-    <div style="font-weight:700; font-size:26px; background: linear-gradient(90deg, #34e89e, #0f3443); -webkit-background-clip: text; -webkit-text-fill-color: transparent; user-select:none; cursor:default;">CryptoPredictions</div>
-  </div>
-  <ul class="nav-links" style="list-style:none; display:flex; gap: 25px; margin:0; padding:0;">
-    <li><a href="https://cryptonews.com" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Market Updates</a></li>
-    <li><a href="https://cryptopredictions.com/?results=200" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Coin List</a></li>
-    <li><a href="https://cryptopredictions.com/blog/" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Insights Blog</a></li>
-  </ul>
-  <div style="display:flex; align-items:center; gap:20px;">
-    <div>
-      <a href="https://twitter.com" target="_blank"><img src="https://cdn-icons-png.flaticon.com/512/733/733579.png" style="width:24px; height:24px;"></a>
-      <a href="https://facebook.com" target="_blank"><img src="https://cdn-icons-png.flaticon.com/512/733/733547.png" style="width:24px; height:24px; margin-left: 10px;"></a>
-    </div>
-    <select style="background:transparent; border:none; color:white; font-weight:600; font-size:15px;">
-      <option value="en" selected>English 🇬🇧</option>
-      <option value="es">Español 🇪🇸</option>
-      <option value="fr">Français 🇫🇷</option>
-    </select>
-  </div>
-</nav>
-"""
-
-# --- Set Background ---
-def set_background_url(image_url):
-    css = f"""
-    <style>
-    html, body {{
-        height: 100%;
-        margin: 0;
-        padding: 0;
-        background-image: url("{image_url}");
-        background-size: cover;
-        background-position: center;
-        background-repeat: no-repeat;
-    }}
-    .stApp {{
-        background-color: rgba(0, 0, 0, 0.6) !important;
-        color: white;
-        height: 100%;
-    }}
-    </style>
-    """
-    st.markdown(css, unsafe_allow_html=True)
+import numpy as np
+
+# Only light modules are imported up front: pandas, joblib/sklearn and scipy
+# are pulled in by the first prediction, chart or batch job that needs them.
+import drift_monitor
+import instrumentation
+import model_cache
+from feature_pipeline import check_schema
+from instrumentation import timed
+from indicator_engine import IndicatorEngine
+from liquidity import (
+    FEATURE_COLUMNS, normalize_score, classify_liquidity, predict_trend, compute_indicators,
+    build_feature_matrix, normalize_score_array, classify_liquidity_array, predict_trend_array,
+)
+from prediction_cache import PredictionCache
+from ui_assets import NAVBAR_HTML, BACKGROUND_CSS, record_render
 
 
 # --- Load Model ---
+# Shared by every session in this process; reloaded only when the file changes.
+# The feature schema is checked once per load, not on every prediction.
 def load_model():
     try:
-        model_path = os.path.join(os.path.dirname(__file__), 'crypto_liquidity_model.pkl')
-        return joblib.load(model_path)
+        with timed('load_model'):
+            model = model_cache.get_model()
+            model_cache.get_cache().derived('schema', lambda m: check_schema(m, FEATURE_COLUMNS))
+            return model
     except Exception as e:
         st.error(f"Model loading failed: {e}")
         return None
 
 
-# -------------------------------------------------------
-# FIX 1: classify_liquidity now normalises the raw score
-# before applying thresholds so Low CAN be returned.
-# -------------------------------------------------------
-def normalize_score(raw_score, volume, market_cap):
+def load_prediction_cache():
     """
-    Normalize raw model output to a 0-1 liquidity score.
-    Strategy: use volume-to-market-cap ratio as the primary signal.
-    If the model outputs a ratio-like value we scale it directly;
-    otherwise we derive a ratio ourselves.
+    Process-wide LRU of raw scores and their tree intervals; a fresh one
+    comes with every model reload.
     """
-    # If raw_score is already in [0, 1] trust it
-    if 0.0 <= raw_score <= 1.0:
-        return float(raw_score)
-
-    # If raw_score looks like a large dollar value (e.g. regression on price),
-    # fall back to a volume/market_cap liquidity ratio
-    if market_cap > 0:
-        ratio = volume / market_cap          # typically 0.01 – 0.5 for crypto
-        # clip and scale: ratio >= 0.5 => high, < 0.1 => low
-        score = np.clip(ratio / 0.5, 0.0, 1.0)
-        return float(score)
+    from forest_engine import DEFAULT_QUANTILES
 
-    # Last resort: min-max compress around the raw score
-    score = 1 / (1 + np.exp(-raw_score / 1e4))  # sigmoid squeeze
-    return float(score)
-
-
-def classify_liquidity(score):
-    """
-    Classify a normalised [0,1] score into Low / Medium / High.
-    Thresholds chosen so that all three classes are reachable.
-    """
-    if score < 0.35:
-        return "<span style='color:#ff4d4d; font-weight:bold;'>🔴 Low</span>"
-    elif score < 0.65:
-        return "<span style='color:#ffd700; font-weight:bold;'>🟡 Medium</span>"
-    else:
-        return "<span style='color:#4dff91; font-weight:bold;'>🟢 High</span>"
+    return model_cache.get_cache().derived(
+        'prediction_cache', lambda _: PredictionCache(n_values=1 + len(DEFAULT_QUANTILES)))
 
 
-# -------------------------------------------------------
-# FIX 2: predict_trend uses price change % + volume signal
-# -------------------------------------------------------
-def predict_trend(open_p, close_p, volume, avg_volume_estimate=None):
+def load_predictor():
     """
-    More realistic trend: combines price direction with volume confirmation.
+    Compiled array form of the cached forest (built once per model load);
+    None if the model can't be compiled, in which case sklearn is used.
     """
-    if open_p == 0:
-        return "⚖️ Insufficient data for trend analysis"
-
-    change_pct = ((close_p - open_p) / open_p) * 100
-
-    # Volume confirmation: if volume is unusually high, trend is stronger
-    if avg_volume_estimate and avg_volume_estimate > 0:
-        vol_ratio = volume / avg_volume_estimate
-        vol_note = " (high volume confirms move)" if vol_ratio > 1.5 else \
-                   " (low volume — weak signal)" if vol_ratio < 0.5 else ""
-    else:
-        vol_note = ""
+    from forest_engine import compile_model
 
-    if change_pct > 1.0:
-        return f"📈 Bullish — up {change_pct:.2f}%{vol_note}"
-    elif change_pct < -1.0:
-        return f"📉 Bearish — down {abs(change_pct):.2f}%{vol_note}"
-    else:
-        return f"⚖️ Sideways — change {change_pct:.2f}%{vol_note}"
+    try:
+        return model_cache.get_cache().derived('flat_forest', compile_model)
+    except TypeError:
+        return None
 
 
-# -------------------------------------------------------
-# FIX 3: Compute real technical indicators instead of 0s
-# -------------------------------------------------------
-def compute_indicators(open_p, high_p, low_p, close_p, volume):
-    """
-    Approximate single-candle technical indicators.
-    These are rough proxies — in production, use a rolling price history.
+# --- Results Panel ---
+def results_html(coin, liquidity_html, trend, score, interval=None):
+    # Liquidity gauge bar
+    pct = int(score * 100)
+    bar_color = "#ff4d4d" if score < 0.35 else "#ffd700" if score < 0.65 else "#4dff91"
+    # Spread of the forest's trees around the score, drawn as a band on the gauge
+    band, spread = "", ""
+    if interval is not None:
+        lo, hi = interval
+        band = (f"<div style='position:absolute; left:{lo * 100:.1f}%; width:{max(hi - lo, 0.005) * 100:.1f}%; "
+                f"top:0; height:100%; background:rgba(255,255,255,0.35);'></div>")
+        spread = (f"<p style='font-size:13px; color:#aaa;'>Tree spread (5th–95th percentile): "
+                  f"{lo:.3f} – {hi:.3f}</p>")
+
+    return f"""
+    <div style='text-align:center; background:rgba(255,255,255,0.08);
+                border-radius:12px; padding:24px; margin-top:16px;'>
+        <h3 style='color:white;'>🔍 Prediction Results
+            {f"— <span style='font-size:18px;'>{coin}</span>" if coin else ""}
+        </h3>
+        <p style='font-size:18px;'><strong>Liquidity Level:</strong> {liquidity_html}</p>
+        <p style='font-size:18px;'><strong>Trend:</strong> {trend}</p>
+        <p style='font-size:15px; color:#aaa;'>Normalised Liquidity Score: {score:.3f} / 1.000</p>
+        {spread}
+        <div style='position:relative; background:#222; border-radius:8px; height:18px; margin:10px auto; width:80%; overflow:hidden;'>
+            <div style='background:{bar_color}; width:{pct}%; height:100%;
+                        border-radius:8px; transition:width 0.5s ease;'></div>
+            {band}
+        </div>
+        <small style='color:#888;'>0 ← Low &nbsp;&nbsp;&nbsp; Medium &nbsp;&nbsp;&nbsp; High → 100</small>
+    </div>
     """
-    prices = [open_p, high_p, low_p, close_p]
 
-    # Simple Moving Average (proxy: avg of OHLC)
-    sma_5 = np.mean(prices)
 
-    # EMA_12 proxy: weighted toward close
-    ema_12 = (close_p * 0.6 + open_p * 0.2 + high_p * 0.1 + low_p * 0.1)
-
-    # RSI proxy: based on body vs wick ratio
-    body = abs(close_p - open_p)
-    total_range = high_p - low_p if high_p != low_p else 1
-    rsi = 50 + (((close_p - open_p) / total_range) * 50)  # maps to [0, 100]
-    rsi = float(np.clip(rsi, 0, 100))
-
-    # MACD proxy: EMA12 - SMA5
-    macd = ema_12 - sma_5
-
-    return sma_5, ema_12, rsi, macd
+def contributions_html(features, bias, contributions):
+    # One bar per feature, largest effect first; green pushes the raw output up, red down
+    order = np.argsort(-np.abs(contributions))
+    scale = max(float(np.abs(contributions).max()), 1e-12)
+    rows = "".join(
+        f"<tr><td style='padding:2px 8px; color:#ddd;'>{features[i]}</td>"
+        f"<td style='padding:2px 8px; color:#ddd; text-align:right;'>{contributions[i]:+.4g}</td>"
+        f"<td style='width:50%;'><div style='background:{'#4dff91' if contributions[i] >= 0 else '#ff4d4d'};"
+        f" width:{abs(contributions[i]) / scale * 100:.0f}%; height:10px; border-radius:4px;'></div></td></tr>"
+        for i in order
+    )
+    return (f"<table style='width:100%; font-size:13px;'>{rows}</table>"
+            f"<small style='color:#888;'>Raw output = baseline {bias:.4g} "
+            f"+ contributions {float(contributions.sum()):+.4g}</small>")
 
 
 # --- App Setup ---
 st.set_page_config(page_title="Crypto Liquidity Predictor", page_icon="💧", layout="centered")
-components.html(navbar_html, height=80, scrolling=False)
-
-background_img_url = "https://raw.githubusercontent.com/jayasri21072006/crypto-liquidity-predictor/main/53540861975_5538e666cf_c.jpg"
-set_background_url(background_img_url)
+components.html(NAVBAR_HTML, height=80, scrolling=False)
+st.markdown(BACKGROUND_CSS, unsafe_allow_html=True)
 
 # --- Title ---
 st.markdown("<div style='margin-top:70px;'></div>", unsafe_allow_html=True)
@@ -252,6 +203,8 @@ st.markdown(
 
 # --- Price Chart ---
 if any([open_price, high_price, low_price, close_price]):
+    import pandas as pd
+
     price_df = pd.DataFrame(
         {"Price ($)": [open_price, high_price, low_price, close_price]},
         index=["Open", "High", "Low", "Close"]
@@ -259,32 +212,44 @@ if any([open_price, high_price, low_price, close_price]):
     st.line_chart(price_df)
 
 # --- Compute Indicators ---
-sma_5, ema_12, rsi, macd = compute_indicators(open_price, high_price, low_price, close_price, volume)
+# Each predicted candle is appended to this session's per-coin history; once a
+# coin has history the indicators are real rolling values, otherwise proxies.
+if 'indicator_engine' not in st.session_state:
+    st.session_state.indicator_engine = IndicatorEngine()
+indicator_engine = st.session_state.indicator_engine
+history_len = indicator_engine.count(selected_coin)
+
+with timed('compute_indicators'):
+    if history_len:
+        sma_5, ema_12, rsi, macd = indicator_engine.peek(selected_coin, close_price)
+        indicator_kind = "rolling"
+    else:
+        sma_5, ema_12, rsi, macd = compute_indicators(open_price, high_price, low_price, close_price, volume)
+        indicator_kind = "proxy"
 
 # Show computed indicators to user
 with st.expander("📊 Computed Technical Indicators (used by model)"):
     ic1, ic2, ic3, ic4 = st.columns(4)
-    ic1.metric("SMA (proxy)", f"{sma_5:,.4f}")
-    ic2.metric("EMA-12 (proxy)", f"{ema_12:,.4f}")
-    ic3.metric("RSI (proxy)", f"{rsi:.1f}")
-    ic4.metric("MACD (proxy)", f"{macd:,.4f}")
-
-# --- Model Input ---
-input_data = pd.DataFrame({
-    'Open':       [open_price],
-    'High':       [high_price],
-    'Low':        [low_price],
-    'Close':      [close_price],
-    'Volume':     [volume],
-    'Market Cap': [volume_x_close],
-    'SMA_5':      [sma_5],
-    'EMA_12':     [ema_12],
-    'RSI':        [rsi],
-    'MACD':       [macd]
-})
-
-# --- Load Model ---
-model = load_model()
+    ic1.metric(f"SMA ({indicator_kind})", f"{sma_5:,.4f}")
+    ic2.metric(f"EMA-12 ({indicator_kind})", f"{ema_12:,.4f}")
+    ic3.metric(f"RSI ({indicator_kind})", f"{rsi:.1f}")
+    ic4.metric(f"MACD ({indicator_kind})", f"{macd:,.4f}")
+    if history_len:
+        st.caption(f"Based on {history_len} earlier candle(s) for {selected_coin or 'this session'} "
+                   f"plus the current one.")
+    else:
+        st.caption("Single-candle proxies — each prediction adds the candle to the rolling history.")
+
+# --- Model Cache ---
+# Nothing is loaded until the first prediction; afterwards every session in
+# this process shares the cached model.
+if model_cache.get_cache().loaded:
+    cache_stats = model_cache.get_cache().stats()
+    st.caption(
+        f"🧠 Model cache: loaded in {cache_stats['load_seconds'] * 1000:,.0f} ms · "
+        f"~{cache_stats['size_bytes'] / 1e6:,.1f} MB resident · "
+        f"{cache_stats['loads']} load(s), {cache_stats['hits']} cache hit(s)"
+    )
 
 # --- Disclaimer ---
 st.markdown("""
@@ -297,50 +262,365 @@ agree = st.checkbox("I agree to the disclaimer above.")
 
 # --- Predict ---
 if st.button("🔮 Predict Liquidity"):
-    if not model:
-        st.error("❌ Model not loaded. Ensure crypto_liquidity_model.pkl is in the same directory.")
-    elif not agree:
+    if not agree:
         st.warning("⚠️ You must accept the disclaimer to proceed.")
     elif not input_valid:
         st.warning("⚠️ Please fix the input errors above before predicting.")
     elif close_price == 0 or volume == 0:
         st.warning("⚠️ Please enter non-zero values for Close Price and Volume.")
+    elif not (model := load_model()):
+        st.error("❌ Model not loaded. Ensure crypto_liquidity_model.pkl is in the same directory.")
     else:
+        flat = load_predictor()
+        prediction_cache = load_prediction_cache()
+        with timed('input_row'):
+            # FEATURE_COLUMNS order, checked against the model when it was loaded
+            input_row = np.array([[open_price, high_price, low_price, close_price, volume,
+                                   volume_x_close, sma_5, ema_12, rsi, macd]], dtype=np.float64)
+        # running statistics only (no rows kept); None without a training summary
+        monitor = drift_monitor.get_monitor()
+        if monitor is not None:
+            with timed('drift_update'):
+                monitor.update(input_row)
         try:
-            raw_score = model.predict(input_data)[0]
+            def run_model():
+                # the compiled forest yields the per-tree interval from the same walk
+                with timed('predict'):
+                    if flat is None:
+                        return float(model.predict(input_row)[0]), None
+                    raw, bounds = flat.predict_interval(input_row)
+                    return float(raw[0]), tuple(bounds[0].tolist())
+
+            with timed('prediction_cache'):
+                raw_score, raw_interval = prediction_cache.get_or_compute(input_row[0], run_model)
+            indicator_engine.update(selected_coin, close_price)
+
+            pc = prediction_cache.stats()
+            st.caption(
+                f"⚡ Prediction cache: {pc['hits']} hit(s) / {pc['misses']} miss(es), "
+                f"{pc['entries']:,}/{pc['max_entries']:,} entries, {pc['evictions']} eviction(s)"
+            )
 
             # DEBUG: show raw model output (remove in production if desired)
-            st.caption(f"🔧 Raw model output: `{raw_score}`")
-
-            # Normalize to [0, 1]
-            score = normalize_score(raw_score, volume, volume_x_close)
-
-            liquidity_html = classify_liquidity(score)
-            trend          = predict_trend(open_price, close_price, volume)
-
-            # Liquidity gauge bar
-            pct = int(score * 100)
-            bar_color = "#ff4d4d" if score < 0.35 else "#ffd700" if score < 0.65 else "#4dff91"
-
-            st.markdown(f"""
-            <div style='text-align:center; background:rgba(255,255,255,0.08);
-                        border-radius:12px; padding:24px; margin-top:16px;'>
-                <h3 style='color:white;'>🔍 Prediction Results
-                    {f"— <span style='font-size:18px;'>{selected_coin}</span>" if selected_coin else ""}
-                </h3>
-                <p style='font-size:18px;'><strong>Liquidity Level:</strong> {liquidity_html}</p>
-                <p style='font-size:18px;'><strong>Trend:</strong> {trend}</p>
-                <p style='font-size:15px; color:#aaa;'>Normalised Liquidity Score: {score:.3f} / 1.000</p>
-
-                <div style='background:#222; border-radius:8px; height:18px; margin:10px auto; width:80%; overflow:hidden;'>
-                    <div style='background:{bar_color}; width:{pct}%; height:100%;
-                                border-radius:8px; transition:width 0.5s ease;'></div>
-                </div>
-                <small style='color:#888;'>0 ← Low &nbsp;&nbsp;&nbsp; Medium &nbsp;&nbsp;&nbsp; High → 100</small>
-            </div>
-            """, unsafe_allow_html=True)
+            st.caption(f"🔧 Raw model output: `{raw_score}`"
+                       + (f" (trees 5–95%: `{raw_interval[0]:.6g}` – `{raw_interval[-1]:.6g}`)"
+                          if raw_interval else ""))
+
+            with timed('postprocess'):
+                # Normalize to [0, 1]
+                score = normalize_score(raw_score, volume, volume_x_close)
+                interval = None
+                if raw_interval:
+                    # normalised per bound: a bound outside [0, 1] maps like any raw score would
+                    ends = normalize_score_array(np.array(raw_interval), volume, volume_x_close)
+                    interval = (float(ends.min()), float(ends.max()))
+
+                liquidity_html = classify_liquidity(score)
+                trend          = predict_trend(open_price, close_price, volume)
+
+            with timed('render_results'):
+                st.markdown(results_html(selected_coin, liquidity_html, trend, score, interval),
+                            unsafe_allow_html=True)
+
+            if flat is not None:
+                with timed('explain'):
+                    bias, contributions = flat.contributions(input_row)
+                with st.expander("🧩 Why this score? (per-feature contributions)"):
+                    st.markdown(contributions_html(getattr(flat, 'features', FEATURE_COLUMNS), bias,
+                                                   contributions[0]), unsafe_allow_html=True)
+                    if not 0.0 <= raw_score <= 1.0:
+                        st.caption("The raw output is outside [0, 1], so the level above comes from the "
+                                   "volume / market-cap fallback rather than directly from the model.")
+
+            if monitor is not None:
+                report = monitor.report(FEATURE_COLUMNS)
+                label = f"⚠️ Input drift in {len(report['drifted'])} feature(s)" if report['drifted'] \
+                    else "📈 Inputs vs. training data"
+                with st.expander(label):
+                    st.code(drift_monitor.format_report(report), language=None)
+                    st.caption(f"All inputs seen by this process ({report['count']:,}) against the training "
+                               f"summary, column by column as the model sees them. PSI > "
+                               f"{drift_monitor.PSI_DRIFT} is drift; features need "
+                               f"{drift_monitor.MIN_COUNT} inputs before they are judged.")
 
         except Exception as e:
             st.error(f"❌ Prediction failed: {e}")
             st.info("💡 Make sure your model was trained with the same 10 features: "
                     "Open, High, Low, Close, Volume, Market Cap, SMA_5, EMA_12, RSI, MACD")
+
+# --- Live Feed ---
+# Candles from a tailed file or a localhost socket (see candle_feed.py) go
+# through the session's indicator engine and one predict per refresh; only
+# the panel below re-renders, as a fragment on a timer.
+def score_live_candles(candles):
+    """
+    Update the rolling indicators with each candle in order, then score the
+    whole batch at once. Returns (score, liquidity_html, trend) arrays.
+    """
+    rows = np.array([c[1:6] for c in candles], dtype=np.float64)
+    open_p, high_p, low_p, close_p, vol = rows.T
+    indicators = np.array([indicator_engine.update(c.coin, c.close) for c in candles]).T
+    X = build_feature_matrix(open_p, high_p, low_p, close_p, vol, indicators=indicators)
+    with timed('live_predict'):
+        raw_score = (load_predictor() or load_model()).predict(X)
+    if (monitor := drift_monitor.get_monitor()) is not None:
+        with timed('drift_update'):
+            monitor.update(X)
+    score = normalize_score_array(raw_score, vol, X[:, 5])
+    return score, classify_liquidity_array(score), predict_trend_array(open_p, close_p, vol)
+
+
+def live_panel():
+    live = st.session_state.live_feed
+    subscription = live['subscription']
+    candles = subscription.drain()
+    if candles:
+        if not load_model():
+            st.error("❌ Model not loaded. Ensure crypto_liquidity_model.pkl is in the same directory.")
+            return
+        score, liquidity_html, trend = score_live_candles(candles)
+        for i, candle in enumerate(candles):
+            live['latest'][candle.coin] = (candle, float(score[i]), liquidity_html[i], trend[i])
+        live['processed'] += len(candles)
+        live['last_coin'] = candles[-1].coin
+
+    shown = selected_coin if selected_coin in live['latest'] else live['last_coin']
+    if shown is not None:
+        candle, score, liquidity_html, trend = live['latest'][shown]
+        st.markdown(results_html(shown, liquidity_html, trend, score), unsafe_allow_html=True)
+    else:
+        st.info("⏳ Waiting for the first candle…")
+
+    # receive → rendered, per candle handled in this refresh
+    done = time.perf_counter()
+    live['latency_ms'].extend((done - c.received) * 1000 for c in candles)
+    latency = np.fromiter(live['latency_ms'], dtype=np.float64)
+    sub_stats, feed_stats = subscription.stats(), subscription.feed.stats()
+
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("Candles", f"{live['processed']:,}", f"+{len(candles)}" if candles else None)
+    m2.metric("Update p50", f"{np.percentile(latency, 50):,.1f} ms" if latency.size else "–")
+    m3.metric("Update p95", f"{np.percentile(latency, 95):,.1f} ms" if latency.size else "–")
+    m4.metric("Dropped", f"{sub_stats['dropped']:,}")
+    st.caption(
+        f"📡 {feed_stats['source']} · {len(live['latest'])} coin(s) · "
+        f"queue {sub_stats['queued']}/{sub_stats['max_queue']} · "
+        f"{feed_stats['rejected']:,} malformed line(s) skipped"
+    )
+    if feed_stats['error'] or not feed_stats['running']:
+        st.error(f"❌ Feed stopped: {feed_stats['error'] or 'source closed'}")
+
+
+with st.expander("📡 Live Candle Feed", expanded='live_feed' in st.session_state):
+    st.markdown(
+        "<p style='color:#ccc;'>Stream candles from a file being appended to or from producers "
+        "writing to a localhost socket, one JSON or CSV candle per line. "
+        "Try <code>python candle_feed.py tcp://127.0.0.1:9009</code> for a simulated feed.</p>",
+        unsafe_allow_html=True
+    )
+    feed_spec = st.text_input("Feed source (file path or tcp://host:port)", value="tcp://127.0.0.1:9009")
+    refresh_ms = st.number_input("Refresh every (ms)", value=500, min_value=100, step=100)
+
+    if 'live_feed' not in st.session_state:
+        if st.button("▶️ Start Live Feed"):
+            if not agree:
+                st.warning("⚠️ You must accept the disclaimer to proceed.")
+            else:
+                import candle_feed
+
+                try:
+                    subscription = candle_feed.open_feed(feed_spec).subscribe()
+                except (OSError, ValueError) as e:
+                    st.error(f"❌ Could not open feed: {e}")
+                else:
+                    from collections import deque
+
+                    st.session_state.live_feed = {
+                        'subscription': subscription, 'latest': {}, 'last_coin': None,
+                        'processed': 0, 'latency_ms': deque(maxlen=1_000),
+                    }
+                    st.rerun()
+    else:
+        if st.button("⏹ Stop Live Feed"):
+            st.session_state.pop('live_feed')['subscription'].close()
+            st.rerun()
+        st.fragment(run_every=refresh_ms / 1000)(live_panel)()
+
+# --- Multi-Coin Dashboard ---
+# Latest candle per coin in one CandleBook, scored with a single predict per
+# refresh; the table is a fragment so a refresh doesn't rerun the page.
+def refresh_board(board, source_kind, source):
+    if source_kind == "Live feed":
+        candles = board['subscription'].drain()
+        if candles:
+            for candle in candles:
+                board['engine'].update(candle.coin, candle.close)
+            board['book'].update_many([c.coin for c in candles], [c[1:6] for c in candles])
+    elif source_kind == "Snapshot file":
+        mtime = os.path.getmtime(source)
+        if mtime != board.get('mtime'):
+            import batch_scoring
+
+            coins, candles = batch_scoring.latest_candles(source)
+            board['book'].update_many(coins, candles, at=mtime)
+            board['mtime'] = mtime
+    elif not len(board['book']):
+        board['book'].update_many(list(demo_data_map), list(demo_data_map.values()))
+
+
+def dashboard_panel(source_kind, source):
+    import pandas as pd
+    from dashboard import score_book
+
+    board = st.session_state.dashboard
+    try:
+        refresh_board(board, source_kind, source)
+    except (OSError, ValueError) as e:
+        st.error(f"❌ Could not read {source}: {e}")
+        return
+    if not (model := load_model()):
+        st.error("❌ Model not loaded. Ensure crypto_liquidity_model.pkl is in the same directory.")
+        return
+
+    start = time.perf_counter()
+    with timed('dashboard_score'):
+        table = score_book(board['book'], load_predictor() or model, board['engine'])
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if table is None:
+        st.info("⏳ No candles yet.")
+        return
+
+    table = pd.DataFrame(table)
+    table['Updated'] = pd.to_datetime(table['Updated'], unit='s')
+    st.dataframe(table, hide_index=True, column_config={
+        'Liquidity Score': st.column_config.ProgressColumn(min_value=0.0, max_value=1.0, format="%.3f"),
+        'Change %': st.column_config.NumberColumn(format="%.2f%%"),
+        'Close': st.column_config.NumberColumn(format="%.6g"),
+        'Volume': st.column_config.NumberColumn(format="%.4g"),
+        'Vol × Close': st.column_config.NumberColumn(format="%.4g"),
+        'Updated': st.column_config.DatetimeColumn(format="HH:mm:ss"),
+    })
+    st.caption(f"🧮 {len(table):,} coin(s) scored in one pass in {elapsed_ms:,.1f} ms · "
+               f"refreshed {time.strftime('%H:%M:%S')}")
+
+
+with st.expander("📋 Multi-Coin Dashboard"):
+    show_dashboard = st.toggle("Show dashboard")
+    if show_dashboard:
+        source_kind = st.radio("Candles from", ["Demo presets", "Snapshot file", "Live feed"],
+                               horizontal=True)
+        source = None
+        if source_kind == "Snapshot file":
+            source = st.text_input("CSV / Parquet with coin, Open, High, Low, Close, Volume columns")
+        elif source_kind == "Live feed":
+            source = st.text_input("Dashboard feed source", value="tcp://127.0.0.1:9009")
+        refresh_s = st.number_input("Refresh every (s)", value=5.0, min_value=0.5, step=0.5)
+
+        board = st.session_state.get('dashboard')
+        if board is None or board['key'] != (source_kind, source):
+            if board and board.get('subscription'):
+                board['subscription'].close()
+            from dashboard import CandleBook
+
+            board = st.session_state.dashboard = {
+                'key': (source_kind, source), 'book': CandleBook(), 'engine': IndicatorEngine(),
+            }
+            if source_kind == "Live feed" and source:
+                import candle_feed
+
+                try:
+                    board['subscription'] = candle_feed.open_feed(source).subscribe()
+                except (OSError, ValueError) as e:
+                    st.error(f"❌ Could not open feed: {e}")
+                    board['key'] = None
+
+        if not agree:
+            st.warning("⚠️ You must accept the disclaimer to proceed.")
+        elif source_kind != "Demo presets" and not source:
+            st.info("Enter a source above.")
+        elif source_kind == "Live feed" and not board.get('subscription'):
+            pass
+        else:
+            st.fragment(run_every=refresh_s)(dashboard_panel)(source_kind, source)
+    elif st.session_state.get('dashboard'):
+        board = st.session_state.pop('dashboard')
+        if board.get('subscription'):
+            board['subscription'].close()
+
+# --- Batch Scoring ---
+with st.expander("📂 Batch Scoring (CSV / Parquet)"):
+    st.markdown(
+        "<p style='color:#ccc;'>Score a whole file of candles with "
+        "<code>Open, High, Low, Close, Volume</code> columns. Rows are processed in chunks "
+        "and written to disk as they are scored.</p>",
+        unsafe_allow_html=True
+    )
+    uploaded_file = st.file_uploader("OHLCV file", type=['csv', 'parquet', 'pq'])
+    server_path = st.text_input("…or path to a file on the server")
+    chunksize = st.number_input("Rows per chunk", value=50_000,
+                                min_value=1_000, step=10_000)
+
+    if st.button("⚙️ Score File"):
+        if not agree:
+            st.warning("⚠️ You must accept the disclaimer to proceed.")
+        elif not uploaded_file and not server_path:
+            st.warning("⚠️ Upload a file or enter a server path first.")
+        elif not uploaded_file and not os.path.isfile(server_path):
+            st.warning(f"⚠️ File not found: {server_path}")
+        elif not (model := load_model()):
+            st.error("❌ Model not loaded. Ensure crypto_liquidity_model.pkl is in the same directory.")
+        else:
+            import batch_scoring
+
+            source = uploaded_file if uploaded_file else server_path
+            source_name = uploaded_file.name if uploaded_file else server_path
+            out_fh = tempfile.NamedTemporaryFile(prefix='scored_', suffix='.csv', delete=False)
+            out_fh.close()
+
+            progress_bar = st.progress(0.0, text="Scoring…")
+
+            def report_progress(fraction, rows):
+                progress_bar.progress(fraction, text=f"Scored {rows:,} rows")
+
+            try:
+                rows = batch_scoring.score_file(model, source, out_fh.name, int(chunksize),
+                                                name=source_name, progress=report_progress)
+                st.session_state.batch_output = (out_fh.name, rows, source_name)
+            except Exception as e:
+                os.unlink(out_fh.name)
+                st.error(f"❌ Batch scoring failed: {e}")
+
+    if st.session_state.get('batch_output'):
+        out_path, rows, source_name = st.session_state.batch_output
+        if os.path.exists(out_path):
+            st.success(f"✅ Scored {rows:,} rows from {os.path.basename(source_name)}")
+            with open(out_path, 'rb') as fh:
+                st.download_button("⬇️ Download scored CSV", fh, file_name="scored_candles.csv",
+                                   mime="text/csv")
+
+# --- Stage Timings ---
+# Histograms are process-wide (every session), so this is the server's view.
+with st.expander("⏱ Stage Timings"):
+    stage_summary = instrumentation.summary()
+    if stage_summary:
+        rows = "\n".join(
+            f"| {stage} | {s['count']:,} | {s['mean_ms']:,.3f} | {s['p50_ms']:,.3f} | "
+            f"{s['p95_ms']:,.3f} | {s['p99_ms']:,.3f} | {s['total_s']:,.2f} |"
+            for stage, s in stage_summary.items()
+        )
+        st.markdown("| Stage | Calls | Mean ms | p50 ms | p95 ms | p99 ms | Total s |\n"
+                    "|---|---:|---:|---:|---:|---:|---:|\n" + rows)
+        st.caption("Percentiles are estimated from log-spaced histogram buckets. Set "
+                   f"`{instrumentation.METRICS_PORT_ENV}` or `{instrumentation.METRICS_FILE_ENV}` "
+                   "to export them in Prometheus format.")
+    else:
+        st.caption("No stages timed yet in this process.")
+
+# --- Render Timing ---
+render = record_render(_run_started)
+instrumentation.observe('script_run', render['run_ms'] / 1000)
+instrumentation.export()
+st.caption(
+    f"⏱ Script run: {render['run_ms']:,.0f} ms · "
+    f"process start → first render: {render['first_render_s']:,.2f} s"
+)
@@ -0,0 +1,297 @@
+"""
+Array-backed inference for tree ensembles.
+
+FlatForest compiles a fitted RandomForestRegressor (or any sklearn
+regressor built from DecisionTreeRegressor trees) into five contiguous
+NumPy arrays shared by all trees — feature, threshold, left, right, value —
+plus the root offset of each tree. Prediction walks every (row, tree) pair
+down the trees together, one vectorised step per level, which avoids
+sklearn's input validation, joblib thread dispatch and DataFrame handling
+on the 1-row and small-batch path.
+
+    python forest_engine.py --check     # parity with sklearn + latency table
+"""
+import argparse
+import time
+
+import numpy as np
+
+# Keep (rows × trees) node-index blocks around this size when walking big batches.
+_BLOCK_CELLS = 1 << 20
+
+# Default spread reported by predict_interval: the 5th and 95th percentile tree.
+DEFAULT_QUANTILES = (0.05, 0.95)
+
+
+def _float32_floor(threshold):
+    """
+    Largest float32 <= threshold. sklearn compares float32 inputs against
+    float64 thresholds; for float32 x, x <= t exactly when x <= floor32(t),
+    so the walk can stay in float32 without changing any branch.
+    """
+    t32 = threshold.astype(np.float32)
+    too_high = t32.astype(np.float64) > threshold
+    t32[too_high] = np.nextafter(t32[too_high], np.float32(-np.inf))
+    return t32
+
+
+class FlatForest:
+    """
+    Compiled tree ensemble. Leaves point at themselves (left == right == node),
+    so a fixed number of steps equal to the deepest tree always lands every
+    row on its leaf. value holds the mean target of every node, not only
+    leaves, so per-node quantities can be derived later.
+    """
+
+    _ARRAYS = ('feature', 'threshold', 'left', 'right', 'value', 'roots')
+
+    def __init__(self, feature, threshold, left, right, value, roots, max_depth, n_features):
+        # integer/value arrays keep whatever (possibly narrow) dtype they come in
+        self.feature = np.ascontiguousarray(feature)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float32)
+        self.left = np.ascontiguousarray(left)
+        self.right = np.ascontiguousarray(right)
+        self.value = np.ascontiguousarray(value)
+        self.roots = np.ascontiguousarray(roots)
+        self.max_depth = int(max_depth)
+        self.n_features = int(n_features)
+
+    @property
+    def n_trees(self):
+        return len(self.roots)
+
+    @property
+    def n_nodes(self):
+        return len(self.feature)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.feature, self.threshold, self.left,
+                                      self.right, self.value, self.roots))
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Compile a fitted single-output sklearn tree regressor or forest of them.
+        """
+        trees = [est.tree_ for est in getattr(model, 'estimators_', [model])
+                 if hasattr(est, 'tree_')]
+        if not trees:
+            raise TypeError(f"{type(model).__name__} has no sklearn decision trees to compile")
+        if any(t.n_outputs != 1 for t in trees):
+            raise TypeError("Only single-output regressors can be compiled")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        for tree in trees:
+            n = tree.node_count
+            ids = np.arange(n)
+            leaf = tree.children_left == -1
+
+            features.append(np.where(leaf, 0, tree.feature))
+            thresholds.append(_float32_floor(np.where(leaf, np.inf, tree.threshold)))
+            lefts.append(np.where(leaf, ids, tree.children_left) + offset)
+            rights.append(np.where(leaf, ids, tree.children_right) + offset)
+            values.append(tree.value.reshape(n, -1)[:, 0])
+            roots.append(offset)
+            offset += n
+
+        return cls(
+            np.concatenate(features).astype(np.intp), np.concatenate(thresholds),
+            np.concatenate(lefts).astype(np.intp), np.concatenate(rights).astype(np.intp),
+            np.concatenate(values).astype(np.float64), np.array(roots, dtype=np.intp),
+            max(t.max_depth for t in trees), model.n_features_in_,
+        )
+
+    def save(self, path):
+        """
+        Write the arrays, in their current dtypes, to a compressed .npz file.
+        """
+        np.savez_compressed(
+            path, max_depth=self.max_depth, n_features=self.n_features,
+            **{name: getattr(self, name) for name in self._ARRAYS},
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            arrays = {name: data[name] for name in cls._ARRAYS}
+            return cls(max_depth=int(data['max_depth']), n_features=int(data['n_features']), **arrays)
+
+    def _as_rows(self, X):
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        if X.shape[1] != self.n_features:
+            raise ValueError(f"Expected {self.n_features} features, got {X.shape[1]}")
+        return np.ascontiguousarray(X)
+
+    def _walk(self, X):
+        n = len(X)
+        flat_x = X.ravel()
+        row_offsets = (np.arange(n) * self.n_features)[:, None]
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            go_left = flat_x[row_offsets + self.feature[nodes]] <= self.threshold[nodes]
+            nodes = np.where(go_left, self.left[nodes], self.right[nodes])
+        return nodes
+
+    def apply(self, X):
+        """
+        Leaf node index (into the flat arrays) reached by each row in each tree:
+        shape (n_rows, n_trees).
+        """
+        X = self._as_rows(X)
+        block = max(1, _BLOCK_CELLS // self.n_trees)
+        if len(X) <= block:
+            return self._walk(X)
+        return np.concatenate([self._walk(X[i:i + block]) for i in range(0, len(X), block)])
+
+    def tree_predictions(self, X):
+        """
+        Per-tree outputs, shape (n_rows, n_trees).
+        """
+        return self.value[self.apply(X)]
+
+    def predict(self, X):
+        return self.tree_predictions(X).mean(axis=1, dtype=np.float64)
+
+    def predict_interval(self, X, quantiles=DEFAULT_QUANTILES):
+        """
+        Prediction and per-tree quantiles from the same walk: (mean (n_rows,),
+        bounds (n_rows, len(quantiles))). Quantiles interpolate linearly
+        between sorted tree outputs, as np.quantile does. They measure how
+        much the trees disagree, not a calibrated predictive interval.
+        """
+        X = self._as_rows(X)
+        lo, hi, frac = _quantile_positions(quantiles, self.n_trees)
+        mean = np.empty(len(X))
+        bounds = np.empty((len(X), len(frac)))
+        block = max(1, _BLOCK_CELLS // self.n_trees)
+        for i in range(0, len(X), block):
+            per_tree = self.value[self._walk(X[i:i + block])]
+            mean[i:i + block] = per_tree.mean(axis=1, dtype=np.float64)
+            # one row sort gives every quantile; several times cheaper than np.quantile
+            per_tree.sort(axis=1)
+            bounds[i:i + block] = per_tree[:, lo] + (per_tree[:, hi] - per_tree[:, lo]) * frac
+        return mean, bounds
+
+    def contributions(self, X):
+        """
+        Per-feature contributions to each prediction by the tree-path method
+        (Saabas): along every row's path, each split's change in node mean
+        is credited to the split feature, then averaged over trees. Returns
+        (bias, contributions (n_rows, n_features)) with
+        bias + contributions.sum(axis=1) == predict(X) up to rounding; bias
+        is the forest's mean root value, the same for every row.
+        """
+        X = self._as_rows(X)
+        out = np.empty((len(X), self.n_features))
+        block = max(1, _BLOCK_CELLS // self.n_trees)
+        for i in range(0, len(X), block):
+            out[i:i + block] = self._path_contributions(X[i:i + block])
+        return float(self.value[self.roots].mean()), out
+
+    def _path_contributions(self, X):
+        n = len(X)
+        flat_x = X.ravel()
+        row_offsets = (np.arange(n) * self.n_features)[:, None]
+        # (row, feature) cell of every (row, tree) step, summed with one bincount per level
+        cell_offsets = np.broadcast_to(row_offsets, (n, self.n_trees))
+        totals = np.zeros(n * self.n_features)
+        nodes = np.broadcast_to(self.roots, (n, self.n_trees)).copy()
+        for _ in range(self.max_depth):
+            split = self.feature[nodes]
+            go_left = flat_x[row_offsets + split] <= self.threshold[nodes]
+            children = np.where(go_left, self.left[nodes], self.right[nodes])
+            # leaves point at themselves, so finished paths add zero
+            totals += np.bincount((cell_offsets + split).ravel(),
+                                  weights=(self.value[children] - self.value[nodes]).ravel(),
+                                  minlength=len(totals))
+            nodes = children
+        return totals.reshape(n, self.n_features) / self.n_trees
+
+
+def _quantile_positions(quantiles, n):
+    """
+    Neighbouring sorted positions and interpolation weights for each
+    quantile of n values.
+    """
+    q = np.atleast_1d(np.asarray(quantiles, dtype=np.float64))
+    if q.ndim != 1 or not np.all((q >= 0) & (q <= 1)):
+        raise ValueError(f"quantiles must be in [0, 1], got {quantiles!r}")
+    pos = q * (n - 1)
+    lo = np.floor(pos).astype(np.intp)
+    return lo, np.minimum(lo + 1, n - 1), pos - lo
+
+
+def compile_model(model):
+    """
+    FlatForest for a loaded model: returned as-is if it already is one. A
+    FeaturePipeline compiles to the same pipeline around a FlatForest.
+    """
+    if isinstance(model, FlatForest):
+        return model
+    if hasattr(model, 'compiled'):
+        return model.compiled()
+    return FlatForest.from_sklearn(model)
+
+
+def _best_of(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings), float(np.median(timings))
+
+
+def main(argv=None):
+    import warnings
+
+    import pandas as pd
+
+    import model_cache
+    from liquidity import FEATURE_COLUMNS, build_feature_matrix
+
+    parser = argparse.ArgumentParser(description="Compile the forest and compare it with sklearn.")
+    parser.add_argument('--model', default=None, help="model pickle (default: bundled model)")
+    parser.add_argument('--check', action='store_true', help="verify parity and time both engines")
+    parser.add_argument('--rows', type=int, default=20_000, help="random rows for the parity check")
+    args = parser.parse_args(argv)
+
+    model = model_cache.get_model(args.model)
+    start = time.perf_counter()
+    flat = FlatForest.from_sklearn(model)
+    print(f"Compiled {flat.n_trees} trees / {flat.n_nodes:,} nodes (depth ≤ {flat.max_depth}) "
+          f"into {flat.nbytes / 1e6:.2f} MB in {(time.perf_counter() - start) * 1000:.1f} ms")
+    if not args.check:
+        return
+
+    rng = np.random.default_rng(0)
+    open_p = rng.lognormal(0, 4, args.rows)
+    close_p = open_p * rng.uniform(0.9, 1.1, args.rows)
+    high_p = np.maximum(open_p, close_p) * rng.uniform(1.0, 1.05, args.rows)
+    low_p = np.minimum(open_p, close_p) * rng.uniform(0.95, 1.0, args.rows)
+    volume = rng.lognormal(12, 3, args.rows)
+    X = build_feature_matrix(open_p, high_p, low_p, close_p, volume)
+
+    diff = np.abs(flat.predict(X) - model.predict(X))
+    print(f"Parity over {args.rows:,} rows: max |Δ| = {diff.max():.3e}")
+    if diff.max() > 1e-9:
+        raise SystemExit("FAILED: compiled forest disagrees with sklearn")
+
+    print(f"{'rows':>6} {'sklearn best/median (ms)':>26} {'flat best/median (ms)':>24} {'speed-up':>9}")
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        for n in (1, 10, 100, 1000):
+            frame = pd.DataFrame(X[:n], columns=FEATURE_COLUMNS)
+            repeat = 50 if n <= 100 else 10
+            sk_best, sk_med = _best_of(lambda: model.predict(frame), repeat)
+            fl_best, fl_med = _best_of(lambda: flat.predict(X[:n]), repeat)
+            print(f"{n:>6} {sk_best * 1000:>12.3f} / {sk_med * 1000:<11.3f} "
+                  f"{fl_best * 1000:>10.3f} / {fl_med * 1000:<11.3f} {sk_med / fl_med:>8.1f}×")
+
+
+if __name__ == '__main__':
+    main()
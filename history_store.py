@@ -0,0 +1,286 @@
+"""
+On-disk OHLCV history: one contiguous array file per field per coin,
+memory-mapped for reads and indexed by timestamp.
+
+    <root>/c-<coin>/ts.i8       int64 epoch nanoseconds, strictly increasing
+    <root>/c-<coin>/open.f8     float64, one value per timestamp
+    ...          /high.f8 low.f8 close.f8 volume.f8
+
+Appends only ever write past the end of each file. The timestamp file is
+written last and is the commit record: a row exists once its timestamp is
+on disk, and any bytes beyond the committed length (an interrupted
+append, including a torn timestamp write) are truncated before the next
+write. fsync=True also syncs each
+file, at a few milliseconds per append.
+
+Reads map each file once (re-mapping only after it grows) and range
+queries return zero-copy NumPy views, found by binary search on the
+timestamps, that go straight into indicator_engine / liquidity:
+
+    store = HistoryStore('data/history')
+    store.append('Bitcoin', ts, open_p, high_p, low_p, close_p, volume)
+    view = store.range('Bitcoin', '2024-01-01', '2024-02-01')
+    sma_5, ema_12, rsi, macd = rolling_indicators(view.close)
+
+    python history_store.py import candles.csv --store data/history
+    python history_store.py info --store data/history
+    python history_store.py score Bitcoin --start 2024-01-01 --store data/history
+"""
+import argparse
+import os
+import sys
+import threading
+from collections import namedtuple
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+_TS_FILE = 'ts.i8'
+_DIR_PREFIX = 'c-'
+
+# Zero-copy slices of one coin's history: ts is datetime64[ns], the rest float64.
+HistoryView = namedtuple('HistoryView', ('ts',) + FIELDS)
+
+
+def to_ns(ts):
+    """
+    Timestamps as int64 epoch nanoseconds. Accepts datetime64 values,
+    ISO strings, datetime/pandas timestamps, or numbers (epoch seconds).
+    """
+    arr = np.asarray(ts)
+    if arr.dtype.kind in 'iuf':
+        return (arr.astype(np.float64) * 1e9).astype(np.int64) if arr.dtype.kind == 'f' \
+            else arr.astype(np.int64) * 1_000_000_000
+    if arr.dtype.kind == 'O':
+        arr = np.array([np.datetime64(getattr(t, 'to_datetime64', lambda: t)()) for t in arr.ravel()]
+                       ).reshape(arr.shape)
+    return arr.astype('datetime64[ns]').astype(np.int64)
+
+
+def _coin_dir(root, coin):
+    return os.path.join(root, _DIR_PREFIX + quote(str(coin), safe=''))
+
+
+class _CoinMaps:
+    __slots__ = ('length', 'ts', 'fields')
+
+    def __init__(self, path, length):
+        self.length = length
+        if length:
+            self.ts = np.memmap(os.path.join(path, _TS_FILE), dtype=np.int64, mode='r', shape=(length,))
+            self.fields = {f: np.memmap(os.path.join(path, f'{f}.f8'), dtype=np.float64, mode='r',
+                                        shape=(length,)) for f in FIELDS}
+        else:
+            self.ts = np.empty(0, dtype=np.int64)
+            self.fields = {f: np.empty(0) for f in FIELDS}
+
+
+class HistoryStore:
+    def __init__(self, root, fsync=False):
+        self.root = root
+        self.fsync = fsync
+        self._maps = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def coins(self):
+        return sorted(unquote(name[len(_DIR_PREFIX):]) for name in os.listdir(self.root)
+                      if name.startswith(_DIR_PREFIX) and os.path.isdir(os.path.join(self.root, name)))
+
+    def __len__(self):
+        return len(self.coins())
+
+    def count(self, coin):
+        """
+        Committed rows for coin.
+        """
+        try:
+            return os.path.getsize(os.path.join(_coin_dir(self.root, coin), _TS_FILE)) // 8
+        except FileNotFoundError:
+            return 0
+
+    # --- writes ---
+    def append(self, coin, ts, open_p, high_p, low_p, close_p, volume):
+        """
+        Append candles for one coin. Rows are sorted by time; rows at or
+        before the last stored timestamp (and duplicate timestamps) are
+        skipped. Returns the number of rows written.
+        """
+        ts = np.atleast_1d(to_ns(ts))
+        columns = [np.atleast_1d(np.asarray(c, dtype=np.float64)) for c in (open_p, high_p, low_p, close_p, volume)]
+        if any(len(c) != len(ts) for c in columns):
+            raise ValueError("timestamps and OHLCV columns must have the same length")
+
+        order = np.argsort(ts, kind='stable')
+        ts = ts[order]
+        keep = np.ones(len(ts), dtype=bool)
+        keep[1:] = ts[1:] != ts[:-1]
+
+        path = _coin_dir(self.root, coin)
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            committed = self.count(coin)
+            if committed:
+                last = np.fromfile(os.path.join(path, _TS_FILE), dtype=np.int64, count=1,
+                                   offset=(committed - 1) * 8)[0]
+                keep &= ts > last
+            if not keep.any():
+                return 0
+            rows = order[keep]
+
+            # values first, timestamps last (the commit)
+            for field, values in zip(FIELDS, columns):
+                with open(os.path.join(path, f'{field}.f8'), 'ab') as fh:
+                    fh.truncate(committed * 8)
+                    fh.write(np.ascontiguousarray(values[rows]).tobytes())
+                    self._sync(fh)
+            with open(os.path.join(path, _TS_FILE), 'ab') as fh:
+                fh.truncate(committed * 8)
+                fh.write(ts[keep].tobytes())
+                self._sync(fh)
+        return int(keep.sum())
+
+    def _sync(self, fh):
+        fh.flush()
+        if self.fsync:
+            os.fsync(fh.fileno())
+
+    def append_candle(self, coin, ts, candle):
+        """
+        Append one (open, high, low, close, volume) candle.
+        """
+        return self.append(coin, [ts], *([v] for v in candle))
+
+    # --- reads ---
+    def _mapped(self, coin):
+        length = self.count(coin)
+        with self._lock:
+            maps = self._maps.get(coin)
+            if maps is None or maps.length != length:
+                maps = self._maps[coin] = _CoinMaps(_coin_dir(self.root, coin), length)
+            return maps
+
+    def range(self, coin, start=None, end=None):
+        """
+        Rows with start <= ts < end (either bound optional) as a HistoryView
+        of read-only views into the mapped files.
+        """
+        maps = self._mapped(coin)
+        lo = 0 if start is None else int(np.searchsorted(maps.ts, to_ns(start), side='left'))
+        hi = maps.length if end is None else int(np.searchsorted(maps.ts, to_ns(end), side='left'))
+        return HistoryView(maps.ts[lo:hi].view('datetime64[ns]'), *(maps.fields[f][lo:hi] for f in FIELDS))
+
+    def tail(self, coin, n):
+        """
+        The last n rows for coin.
+        """
+        maps = self._mapped(coin)
+        lo = max(0, maps.length - n)
+        return HistoryView(maps.ts[lo:].view('datetime64[ns]'), *(maps.fields[f][lo:] for f in FIELDS))
+
+    def latest(self, coins=None):
+        """
+        (coins, (n, 5) OHLCV array, datetime64 timestamps) of each coin's last candle.
+        """
+        coins = [c for c in (self.coins() if coins is None else coins) if self.count(c)]
+        rows = np.empty((len(coins), len(FIELDS)))
+        ts = np.empty(len(coins), dtype='datetime64[ns]')
+        for i, coin in enumerate(coins):
+            view = self.tail(coin, 1)
+            rows[i] = [v[0] for v in view[1:]]
+            ts[i] = view.ts[0]
+        return coins, rows, ts
+
+
+def feature_matrix(view, rolling=True):
+    """
+    Model features for a HistoryView: rolling indicators over its closes
+    (or the single-candle proxies) stacked with OHLCV in FEATURE_COLUMNS order.
+    """
+    from liquidity import build_feature_matrix
+
+    indicators = None
+    if rolling:
+        from indicator_engine import rolling_indicators
+
+        indicators = rolling_indicators(view.close)
+    return build_feature_matrix(view.open, view.high, view.low, view.close, view.volume,
+                                indicators=indicators)
+
+
+def import_file(store, source, ts_column='date', chunksize=100_000):
+    """
+    Append a CSV/Parquet of candles (a coin/symbol column is optional) to the store.
+    """
+    import pandas as pd
+
+    from batch_scoring import iter_ohlcv_chunks, coin_column, normalise_columns
+
+    written = 0
+    for frame, _ in iter_ohlcv_chunks(source, chunksize):
+        frame = normalise_columns(frame)
+        lookup = {str(c).strip().lower(): c for c in frame.columns}
+        if ts_column.lower() not in lookup:
+            raise ValueError(f"Input has no {ts_column!r} timestamp column")
+        ts = pd.to_datetime(frame[lookup[ts_column.lower()]], errors='coerce')
+        ohlcv = frame[['Open', 'High', 'Low', 'Close', 'Volume']].apply(pd.to_numeric, errors='coerce')
+        valid = ts.notna().to_numpy() & np.isfinite(ohlcv.to_numpy()).all(axis=1)
+        coin_col = coin_column(frame)
+        coins = frame[coin_col].astype(str) if coin_col else pd.Series('', index=frame.index)
+        for coin, positions in coins[valid].groupby(coins[valid], sort=False).indices.items():
+            rows = np.flatnonzero(valid)[positions]
+            written += store.append(coin, ts.to_numpy()[rows], *ohlcv.to_numpy()[rows].T)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory-mapped per-coin OHLCV history.")
+    parser.add_argument('--store', default='data/history', help="store directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_import = sub.add_parser('import', help="append candles from a CSV/Parquet file")
+    p_import.add_argument('source')
+    p_import.add_argument('--ts-column', default='date')
+
+    sub.add_parser('info', help="rows and time span per coin")
+
+    p_score = sub.add_parser('score', help="score a coin's history range with rolling indicators")
+    p_score.add_argument('coin')
+    p_score.add_argument('--start', default=None)
+    p_score.add_argument('--end', default=None)
+    p_score.add_argument('--model', default=None)
+    args = parser.parse_args(argv)
+
+    store = HistoryStore(args.store, fsync=args.command == 'import')
+    if args.command == 'import':
+        written = import_file(store, args.source, args.ts_column)
+        print(f"Appended {written:,} candles to {args.store}", file=sys.stderr)
+    elif args.command == 'info':
+        for coin in store.coins():
+            view = store.range(coin)
+            span = f"{view.ts[0]} … {view.ts[-1]}" if len(view.ts) else "empty"
+            print(f"{coin or '(no coin)':<20} {len(view.ts):>12,}  {span}")
+    else:
+        import model_cache
+        from forest_engine import compile_model
+        from liquidity import normalize_score_array, liquidity_level_array
+
+        view = store.range(args.coin, args.start, args.end)
+        if not len(view.ts):
+            raise SystemExit(f"no history for {args.coin!r} in that range")
+        X = feature_matrix(view)
+        cache = model_cache.get_cache(args.model)
+        try:
+            predictor = cache.derived('flat_forest', compile_model)
+        except TypeError:
+            predictor = cache.get()
+        score = normalize_score_array(predictor.predict(X), view.volume, X[:, 5])
+        levels, counts = np.unique(liquidity_level_array(score), return_counts=True)
+        print(f"{args.coin}: {len(view.ts):,} candles {view.ts[0]} … {view.ts[-1]}")
+        print(f"  latest score {score[-1]:.3f} ({liquidity_level_array(score[-1:])[0]}), "
+              f"mean {score.mean():.3f}; " + ', '.join(f"{lv} {n:,}" for lv, n in zip(levels, counts)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""
+Stateful rolling indicators (SMA_5, EMA_12, Wilder RSI-14, MACD 12/26).
+
+IndicatorEngine keeps a small ring buffer and running EMA state per coin,
+so update() costs O(1) per new candle. backfill() runs the same recurrences
+over a whole NumPy array at once (IIR filters via scipy.signal.lfilter) and
+continues from — and then advances — the stored state, so history can be
+loaded in one pass and streamed afterwards without recomputing windows.
+"""
+from collections import deque
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+class _CoinState:
+    __slots__ = ('window', 'ema_fast', 'ema_slow', 'avg_gain', 'avg_loss', 'last_close', 'count')
+
+    def __init__(self, sma_window):
+        self.window = deque(maxlen=sma_window)
+        self.ema_fast = None
+        self.ema_slow = None
+        self.avg_gain = None
+        self.avg_loss = None
+        self.last_close = None
+        self.count = 0
+
+
+def _rsi(avg_gain, avg_loss):
+    """
+    Wilder RSI from smoothed gains/losses; 50 while flat, 100 with no losses.
+    """
+    avg_gain = np.asarray(avg_gain, dtype=np.float64)
+    avg_loss = np.asarray(avg_loss, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rsi = 100.0 - 100.0 / (1.0 + avg_gain / avg_loss)
+    rsi = np.where(avg_loss == 0, np.where(avg_gain > 0, 100.0, 50.0), rsi)
+    return rsi
+
+
+def _ema(values, alpha, prev):
+    """
+    y[n] = alpha * x[n] + (1 - alpha) * y[n-1], seeded with x[0] when prev is None.
+    """
+    # scipy.signal costs ~1 s to import; only the backfill path needs it
+    from scipy.signal import lfilter
+
+    if prev is None:
+        prev = values[0]
+    out, _ = lfilter([alpha], [1.0, -(1.0 - alpha)], values, zi=[(1.0 - alpha) * prev])
+    return out
+
+
+class IndicatorEngine:
+    """
+    Per-coin rolling indicator state. Coins are any hashable key (None is fine
+    for a single series).
+    """
+
+    def __init__(self, sma_window=5, ema_fast=12, ema_slow=26, rsi_period=14):
+        self.sma_window = sma_window
+        self.alpha_fast = 2.0 / (ema_fast + 1)
+        self.alpha_slow = 2.0 / (ema_slow + 1)
+        self.alpha_rsi = 1.0 / rsi_period
+        self._states = {}
+
+    def _state(self, coin):
+        state = self._states.get(coin)
+        if state is None:
+            state = self._states[coin] = _CoinState(self.sma_window)
+        return state
+
+    def count(self, coin):
+        state = self._states.get(coin)
+        return state.count if state else 0
+
+    def coins(self):
+        return list(self._states)
+
+    def reset(self, coin=None):
+        if coin is None:
+            self._states.clear()
+        else:
+            self._states.pop(coin, None)
+
+    # --- O(1) streaming path ---
+    def _step(self, state, close):
+        a_f, a_s, a_r = self.alpha_fast, self.alpha_slow, self.alpha_rsi
+
+        window = list(state.window)
+        if len(window) == self.sma_window:
+            window.pop(0)
+        window.append(close)
+        sma = sum(window) / len(window)
+
+        ema_fast = close if state.ema_fast is None else a_f * close + (1 - a_f) * state.ema_fast
+        ema_slow = close if state.ema_slow is None else a_s * close + (1 - a_s) * state.ema_slow
+
+        avg_gain, avg_loss = state.avg_gain, state.avg_loss
+        if state.last_close is not None:
+            delta = close - state.last_close
+            gain, loss = max(delta, 0.0), max(-delta, 0.0)
+            if avg_gain is None:
+                avg_gain, avg_loss = gain, loss
+            else:
+                avg_gain = a_r * gain + (1 - a_r) * avg_gain
+                avg_loss = a_r * loss + (1 - a_r) * avg_loss
+        rsi = 50.0 if avg_gain is None else float(_rsi(avg_gain, avg_loss))
+
+        indicators = (sma, ema_fast, rsi, ema_fast - ema_slow)
+        return indicators, (ema_fast, ema_slow, avg_gain, avg_loss)
+
+    def peek(self, coin, close):
+        """
+        Indicators update() would return for this close, without storing it.
+        """
+        close = float(close)
+        indicators, _ = self._step(self._state(coin), close)
+        return indicators
+
+    def update(self, coin, close):
+        """
+        Append one close and return (sma_5, ema_12, rsi, macd).
+        """
+        close = float(close)
+        state = self._state(coin)
+        indicators, (ema_fast, ema_slow, avg_gain, avg_loss) = self._step(state, close)
+        state.window.append(close)
+        state.ema_fast, state.ema_slow = ema_fast, ema_slow
+        state.avg_gain, state.avg_loss = avg_gain, avg_loss
+        state.last_close = close
+        state.count += 1
+        return indicators
+
+    def latest(self, coin):
+        """
+        Indicators after the most recent close, or None if the coin has no history.
+        """
+        state = self._states.get(coin)
+        if not state or not state.count:
+            return None
+        sma = sum(state.window) / len(state.window)
+        rsi = 50.0 if state.avg_gain is None else float(_rsi(state.avg_gain, state.avg_loss))
+        return sma, state.ema_fast, rsi, state.ema_fast - state.ema_slow
+
+    # --- vectorised backfill path ---
+    def backfill(self, coin, closes):
+        """
+        Append a whole array of closes in one pass and return the indicator
+        arrays (sma_5, ema_12, rsi, macd), one value per close.
+        """
+        closes = np.ascontiguousarray(closes, dtype=np.float64)
+        n = len(closes)
+        if n == 0:
+            empty = np.empty(0)
+            return empty, empty.copy(), empty.copy(), empty.copy()
+        state = self._state(coin)
+        w = self.sma_window
+
+        # SMA: pad the carried-over window (and zeros during warm-up) in front
+        history = np.fromiter(state.window, dtype=np.float64, count=len(state.window))
+        padded = np.concatenate([np.zeros(w - 1 - min(len(history), w - 1)),
+                                 history[-(w - 1):] if w > 1 else history[:0], closes])
+        sums = sliding_window_view(padded, w).sum(axis=1)
+        counts = np.minimum(np.arange(state.count + 1, state.count + n + 1), w)
+        sma = sums / counts
+
+        ema_fast = _ema(closes, self.alpha_fast, state.ema_fast)
+        ema_slow = _ema(closes, self.alpha_slow, state.ema_slow)
+
+        if state.last_close is None:
+            deltas = np.diff(closes)
+        else:
+            deltas = np.diff(closes, prepend=state.last_close)
+        gains, losses = np.maximum(deltas, 0.0), np.maximum(-deltas, 0.0)
+        avg_gain = _ema(gains, self.alpha_rsi, state.avg_gain) if len(deltas) else gains
+        avg_loss = _ema(losses, self.alpha_rsi, state.avg_loss) if len(deltas) else losses
+        rsi = _rsi(avg_gain, avg_loss)
+        if state.last_close is None:
+            rsi = np.concatenate([[50.0], rsi])
+
+        state.window.extend(closes[-w:].tolist())
+        state.ema_fast, state.ema_slow = float(ema_fast[-1]), float(ema_slow[-1])
+        if len(deltas):
+            state.avg_gain, state.avg_loss = float(avg_gain[-1]), float(avg_loss[-1])
+        state.last_close = float(closes[-1])
+        state.count += n
+
+        return sma, ema_fast, rsi, ema_fast - ema_slow
+
+
+def rolling_indicators(closes, **params):
+    """
+    Stateless helper: indicator arrays for one price series.
+    """
+    return IndicatorEngine(**params).backfill(None, closes)
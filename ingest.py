@@ -0,0 +1,240 @@
+"""
+Incremental ingestion of a directory of CoinGecko snapshot CSVs into one
+columnar dataset for training.
+
+    python ingest.py snapshots/ --workers 8
+    python train.py snapshots/          # ingests, then trains on the result
+
+Each new or changed file is parsed in a worker process with the snapshot
+dtypes (training_data.SNAPSHOT_DTYPES), cleaned as the notebook did
+(dropna, parsed dates), de-duplicated on coin/symbol/date and written as
+a Parquet part named after the file's SHA-256. manifest.json records the
+size, mtime and hash of every file: a rerun re-parses only files whose
+size or mtime changed and whose content really did (a touched file is
+hashed, not parsed); files that disappeared are dropped. When anything
+changed, the parts are merged into snapshots.parquet, de-duplicated
+across files (the file later in name order wins, so daily snapshots
+named by date let the newest copy of a row stand).
+
+Cache layout (default .cache/snapshots/):
+
+    manifest.json        per-file size / mtime_ns / sha256 / rows / part
+    parts/<sha16>.parquet
+    snapshots.parquet    what train.py reads
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from model_cache import file_sha256
+from training_data import SNAPSHOT_DTYPES, read_snapshot_chunks
+
+INGEST_FORMAT = 1
+DEFAULT_CACHE_DIR = '.cache/snapshots'
+DEFAULT_PATTERN = '*.csv'
+MANIFEST = 'manifest.json'
+PARTS_DIR = 'parts'
+DATASET = 'snapshots.parquet'
+DEDUPE_KEYS = ['coin', 'symbol', 'date']
+
+
+def _schema():
+    # a manifest written under other dtypes or keys describes parts we can't reuse
+    return {'format': INGEST_FORMAT, 'dtypes': SNAPSHOT_DTYPES, 'keys': DEDUPE_KEYS}
+
+
+def find_snapshots(sources, pattern=DEFAULT_PATTERN):
+    """
+    Absolute paths of the snapshot files: directories are globbed for
+    pattern, files are taken as given.
+    """
+    paths = set()
+    for source in sources:
+        if os.path.isdir(source):
+            paths.update(glob.glob(os.path.join(source, pattern)))
+        elif os.path.exists(source):
+            paths.add(source)
+        else:
+            raise FileNotFoundError(source)
+    return sorted(os.path.abspath(p) for p in paths)
+
+
+def read_manifest(cache_dir):
+    path = os.path.join(cache_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as fh:
+            manifest = json.load(fh)
+        if manifest.get('schema') == _schema():
+            return manifest
+    return {'schema': _schema(), 'files': {}, 'dataset': None}
+
+
+def _write_json(obj, path):
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'w') as fh:
+        json.dump(obj, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def _write_parquet(frame, path):
+    tmp = f'{path}.tmp-{os.getpid()}'
+    frame.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def parse_file(path, parts_dir, known_sha=None, chunksize=100_000):
+    """
+    Worker: hash one snapshot and, unless its content matches known_sha,
+    parse, clean and de-duplicate it into a Parquet part. Returns
+    (path, manifest entry).
+    """
+    start = time.perf_counter()
+    # stat before reading: a file rewritten mid-read then looks changed next run
+    st = os.stat(path)
+    entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns, 'sha256': file_sha256(path)}
+    if entry['sha256'] == known_sha:
+        return path, dict(entry, unchanged=True)
+
+    frame = read_snapshot_chunks(path, chunksize)
+    cleaned = len(frame)
+    frame = frame.drop_duplicates(DEDUPE_KEYS, keep='last')
+    part = f"{entry['sha256'][:16]}.parquet"
+    _write_parquet(frame, os.path.join(parts_dir, part))
+    return path, dict(entry, part=part, rows=len(frame), duplicates=cleaned - len(frame),
+                      seconds=time.perf_counter() - start)
+
+
+def consolidate(cache_dir, manifest):
+    """
+    Merge the parts of every file in the manifest into snapshots.parquet,
+    keeping the last copy of each coin/symbol/date in file name order.
+    """
+    parts_dir = os.path.join(cache_dir, PARTS_DIR)
+    frames = [pd.read_parquet(os.path.join(parts_dir, manifest['files'][p]['part']))
+              for p in sorted(manifest['files'])]
+    frame = pd.concat(frames, ignore_index=True)
+    total = len(frame)
+    frame = (frame.drop_duplicates(DEDUPE_KEYS, keep='last')
+             .sort_values(DEDUPE_KEYS, kind='stable').reset_index(drop=True))
+    path = os.path.join(cache_dir, DATASET)
+    _write_parquet(frame, path)
+    return {'path': path, 'rows': len(frame), 'duplicates': total - len(frame), 'files': len(frames),
+            'updated': time.strftime('%Y-%m-%dT%H:%M:%S%z')}
+
+
+def ingest(sources, cache_dir=DEFAULT_CACHE_DIR, pattern=DEFAULT_PATTERN, workers=None, chunksize=100_000,
+           progress=None):
+    """
+    Bring the cache up to date with the snapshot files under sources (a
+    path or a list of paths). Returns a report whose 'dataset' is the
+    Parquet file to train on.
+    """
+    start = time.perf_counter()
+    sources = [sources] if isinstance(sources, (str, os.PathLike)) else list(sources)
+    paths = find_snapshots(sources, pattern)
+    if not paths:
+        raise FileNotFoundError(f"no snapshot files matching {pattern!r} in {', '.join(map(str, sources))}")
+    parts_dir = os.path.join(cache_dir, PARTS_DIR)
+    os.makedirs(parts_dir, exist_ok=True)
+    manifest = read_manifest(cache_dir)
+    known = manifest['files']
+
+    # size + mtime unchanged: trusted without reading the file
+    todo = []
+    for path in paths:
+        old = known.get(path)
+        st = os.stat(path)
+        if old is None or (old['size'], old['mtime_ns']) != (st.st_size, st.st_mtime_ns):
+            todo.append((path, old['sha256'] if old else None))
+    removed = sorted(set(known) - set(paths))
+
+    parsed, touched = [], []
+
+    def collect(path, entry):
+        if entry.pop('unchanged', False):
+            known[path].update(entry)
+            touched.append(path)
+        else:
+            known[path] = entry
+            parsed.append(path)
+        if progress:
+            progress(len(parsed) + len(touched), len(todo), path)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(todo), 1))
+    if workers == 1:
+        for path, sha in todo:
+            collect(*parse_file(path, parts_dir, sha, chunksize))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(parse_file, path, parts_dir, sha, chunksize) for path, sha in todo]
+            for future in as_completed(futures):
+                collect(*future.result())
+
+    for path in removed:
+        del known[path]
+    dataset_path = os.path.join(cache_dir, DATASET)
+    if parsed or removed or manifest['dataset'] is None or not os.path.exists(dataset_path):
+        manifest['dataset'] = consolidate(cache_dir, manifest)
+    # parts no file refers to any more (changed or removed files)
+    live = {entry['part'] for entry in known.values()}
+    for name in os.listdir(parts_dir):
+        if name.endswith('.parquet') and name not in live:
+            os.remove(os.path.join(parts_dir, name))
+    _write_json(manifest, os.path.join(cache_dir, MANIFEST))
+
+    return {
+        'dataset': dataset_path,
+        'files': len(paths),
+        'parsed': len(parsed),
+        'touched': len(touched),
+        'unchanged': len(paths) - len(todo),
+        'removed': len(removed),
+        'parsed_rows': sum(known[p]['rows'] for p in parsed),
+        'rows': manifest['dataset']['rows'],
+        'duplicates': manifest['dataset']['duplicates'],
+        'workers': workers,
+        'seconds': time.perf_counter() - start,
+    }
+
+
+def load_dataset(cache_dir=DEFAULT_CACHE_DIR):
+    """
+    The consolidated snapshot rows (typed, cleaned, de-duplicated).
+    """
+    return pd.read_parquet(os.path.join(cache_dir, DATASET))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ingest new or changed snapshot CSVs into the Parquet cache.")
+    parser.add_argument('sources', nargs='+', help="snapshot files and/or directories of them")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--pattern', default=DEFAULT_PATTERN, help="file glob inside directories")
+    parser.add_argument('--workers', type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    def report_progress(done, total, path):
+        print(f"\r  {done}/{total} file(s)  {os.path.basename(path):<40}", end='', file=sys.stderr, flush=True)
+
+    try:
+        report = ingest(args.sources, args.cache_dir, args.pattern, args.workers, args.chunksize,
+                        progress=report_progress)
+    except FileNotFoundError as e:
+        raise SystemExit(f"nothing to ingest: {e}")
+    if report['parsed'] or report['touched']:
+        print(file=sys.stderr)
+    print(f"{report['files']} file(s): {report['parsed']} parsed ({report['parsed_rows']:,} rows), "
+          f"{report['unchanged'] + report['touched']} unchanged, {report['removed']} removed "
+          f"in {report['seconds']:.2f} s with {report['workers']} worker(s)", file=sys.stderr)
+    print(f"Dataset: {report['dataset']} ({report['rows']:,} rows, "
+          f"{report['duplicates']:,} cross-file duplicates dropped)", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
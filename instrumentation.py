@@ -0,0 +1,209 @@
+"""
+Low-overhead stage timing for the app's hot path.
+
+    with timed('predict'):
+        raw_score = model.predict(X)
+
+Each stage feeds a process-wide histogram (fixed log-spaced buckets, so an
+observation is one perf_counter pair, a bisect and a locked increment —
+about two microseconds in all), shared by every Streamlit session. Summaries give
+count / mean / p50 / p95 / p99 estimated from the buckets, and
+prometheus_text() renders everything in the Prometheus text format.
+
+Exports, both optional and set by environment variable:
+
+    CRYPTO_LIQUIDITY_METRICS_FILE=/var/lib/node_exporter/crypto.prom
+        rewritten atomically (at most every 5 s) for a textfile collector
+    CRYPTO_LIQUIDITY_METRICS_PORT=9464
+        GET http://127.0.0.1:9464/metrics from a background thread
+"""
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_FILE_ENV = 'CRYPTO_LIQUIDITY_METRICS_FILE'
+METRICS_PORT_ENV = 'CRYPTO_LIQUIDITY_METRICS_PORT'
+METRIC_PREFIX = 'crypto_liquidity'
+FILE_INTERVAL_S = 5.0
+
+# 10 µs … ~40 s, four buckets per decade (upper bounds, seconds)
+BUCKETS = tuple(round(10 ** (e / 4), 9) for e in range(-20, 7))
+
+
+class Histogram:
+    __slots__ = ('counts', 'sum', 'count', '_lock')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    @staticmethod
+    def quantile(counts, q):
+        """
+        Linear interpolation inside the bucket holding the q-th observation.
+        """
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, n in enumerate(counts):
+            if n and seen + n >= rank:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return BUCKETS[-1]
+
+
+_stages = {}
+_stages_lock = threading.Lock()
+
+
+def _histogram(stage):
+    hist = _stages.get(stage)
+    if hist is None:
+        with _stages_lock:
+            hist = _stages.setdefault(stage, Histogram())
+    return hist
+
+
+def observe(stage, seconds):
+    _histogram(stage).observe(seconds)
+
+
+class timed:
+    """
+    Context manager timing one stage (a plain class: cheaper than @contextmanager).
+    """
+    __slots__ = ('_hist', '_start')
+
+    def __init__(self, stage):
+        self._hist = _histogram(stage)
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._hist.observe(time.perf_counter() - self._start)
+        return False
+
+
+def reset():
+    with _stages_lock:
+        _stages.clear()
+
+
+def summary():
+    """
+    {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms, total_s}}, in first-seen order.
+    """
+    out = {}
+    for stage, hist in list(_stages.items()):
+        counts, total, count = hist.snapshot()
+        if not count:
+            continue
+        out[stage] = {
+            'count': count,
+            'mean_ms': total / count * 1000,
+            **{f'p{q}_ms': Histogram.quantile(counts, q / 100) * 1000 for q in (50, 95, 99)},
+            'total_s': total,
+        }
+    return out
+
+
+def prometheus_text(prefix=METRIC_PREFIX):
+    name = f'{prefix}_stage_duration_seconds'
+    lines = [f'# HELP {name} Time spent in each stage of a prediction.', f'# TYPE {name} histogram']
+    for stage, hist in sorted(_stages.items()):
+        counts, total, count = hist.snapshot()
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float('inf'),), counts):
+            cumulative += n
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{name}_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+        lines.append(f'{name}_sum{{stage="{stage}"}} {total!r}')
+        lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    """
+    Atomically replace path with the current metrics (textfile-collector safe).
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f'{path}.tmp-{os.getpid()}'
+    with open(tmp, 'w') as fh:
+        fh.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus_text().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_metrics(port, host='127.0.0.1'):
+    """
+    Serve GET /metrics on a daemon thread; returns the server.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    return server
+
+
+_export_lock = threading.Lock()
+_last_file_write = 0.0
+_server = None
+
+
+def export():
+    """
+    Run the exporters configured by environment variable: start the
+    /metrics endpoint once per process, and rewrite the metrics file if the
+    last write is older than FILE_INTERVAL_S. Cheap to call on every run.
+    """
+    global _last_file_write, _server
+    port, path = os.environ.get(METRICS_PORT_ENV), os.environ.get(METRICS_FILE_ENV)
+    if not port and not path:
+        return
+    with _export_lock:
+        if port and _server is None:
+            try:
+                _server = serve_metrics(int(port))
+            except (OSError, ValueError) as e:
+                _server = False  # don't retry on every run
+                print(f"[instrumentation] metrics endpoint not started: {e}", file=sys.stderr)
+        now = time.monotonic()
+        if path and now - _last_file_write >= FILE_INTERVAL_S:
+            write_prometheus(path)
+            _last_file_write = now
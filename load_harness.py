@@ -0,0 +1,351 @@
+"""
+Load harness for the Streamlit app: N simulated users driving final.py at
+once through one real `streamlit run` worker.
+
+Each simulated session is a headless client speaking Streamlit's own
+websocket protocol, as a browser tab does, with its own session_state on
+the server and the worker's shared model and prediction caches. One cycle
+per session is what a user does: pick a coin, load its demo candle, edit
+the close and volume, accept the disclaimer (first cycle only) and
+predict — each step a full rerun of the real script, timed from sending
+the widget change to the server's script_finished message.
+
+For every session count it reports rerun latency percentiles (all reruns
+and predict reruns alone), throughput, failures and the server's RSS
+growth per session. A warm-up session runs first so imports and the model
+load aren't charged to the first level.
+
+    python load_harness.py --sessions 1,4,16,32 --cycles 5 --output load.json
+    python load_harness.py --url http://127.0.0.1:8501 --pid 12345   # a worker already running
+
+The client needs the websockets package (a dependency of recent Streamlit
+releases; `pip install websockets` otherwise).
+"""
+import argparse
+import contextlib
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+DEFAULT_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'final.py')
+STREAM_PATH = '/_stcore/stream'
+HEALTH_PATH = '/_stcore/health'
+
+
+def rss_bytes(pid):
+    with open(f'/proc/{pid}/statm') as fh:
+        return int(fh.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(script=DEFAULT_SCRIPT, timeout=60):
+    """
+    Launch `streamlit run script` headless on a free local port and wait
+    for its health check. Returns (process, base_url).
+    """
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'streamlit', 'run', script, '--server.headless', 'true',
+         '--server.port', str(port), '--server.address', '127.0.0.1',
+         '--server.fileWatcherType', 'none', '--browser.gatherUsageStats', 'false'],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"streamlit exited with code {proc.returncode}")
+        try:
+            with urllib.request.urlopen(url + HEALTH_PATH, timeout=1) as response:
+                if response.status == 200:
+                    return proc, url
+        except OSError:
+            time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError(f"streamlit did not become healthy within {timeout} s")
+
+
+def _find(widgets, label):
+    proto = next((proto for lbl, (_, proto) in widgets.items() if label in lbl), None)
+    if proto is None:
+        raise LookupError(f"no widget labelled {label!r} in the last run")
+    return proto
+
+
+class SimulatedSession:
+    """
+    One browser-like session. Widgets are found by label among the
+    elements of the last run, and their values sent as the frontend sends
+    them: every widget state the user has set goes with each rerun.
+    """
+
+    def __init__(self, url, seed, timeout=60):
+        self.url = 'ws' + url[len('http'):] + STREAM_PATH
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.timings = []  # (step, seconds)
+        self.failures = []
+        self.widgets = {}  # label -> (element type, proto) from the last run
+        self.texts = []
+        self._sticky = {}  # widget id -> WidgetState sent with every rerun
+        self._ws = None
+        self._exit = contextlib.ExitStack()
+
+    def close(self):
+        self._exit.close()
+        self._ws = None
+
+    def _rerun(self, states):
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ''
+        msg.rerun_script.page_script_hash = ''
+        for state in {**self._sticky, **{s.id: s for s in states}}.values():
+            msg.rerun_script.widget_states.widgets.add().CopyFrom(state)
+        self._ws.send(msg.SerializeToString())
+
+        widgets, texts = {}, []
+        while True:
+            forward = ForwardMsg()
+            forward.ParseFromString(self._ws.recv(timeout=self.timeout))
+            kind = forward.WhichOneof('type')
+            if kind == 'script_finished':
+                status = forward.script_finished
+                if status != forward.FINISHED_EARLY_FOR_RERUN:
+                    break
+                widgets, texts = {}, []  # st.rerun(): the next run follows on the same message stream
+                continue
+            if kind != 'delta' or forward.delta.WhichOneof('type') != 'new_element':
+                continue
+            element = forward.delta.new_element
+            etype = element.WhichOneof('type')
+            proto = getattr(element, etype)
+            if getattr(proto, 'id', '') and getattr(proto, 'label', ''):
+                widgets[proto.label] = (etype, proto)
+            elif etype == 'markdown':
+                texts.append(proto.body)
+            elif etype == 'alert' and proto.format == proto.ERROR:
+                texts.append('ERROR: ' + proto.body)
+            elif etype == 'exception':
+                texts.append(f'EXCEPTION: {proto.type}: {proto.message}')
+        self.widgets, self.texts = widgets, texts
+        return status
+
+    def _step(self, name, states=()):
+        start = time.perf_counter()
+        try:
+            status = self._rerun(list(states))
+        except Exception as e:
+            self.failures.append(f"{name}: {type(e).__name__}: {e}")
+            return False
+        finally:
+            self.timings.append((name, time.perf_counter() - start))
+        exceptions = [t for t in self.texts if t.startswith('EXCEPTION')]
+        # 0 = finished, 3 = fragment run finished
+        if status not in (0, 3) or exceptions:
+            self.failures.append(f"{name}: " + (exceptions[0] if exceptions else f"run status {status}"))
+            return False
+        return True
+
+    def _state(self, label, **value):
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        return WidgetState(id=_find(self.widgets, label).id, **value)
+
+    def _number(self, label):
+        proto = _find(self.widgets, label)
+        return proto.value if proto.set_value else proto.default
+
+    def open(self):
+        try:
+            from websockets.sync.client import connect
+        except ImportError:
+            raise SystemExit("load_harness needs the websockets package: pip install websockets")
+        try:
+            self._ws = self._exit.enter_context(connect(
+                self.url, subprotocols=['streamlit'], max_size=None, open_timeout=self.timeout))
+        except Exception as e:
+            self.failures.append(f"connect: {type(e).__name__}: {e}")
+            return False
+        return self._step('open')
+
+    def cycle(self):
+        """
+        One user cycle; anything that goes wrong outside a timed rerun (a
+        missing widget, a dropped connection) is recorded as a failure.
+        """
+        try:
+            self._cycle()
+        except Exception as e:
+            self.failures.append(f"cycle: {type(e).__name__}: {e}")
+
+    def _cycle(self):
+        rng = self.rng
+        selectbox = _find(self.widgets, 'Select a Coin')
+        index = rng.randrange(1, len(selectbox.options))
+        # newer Streamlit sends the option text, older releases its index
+        value = ({'string_value': selectbox.options[index]} if 'raw_value' in selectbox.DESCRIPTOR.fields_by_name
+                 else {'int_value': index})
+        coin = self._state('Select a Coin', **value)
+        self._sticky[coin.id] = coin
+        if not (self._step('select_coin')
+                and self._step('load_demo', [self._state('Load Demo Data', trigger_value=True)])):
+            return
+        low, high = self._number('Low Price'), self._number('High Price')
+        edits = [self._state('Close Price', double_value=round(low + (high - low) * rng.uniform(0.1, 0.9), 6))]
+        if not self._step('edit_close', edits):
+            return
+        edits.append(self._state('Volume', double_value=round(self._number('Volume') * rng.uniform(0.5, 1.5), 4)))
+        if not self._step('edit_volume', edits):
+            return
+        agree = self._state('I agree', bool_value=True)
+        if agree.id not in self._sticky:
+            self._sticky[agree.id] = agree
+            if not self._step('agree', edits):
+                return
+        if self._step('predict', edits + [self._state('Predict Liquidity', trigger_value=True)]):
+            if not any('Prediction Results' in t for t in self.texts):
+                errors = [t for t in self.texts if t.startswith('ERROR')] or ['no results panel']
+                self.failures.append(f"predict: {errors[0]}")
+
+
+def _percentiles_ms(seconds):
+    if not seconds:
+        return {'p50': None, 'p95': None, 'p99': None}
+    values = np.percentile(np.asarray(seconds) * 1e3, (50, 95, 99))
+    return {f'p{q}': float(v) for q, v in zip((50, 95, 99), values)}
+
+
+def run_level(url, n_sessions, cycles, pid=None, timeout=60, seed=0):
+    """
+    Open n_sessions sessions together, run cycles per session, and
+    summarise latency, throughput and server memory for this level.
+    """
+    rss_before = rss_bytes(pid) if pid else None
+    sessions = [SimulatedSession(url, seed + i, timeout) for i in range(n_sessions)]
+    barrier = threading.Barrier(n_sessions + 1)
+
+    def drive(session):
+        ok = session.open()
+        barrier.wait()  # every session open before memory is sampled
+        barrier.wait()
+        for _ in range(cycles if ok else 0):
+            session.cycle()
+
+    threads = [threading.Thread(target=drive, args=(s,), name=f'session-{i}', daemon=True)
+               for i, s in enumerate(sessions)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    barrier.wait()
+    rss_open = rss_bytes(pid) if pid else None
+    barrier.wait()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    # sampled with the sessions still connected: their state is still held
+    rss_after = rss_bytes(pid) if pid else None
+    for s in sessions:
+        s.close()
+
+    timings = [t for s in sessions for t in s.timings]
+    predicts = [sec for step, sec in timings if step == 'predict']
+    failures = [f for s in sessions for f in s.failures]
+    result = {
+        'sessions': n_sessions,
+        'cycles': cycles,
+        'reruns': len(timings),
+        'predictions': len(predicts),
+        'failures': len(failures),
+        'failure_examples': sorted(set(failures))[:5],
+        'wall_s': wall,
+        'reruns_per_s': len(timings) / wall,
+        'predictions_per_s': len(predicts) / wall,
+        'rerun_ms': _percentiles_ms([sec for _, sec in timings]),
+        'predict_ms': _percentiles_ms(predicts),
+    }
+    if pid:
+        result['rss_mb'] = {'before': rss_before / 1e6, 'open': rss_open / 1e6, 'after': rss_after / 1e6}
+        result['rss_per_session_mb'] = (rss_after - rss_before) / n_sessions / 1e6
+    return result
+
+
+def run(url, levels=(1, 4, 16), cycles=3, pid=None, timeout=60, progress=None):
+    warm_start = time.perf_counter()
+    warmup = SimulatedSession(url, seed=-1, timeout=timeout)
+    if warmup.open():
+        warmup.cycle()
+    warmup.close()
+    report = {'url': url, 'warmup_s': time.perf_counter() - warm_start,
+              'warmup_failures': warmup.failures, 'levels': []}
+    for n in levels:
+        report['levels'].append(run_level(url, n, cycles, pid, timeout, seed=1000 * n))
+        if progress:
+            progress(report['levels'][-1])
+    return report
+
+
+def _print_level(level):
+    r, p = level['rerun_ms'], level['predict_ms']
+    per_session = level.get('rss_per_session_mb')
+    print(f"{level['sessions']:>5} {level['reruns']:>7} {level['wall_s']:>8.1f} {level['reruns_per_s']:>8.1f} "
+          f"{level['predictions_per_s']:>8.2f} {r['p50'] or 0:>8.0f} {r['p95'] or 0:>8.0f} {r['p99'] or 0:>8.0f} "
+          f"{p['p50'] or 0:>8.0f} {p['p99'] or 0:>8.0f} "
+          f"{'-' if per_session is None else f'{per_session:.2f}':>8} {level['failures']:>5}", flush=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent-session load test of the Streamlit app.")
+    parser.add_argument('--script', default=DEFAULT_SCRIPT)
+    parser.add_argument('--url', default=None, help="test a running server instead of starting one")
+    parser.add_argument('--pid', type=int, default=None, help="with --url: the server's pid, for memory figures")
+    parser.add_argument('--sessions', default='1,4,16', help="comma-separated session counts to run in turn")
+    parser.add_argument('--cycles', type=int, default=3, help="load/edit/predict cycles per session")
+    parser.add_argument('--timeout', type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument('--output', default=None, help="write the JSON report here")
+    args = parser.parse_args(argv)
+
+    server, url, pid = None, args.url, args.pid
+    if url is None:
+        server, url = start_server(args.script, args.timeout)
+        pid = server.pid
+        print(f"Started streamlit (pid {pid}) at {url}", file=sys.stderr)
+    try:
+        print(f"{'sess':>5} {'reruns':>7} {'wall s':>8} {'rerun/s':>8} {'pred/s':>8} "
+              f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'pred p50':>8} {'pred p99':>8} "
+              f"{'MB/sess':>8} {'fail':>5}")
+        report = run(url, tuple(int(n) for n in args.sessions.split(',')), args.cycles, pid, args.timeout,
+                     progress=_print_level)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    for example in report['warmup_failures']:
+        print(f"  [warm-up] {example}", file=sys.stderr)
+    for level in report['levels']:
+        for example in level['failure_examples']:
+            print(f"  [{level['sessions']} sessions] {example}", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Report: {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import hashlib
+import os
+import threading
+import time
+
+
+MODEL_FILENAME = 'crypto_liquidity_model.pkl'
+MODEL_ENV_VAR = 'CRYPTO_LIQUIDITY_MODEL'
+REGISTRY_ENV_VAR = 'CRYPTO_LIQUIDITY_REGISTRY'
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def default_model_path():
+    """
+    Locate the trained model: $CRYPTO_LIQUIDITY_MODEL if set (a pickle or a
+    FlatForest .npz from export_model.py), else the model_registry choice for
+    $CRYPTO_LIQUIDITY_LATENCY_BUDGET_MS if $CRYPTO_LIQUIDITY_REGISTRY is set,
+    else next to the app, then streamlit_app/.
+    """
+    if os.environ.get(MODEL_ENV_VAR):
+        return os.environ[MODEL_ENV_VAR]
+    if os.environ.get(REGISTRY_ENV_VAR):
+        from model_registry import resolve
+
+        path = resolve(os.environ[REGISTRY_ENV_VAR])
+        if path:
+            return path
+    for folder in (_HERE, os.path.join(_HERE, 'streamlit_app')):
+        path = os.path.join(folder, MODEL_FILENAME)
+        if os.path.exists(path):
+            return path
+    return os.path.join(_HERE, MODEL_FILENAME)
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _load(path):
+    if path.endswith('.npz'):
+        from forest_engine import FlatForest
+        return FlatForest.load(path)
+    # joblib (and sklearn, via the unpickle) are imported on first load only
+    import joblib
+    return joblib.load(path)
+
+
+def atomic_dump(obj, path):
+    """
+    joblib.dump to a temp file, then rename over path so readers never see
+    a half-written model.
+    """
+    import joblib
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    joblib.dump(obj, tmp)
+    os.replace(tmp, path)
+
+
+def _model_nbytes(model):
+    """
+    Approximate resident size of a fitted tree model from its node arrays.
+    """
+    if hasattr(model, 'nbytes'):
+        return model.nbytes
+    total = 0
+    for est in getattr(model, 'estimators_', [model]):
+        tree = getattr(est, 'tree_', None)
+        if tree is None:
+            continue
+        state = tree.__getstate__()
+        total += state['nodes'].nbytes + state['values'].nbytes
+    return total
+
+
+class ModelCache:
+    """
+    Process-wide cache for one model file.
+
+    Every Streamlit session shares the same instance, so the pickle is only
+    deserialised once per process. Each lookup costs a single os.stat();
+    the file is re-hashed only when its mtime/size changes, and reloaded
+    only when the hash differs from the one already in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._model = None
+        self._stamp = None
+        self._digest = None
+        self._derived = {}
+        self.loads = 0
+        self.hits = 0
+        self.load_seconds = 0.0
+        self.size_bytes = 0
+        self.loaded_at = None
+
+    def _stat_stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    def get(self):
+        stamp = self._stat_stamp()
+        with self._lock:
+            if self._model is not None and stamp == self._stamp:
+                self.hits += 1
+                return self._model
+
+            digest = file_sha256(self.path)
+            if self._model is not None and digest == self._digest:
+                # touched but unchanged — keep the object we already have
+                self._stamp = stamp
+                self.hits += 1
+                return self._model
+
+            start = time.perf_counter()
+            model = _load(self.path)
+            self.load_seconds = time.perf_counter() - start
+
+            self._model = model
+            self._stamp = stamp
+            self._digest = digest
+            self._derived = {}
+            self.loads += 1
+            self.size_bytes = _model_nbytes(model) or stamp[1]
+            self.loaded_at = time.time()
+            return model
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def derived(self, key, build):
+        """
+        Memoise build(model) for the currently loaded model; dropped on reload.
+        """
+        model = self.get()
+        with self._lock:
+            if key not in self._derived:
+                self._derived[key] = build(model)
+            return self._derived[key]
+
+    def stats(self):
+        return {
+            'path': self.path,
+            'sha256': self._digest,
+            'loads': self.loads,
+            'hits': self.hits,
+            'load_seconds': self.load_seconds,
+            'size_bytes': self.size_bytes,
+            'loaded_at': self.loaded_at,
+        }
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_cache(path=None):
+    path = os.path.abspath(path or default_model_path())
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = ModelCache(path)
+        return cache
+
+
+def get_model(path=None):
+    return get_cache(path).get()
@@ -0,0 +1,374 @@
+"""
+Local registry of candidate models with their measured accuracy and latency,
+and selection of the most accurate one that fits a latency budget.
+
+    registry/index.json                 one entry per candidate
+    registry/<name>-<sha12>.pkl|.npz    content-addressed copy of each artifact
+
+Latency is measured on the predictor the app would actually serve (the
+compiled FlatForest when the model compiles, the model itself otherwise):
+p50/p99 of single-row predicts and of --batch-size batches. Accuracy is
+MAE / RMSE / R² on the notebook's held-out split of a CoinGecko snapshot.
+Latencies are machine-specific, so `measure` re-times every entry on the
+serving host before budgets are relied on.
+
+The app and scoring service choose through model_cache.default_model_path()
+when the registry is configured:
+
+    CRYPTO_LIQUIDITY_REGISTRY=registry CRYPTO_LIQUIDITY_LATENCY_BUDGET_MS=1.5 streamlit run final.py
+    python scoring_service.py --registry registry --latency-budget-ms 1.5
+
+    python model_registry.py train coin_gecko_2022-03-17.csv    # RF variants, + XGBoost if installed
+    python model_registry.py register model.compact.npz --name rf-compact --data coin_gecko_2022-03-17.csv
+    python model_registry.py measure --data coin_gecko_2022-03-17.csv
+    python model_registry.py list
+    python model_registry.py select --budget-ms 1.5
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+
+import model_cache
+
+INDEX = 'index.json'
+DEFAULT_REGISTRY = 'registry'
+REGISTRY_ENV_VAR = 'CRYPTO_LIQUIDITY_REGISTRY'
+BUDGET_ENV_VAR = 'CRYPTO_LIQUIDITY_LATENCY_BUDGET_MS'
+DEFAULT_BATCH_SIZE = 256
+# lower is better for the error metrics, higher for R²
+METRIC_SIGN = {'MAE': 1, 'RMSE': 1, 'R2': -1}
+# register()'s default source: the artifact path itself
+_UNSET = object()
+
+
+def read_index(root):
+    try:
+        with open(os.path.join(root, INDEX)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {'models': []}
+
+
+def _write_index(root, index):
+    path = os.path.join(root, INDEX)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as fh:
+        json.dump(index, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def entry_path(root, entry):
+    return os.path.join(root, entry['file'])
+
+
+def serving_predictor(model):
+    """
+    What the app predicts with: the FlatForest form when the model compiles.
+    """
+    from forest_engine import compile_model
+
+    try:
+        return compile_model(model)
+    except TypeError:
+        return model
+
+
+def _percentiles_ms(timings):
+    p50, p99 = np.percentile(np.asarray(timings) * 1e3, (50, 99))
+    return {'p50_ms': float(p50), 'p99_ms': float(p99)}
+
+
+def measure_latency(model, rows, single_runs=300, batch_size=DEFAULT_BATCH_SIZE, batch_runs=30):
+    """
+    p50/p99 of the served predictor on single rows and on batches drawn
+    from rows, after a short warm-up.
+    """
+    predictor = serving_predictor(model)
+    rows = np.ascontiguousarray(rows, dtype=np.float64)
+    rng = np.random.default_rng(0)
+    for i in range(10):
+        predictor.predict(rows[i % len(rows)][None, :])
+
+    single = []
+    for i in rng.integers(0, len(rows), single_runs):
+        row = rows[i][None, :]
+        start = time.perf_counter()
+        predictor.predict(row)
+        single.append(time.perf_counter() - start)
+
+    batch = []
+    for _ in range(batch_runs):
+        X = rows[rng.integers(0, len(rows), batch_size)]
+        start = time.perf_counter()
+        predictor.predict(X)
+        batch.append(time.perf_counter() - start)
+
+    return {
+        'predictor': type(predictor).__name__,
+        'single': _percentiles_ms(single),
+        'batch': dict(_percentiles_ms(batch), size=batch_size),
+        'host': platform.node(),
+        'measured': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+    }
+
+
+def load_split(data, cache_dir=None):
+    """
+    (X_train, X_test, y_train, y_test) arrays from the notebook's split of a snapshot CSV.
+    """
+    from train import DEFAULT_CACHE_DIR, load_prepared
+    from training_data import split
+
+    frame, _ = load_prepared(data, DEFAULT_CACHE_DIR if cache_dir is None else cache_dir)
+    return tuple(part.to_numpy(np.float64) for part in split(frame))
+
+
+def _latency_rows(model, split):
+    if split is not None:
+        return split[1]
+    from export_model import _synthetic_rows
+
+    return _synthetic_rows(model.n_features_in_ if hasattr(model, 'n_features_in_') else model.n_features)
+
+
+def _assess(model, split, batch_size):
+    from training_data import regression_metrics
+
+    result = {'latency': measure_latency(model, _latency_rows(model, split), batch_size=batch_size)}
+    if split is not None:
+        result['accuracy'] = dict(regression_metrics(split[3], model.predict(split[1])), rows=len(split[3]))
+    return result
+
+
+def register(root, path, name=None, split=None, batch_size=DEFAULT_BATCH_SIZE, metadata=None,
+             source=_UNSET):
+    """
+    Copy the artifact at path into the registry, measure it and record (or
+    replace) the entry called name. Returns the entry.
+
+    source is stored as the entry's 'source', where the artifact came from:
+    by default the absolute path; pass a description (or None) when path is
+    only a temporary file.
+    """
+    os.makedirs(root, exist_ok=True)
+    sha = model_cache.file_sha256(path)
+    ext = os.path.splitext(path)[1] or '.pkl'
+    name = name or os.path.splitext(os.path.basename(path))[0]
+    filename = f"{name}-{sha[:12]}{ext}"
+    dest = os.path.join(root, filename)
+    if not os.path.exists(dest):
+        tmp = f"{dest}.tmp-{os.getpid()}"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)
+
+    from feature_pipeline import FeaturePipeline
+
+    model = model_cache.get_model(dest)
+    estimator = model.estimator if isinstance(model, FeaturePipeline) else model
+    entry = {
+        'name': name,
+        'file': filename,
+        'sha256': sha,
+        'kind': type(estimator).__name__,
+        'n_features': int(getattr(model, 'n_features_in_', getattr(model, 'n_features', 0))),
+        'features': list(model.features) if hasattr(model, 'features') else None,
+        'bytes': os.path.getsize(dest),
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'source': os.path.abspath(path) if source is _UNSET else source,
+        'metadata': metadata or {},
+        **_assess(model, split, batch_size),
+    }
+    index = read_index(root)
+    index['models'] = [e for e in index['models'] if e['name'] != name] + [entry]
+    _write_index(root, index)
+    return entry
+
+
+def measure(root, split=None, names=None, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Re-time (and, with a split, re-score) registered entries on this machine.
+    """
+    index = read_index(root)
+    for entry in index['models']:
+        if names and entry['name'] not in names:
+            continue
+        entry.update(_assess(model_cache.get_model(entry_path(root, entry)), split, batch_size))
+    _write_index(root, index)
+    return index['models']
+
+
+def _schema_ok(entry, features):
+    if features is None:
+        return True
+    if entry.get('features') is not None:
+        return tuple(entry['features']) == tuple(features)
+    return entry.get('n_features') == len(features)
+
+
+def select(root, budget_ms=None, features=None, metric='MAE', batch_budget_ms=None):
+    """
+    The most accurate entry (by metric) whose single-row p99 is within
+    budget_ms and, if given, whose batch p99 is within batch_budget_ms.
+    Entries without accuracy rank after those with it; ties go to the
+    faster one. None if nothing fits.
+    """
+    sign = METRIC_SIGN[metric]
+    fits = []
+    for entry in read_index(root)['models']:
+        latency = entry.get('latency')
+        if not latency or not _schema_ok(entry, features):
+            continue
+        if budget_ms is not None and latency['single']['p99_ms'] > budget_ms:
+            continue
+        if batch_budget_ms is not None and latency['batch']['p99_ms'] > batch_budget_ms:
+            continue
+        fits.append(entry)
+
+    def rank(entry):
+        score = entry.get('accuracy', {}).get(metric)
+        return (score is None, sign * score if score is not None else 0.0,
+                entry['latency']['single']['p99_ms'])
+
+    return min(fits, key=rank, default=None)
+
+
+_resolved = {}
+_resolved_lock = threading.Lock()
+
+
+def resolve(root=None, budget_ms=None, features=None):
+    """
+    Path of the selected model, with root and budget defaulting to the
+    environment. Cached until index.json changes, so it is cheap to call on
+    every app rerun. None if the registry has no entry that fits.
+    """
+    root = root or os.environ.get(REGISTRY_ENV_VAR) or DEFAULT_REGISTRY
+    if budget_ms is None and os.environ.get(BUDGET_ENV_VAR):
+        budget_ms = float(os.environ[BUDGET_ENV_VAR])
+    if features is None:
+        from liquidity import FEATURE_COLUMNS
+        features = FEATURE_COLUMNS
+    try:
+        mtime = os.stat(os.path.join(root, INDEX)).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    key = (os.path.abspath(root), budget_ms, tuple(features))
+    with _resolved_lock:
+        cached = _resolved.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    entry = select(root, budget_ms, features)
+    path = entry_path(root, entry) if entry else None
+    with _resolved_lock:
+        _resolved[key] = (mtime, path)
+    return path
+
+
+def train_candidates(root, split, random_state=42, batch_size=DEFAULT_BATCH_SIZE, data=None):
+    """
+    Fit the notebook's two model families (plus a depth-capped forest that
+    trades accuracy for latency) on the training split and register each.
+    XGBoost is skipped when it isn't installed. Entries record
+    '<data>#<name>' as their source, or None without a data path.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+
+    X_train, _, y_train, _ = split
+    candidates = {
+        'rf': RandomForestRegressor(n_estimators=100, random_state=random_state, n_jobs=-1),
+        'rf-depth12': RandomForestRegressor(n_estimators=50, max_depth=12, random_state=random_state, n_jobs=-1),
+    }
+    try:
+        from xgboost import XGBRegressor
+
+        candidates['xgb'] = XGBRegressor(n_estimators=100, learning_rate=0.1, random_state=random_state)
+    except ImportError:
+        print("  xgboost not installed; skipping the XGBoost candidate", file=sys.stderr)
+
+    entries = []
+    for name, model in candidates.items():
+        start = time.perf_counter()
+        model.fit(X_train, y_train)
+        fit_s = time.perf_counter() - start
+        model.set_params(n_jobs=1 if name == 'xgb' else None)  # serving is one row at a time
+        path = os.path.join(root, f".{name}.tmp-{os.getpid()}.pkl")
+        model_cache.atomic_dump(model, path)
+        try:
+            entries.append(register(root, path, name, split, batch_size,
+                                    {'params': model.get_params(), 'fit_s': fit_s},
+                                    source=f"{os.path.abspath(data)}#{name}" if data else None))
+        finally:
+            os.remove(path)
+    return entries
+
+
+def _print_entries(entries):
+    print(f"{'name':<16} {'kind':<22} {'MAE':>9} {'R2':>8} {'1-row p50':>10} {'p99':>9} "
+          f"{'batch p99':>10} {'MB':>7}")
+    for e in entries:
+        acc, lat = e.get('accuracy', {}), e['latency']
+        print(f"{e['name']:<16} {e['kind']:<22} {acc.get('MAE', float('nan')):>9.4f} "
+              f"{acc.get('R2', float('nan')):>8.4f} {lat['single']['p50_ms']:>8.3f}ms "
+              f"{lat['single']['p99_ms']:>7.3f}ms {lat['batch']['p99_ms']:>8.3f}ms {e['bytes'] / 1e6:>7.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Model registry with latency-budget selection.")
+    parser.add_argument('--registry', default=os.environ.get(REGISTRY_ENV_VAR, DEFAULT_REGISTRY))
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_train = sub.add_parser('train', help="fit and register RandomForest (and XGBoost) candidates")
+    p_train.add_argument('data', help="CoinGecko snapshot CSV")
+
+    p_register = sub.add_parser('register', help="add an existing artifact")
+    p_register.add_argument('path')
+    p_register.add_argument('--name', default=None)
+    p_register.add_argument('--data', default=None, help="snapshot CSV for held-out accuracy")
+
+    p_measure = sub.add_parser('measure', help="re-time every entry on this machine")
+    p_measure.add_argument('--data', default=None, help="also re-score accuracy on this snapshot")
+    p_measure.add_argument('names', nargs='*')
+
+    sub.add_parser('list')
+
+    p_select = sub.add_parser('select', help="print the model chosen for a budget")
+    p_select.add_argument('--budget-ms', type=float, default=None, help="single-row p99 budget")
+    p_select.add_argument('--batch-budget-ms', type=float, default=None)
+    p_select.add_argument('--metric', choices=sorted(METRIC_SIGN), default='MAE')
+    args = parser.parse_args(argv)
+
+    import warnings
+    warnings.simplefilter('ignore')
+
+    root = args.registry
+    if args.command == 'train':
+        _print_entries(train_candidates(root, load_split(args.data), batch_size=args.batch_size,
+                                        data=args.data))
+    elif args.command == 'register':
+        split = load_split(args.data) if args.data else None
+        _print_entries([register(root, args.path, args.name, split, args.batch_size)])
+    elif args.command == 'measure':
+        split = load_split(args.data) if args.data else None
+        _print_entries(measure(root, split, args.names, args.batch_size))
+    elif args.command == 'list':
+        _print_entries(read_index(root)['models'])
+    else:
+        from liquidity import FEATURE_COLUMNS
+
+        entry = select(root, args.budget_ms, FEATURE_COLUMNS, args.metric, args.batch_budget_ms)
+        if entry is None:
+            raise SystemExit("no registered model fits that budget")
+        _print_entries([entry])
+        print(entry_path(root, entry))
+
+
+if __name__ == '__main__':
+    main()
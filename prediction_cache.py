@@ -0,0 +1,101 @@
+"""
+Bounded LRU cache of model outputs keyed on the feature vector.
+
+Streamlit reruns the script on every interaction, so the same 10-feature
+row (demo presets, repeated coin lookups, re-clicks) is predicted again and
+again. PredictionCache maps the row, rounded to a fixed number of
+significant digits, to the raw model score; the app stores the score
+together with its per-tree interval bounds. n_values is the number of
+floats kept per entry and sizes each entry for the byte budget. Entries
+are capped by count, derived from that budget, and evicted
+least-recently-used. It is thread-safe so one instance can serve every
+session in the process.
+"""
+import sys
+import threading
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 4 * 1024 * 1024
+DEFAULT_SIG_DIGITS = 10
+
+# OrderedDict keeps a linked-list node plus a hash-table slot per entry.
+_ENTRY_OVERHEAD = 100
+
+
+def _entry_bytes(n_features, n_values=1):
+    key = tuple(float(i) + 0.5 for i in range(n_features))
+    value = 0.5 if n_values == 1 else (0.5, (0.5,) * (n_values - 1))
+    return sys.getsizeof(key) + sum(sys.getsizeof(v) for v in key) + _value_bytes(value) + _ENTRY_OVERHEAD
+
+
+def _value_bytes(value):
+    if isinstance(value, tuple):
+        return sys.getsizeof(value) + sum(_value_bytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class PredictionCache:
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, n_features=10, sig_digits=DEFAULT_SIG_DIGITS, n_values=1):
+        self.sig_digits = sig_digits
+        self.entry_bytes = _entry_bytes(n_features, n_values)
+        self.max_entries = max(1, max_bytes // self.entry_bytes)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, features):
+        """
+        Hashable key: each feature rounded to sig_digits significant digits.
+        """
+        fmt = f".{self.sig_digits}g"
+        return tuple(float(format(float(v), fmt)) for v in features)
+
+    def get(self, features):
+        key = self.key(features)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, features, value):
+        key = self.key(features)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, features, compute):
+        """
+        Cached value for features, or compute() (stored before returning).
+        """
+        value = self.get(features)
+        if value is None:
+            value = compute()
+            self.put(features, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'approx_bytes': len(self._entries) * self.entry_bytes,
+                'max_bytes': self.max_entries * self.entry_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
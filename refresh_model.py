@@ -0,0 +1,262 @@
+"""
+Incremental model refresh: grow a few trees on the newest data instead of
+retraining the whole forest.
+
+    python refresh_model.py new_snapshot.csv --add-trees 20 --max-trees 100
+
+The serving model is loaded and warm-started: --add-trees new trees are
+fitted on the newest rows only (optionally just the last --window-days by
+date). The oldest trees are then aged out so the forest stays at
+--max-trees. The result is evaluated against the current model on the new
+data's held-out split. The new trees' seed is drawn per refresh unless
+--seed is given, and is recorded with the version so it can be rebuilt.
+
+Each refresh is written as a numbered version under --versions-dir
+(<name>.v0001.pkl, with a .metrics.json) and recorded in versions.json.
+It is then promoted by atomically swapping it over the serving path,
+which model_cache picks up on the next request. --rollback N re-promotes
+an earlier version; the model served before the first refresh is kept
+as version 0.
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import shutil
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import model_cache
+from train import DEFAULT_CACHE_DIR, StageTimer, load_prepared, metrics_path_for
+from training_data import MODEL_FEATURES, TARGET, regression_metrics, split
+
+MANIFEST = 'versions.json'
+
+
+def default_versions_dir(serving_path):
+    return os.path.join(os.path.dirname(os.path.abspath(serving_path)), 'versions')
+
+
+def _version_path(versions_dir, serving_path, version):
+    stem = os.path.splitext(os.path.basename(serving_path))[0]
+    return os.path.join(versions_dir, f"{stem}.v{version:04d}.pkl")
+
+
+def read_manifest(versions_dir):
+    try:
+        with open(os.path.join(versions_dir, MANIFEST)) as fh:
+            return json.load(fh)
+    except FileNotFoundError:
+        return {'current': None, 'versions': []}
+
+
+def _write_manifest(versions_dir, manifest):
+    path = os.path.join(versions_dir, MANIFEST)
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, 'w') as fh:
+        json.dump(manifest, fh, indent=2, default=str)
+    os.replace(tmp, path)
+
+
+def _next_version(versions_dir, serving_path, manifest):
+    stem = re.escape(os.path.splitext(os.path.basename(serving_path))[0])
+    on_disk = [int(m.group(1)) for p in glob.glob(os.path.join(versions_dir, '*.pkl'))
+               if (m := re.fullmatch(rf"{stem}\.v(\d+)\.pkl", os.path.basename(p)))]
+    recorded = [v['version'] for v in manifest['versions']]
+    return max(on_disk + recorded, default=0) + 1
+
+
+def promote(version_path, serving_path):
+    """
+    Atomically make serving_path the given version: hard-link (or copy) it
+    next to the target, then rename over it.
+    """
+    tmp = f"{serving_path}.tmp-{os.getpid()}"
+    try:
+        os.link(version_path, tmp)
+    except OSError:
+        shutil.copyfile(version_path, tmp)
+    os.replace(tmp, serving_path)
+
+
+def recent_rows(frame, window_days=None):
+    """
+    Rows from the last window_days of the frame's date range (all rows if None).
+    """
+    if not window_days or 'date' not in frame:
+        return frame
+    dates = pd.to_datetime(frame['date'], errors='coerce')
+    cutoff = dates.max() - pd.Timedelta(days=window_days)
+    return frame[dates >= cutoff].reset_index(drop=True)
+
+
+def check_refreshable(model):
+    """
+    TypeError unless model is a fitted sklearn forest that can be warm-started.
+    """
+    if not hasattr(model, 'estimators_') or 'warm_start' not in getattr(model, 'get_params', dict)():
+        raise TypeError(f"{type(model).__name__} can't be warm-started; retrain with train.py instead")
+
+
+def refresh_forest(model, X, y, add_trees, max_trees=None, seed=None):
+    """
+    Warm-start add_trees trees fitted on (X, y), then drop the oldest so at
+    most max_trees remain. Returns (model, trees_dropped); model is updated
+    in place.
+    """
+    check_refreshable(model)
+    if X.shape[1] != model.n_features_in_:
+        raise ValueError(f"model expects {model.n_features_in_} features, data has {X.shape[1]}")
+
+    # A fresh seed per refresh: sklearn derives new trees' seeds from
+    # random_state *after* skipping len(estimators_) draws, which would repeat
+    # seeds once trees have been aged out.
+    params = {'warm_start': True, 'n_estimators': len(model.estimators_) + add_trees}
+    if seed is not None:
+        params['random_state'] = seed
+    model.set_params(**params)
+    model.fit(X, y)
+
+    dropped = 0
+    if max_trees and len(model.estimators_) > max_trees:
+        dropped = len(model.estimators_) - max_trees
+        model.estimators_ = model.estimators_[dropped:]
+    model.set_params(warm_start=False, n_estimators=len(model.estimators_), n_jobs=None)
+    return model, dropped
+
+
+def rollback(serving_path, versions_dir, version):
+    manifest = read_manifest(versions_dir)
+    entry = next((v for v in manifest['versions'] if v['version'] == version), None)
+    if entry is None or not os.path.exists(entry['path']):
+        raise SystemExit(f"version {version} not found in {versions_dir}")
+    promote(entry['path'], serving_path)
+    manifest['current'] = version
+    _write_manifest(versions_dir, manifest)
+    print(f"Serving version {version}: {entry['path']}", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Add trees trained on new data to the serving forest.")
+    parser.add_argument('data', nargs='?', help="newest snapshot CSV")
+    parser.add_argument('--model', default=None, help="serving model path (default: the app's model)")
+    parser.add_argument('--versions-dir', default=None, help="default: versions/ next to --model")
+    parser.add_argument('--add-trees', type=int, default=20)
+    parser.add_argument('--max-trees', type=int, default=None,
+                        help="age out the oldest trees beyond this (default: current tree count)")
+    parser.add_argument('--window-days', type=float, default=None, help="fit on the last N days of data only")
+    parser.add_argument('--seed', type=int, default=None,
+                        help="random_state for the new trees (default: a fresh draw, recorded in the version)")
+    parser.add_argument('--n-jobs', type=int, default=-1)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="'' disables the Parquet cache")
+    parser.add_argument('--require-improvement', action='store_true',
+                        help="keep the current model unless the refresh lowers held-out MAE")
+    parser.add_argument('--no-promote', action='store_true', help="write the version but don't serve it")
+    parser.add_argument('--rollback', type=int, default=None, metavar='VERSION',
+                        help="serve an earlier version instead of refreshing")
+    args = parser.parse_args(argv)
+
+    serving_path = os.path.abspath(args.model or model_cache.default_model_path())
+    versions_dir = args.versions_dir or default_versions_dir(serving_path)
+    os.makedirs(versions_dir, exist_ok=True)
+    if args.rollback is not None:
+        return rollback(serving_path, versions_dir, args.rollback)
+    if not args.data:
+        parser.error("data is required unless --rollback is given")
+
+    timer = StageTimer()
+    total_start = time.perf_counter()
+    print("Refreshing…", file=sys.stderr)
+
+    frame, cache_hit = load_prepared(args.data, args.cache_dir, timer=timer)
+    frame = recent_rows(frame, args.window_days)
+    if len(frame) < 10:
+        raise SystemExit(f"only {len(frame)} usable rows in {args.data}; nothing to refresh on")
+    X_train, X_test, y_train, y_test = split(frame)
+    X_train, X_test = X_train.to_numpy(), X_test.to_numpy()
+
+    with timer('load'):
+        parent_sha = model_cache.file_sha256(serving_path)
+        if serving_path.endswith('.npz'):
+            raise SystemExit(f"{serving_path} is a compiled forest and can't be refreshed; "
+                             "refresh the sklearn pickle and re-export it")
+        model = joblib.load(serving_path)
+        try:
+            check_refreshable(model)
+        except TypeError as e:
+            raise SystemExit(f"{serving_path}: {e}")
+        before = regression_metrics(y_test, model.predict(X_test))
+        trees_before = len(model.estimators_)
+
+    manifest = read_manifest(versions_dir)
+    if not manifest['versions']:
+        # keep the pre-refresh model as version 0 so it can be rolled back to
+        baseline_path = _version_path(versions_dir, serving_path, 0)
+        shutil.copyfile(serving_path, baseline_path)
+        manifest['versions'].append({'version': 0, 'path': baseline_path, 'sha256': parent_sha,
+                                     'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                                     'trees': {'after': trees_before}, 'metrics': before})
+        manifest['current'] = 0
+    version = _next_version(versions_dir, serving_path, manifest)
+    seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % (2 ** 31))
+    with timer('fit'):
+        model.set_params(n_jobs=args.n_jobs)
+        try:
+            model, dropped = refresh_forest(model, X_train, y_train.to_numpy(), args.add_trees,
+                                            args.max_trees or trees_before, seed=seed)
+        except (TypeError, ValueError) as e:
+            raise SystemExit(f"can't refresh {serving_path}: {e}")
+    with timer('evaluate'):
+        after = regression_metrics(y_test, model.predict(X_test))
+
+    version_path = _version_path(versions_dir, serving_path, version)
+    with timer('save'):
+        model_cache.atomic_dump(model, version_path)
+
+    improved = after['MAE'] <= before['MAE']
+    promoted = not args.no_promote and (improved or not args.require_improvement)
+    if promoted:
+        promote(version_path, serving_path)
+
+    entry = {
+        'version': version,
+        'path': version_path,
+        'sha256': model_cache.file_sha256(version_path),
+        'parent_sha256': parent_sha,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'data': os.path.abspath(args.data),
+        'window_days': args.window_days,
+        'rows': {'train': len(X_train), 'test': len(X_test)},
+        'features': MODEL_FEATURES,
+        'target': TARGET,
+        'trees': {'before': trees_before, 'added': args.add_trees, 'dropped': dropped,
+                  'after': len(model.estimators_)},
+        'seed': seed,
+        'metrics_before': before,
+        'metrics': after,
+        'promoted': promoted,
+        'cache_hit': cache_hit,
+        'timings_s': dict(timer.timings, total=time.perf_counter() - total_start),
+    }
+    with open(metrics_path_for(version_path), 'w') as fh:
+        json.dump(entry, fh, indent=2, default=str)
+    manifest['versions'].append(entry)
+    if promoted:
+        manifest['current'] = version
+    _write_manifest(versions_dir, manifest)
+
+    print(f"MAE {before['MAE']:.4f} -> {after['MAE']:.4f} | R² {before['R2']:.4f} -> {after['R2']:.4f} "
+          f"| trees +{args.add_trees} -{dropped} = {len(model.estimators_)}", file=sys.stderr)
+    print(f"Version {version}: {version_path}", file=sys.stderr)
+    print(f"Serving: {serving_path}" if promoted else
+          "Not promoted (" + ("--no-promote" if args.no_promote else "held-out MAE got worse") + ")",
+          file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+Headless HTTP scoring service.
+
+Serves the same model and the same feature/post-processing code as the
+Streamlit app over plain HTTP (standard library only):
+
+    POST /predict   {"open": .., "high": .., "low": .., "close": .., "volume": ..}
+                    or {"candles": [{...}, ...]}
+    GET  /metrics   throughput, latency percentiles, batch sizes
+    GET  /drift     scored inputs vs the model's training summary (drift_monitor.py)
+    GET  /health
+
+Concurrent single-candle requests are coalesced by a MicroBatcher: the
+worker thread waits at most --max-wait-ms for up to --max-batch candles,
+then scores them with one predict call.
+
+    python scoring_service.py --port 8600
+    python scoring_service.py --load-test --concurrency 32 --requests 5000
+"""
+import argparse
+import json
+import queue
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+import model_cache
+from drift_monitor import get_monitor
+from feature_pipeline import check_schema
+from forest_engine import compile_model
+from liquidity import (
+    FEATURE_COLUMNS, build_feature_matrix, normalize_score_array, liquidity_level_array, predict_trend_array,
+)
+
+CANDLE_FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+
+class _ScoringServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # socketserver's default listen backlog of 5 resets connections under bursts
+    request_queue_size = 128
+
+
+def _percentiles(samples, qs=(50, 95, 99)):
+    if not samples:
+        return {f'p{q}': None for q in qs}
+    values = np.percentile(np.fromiter(samples, dtype=np.float64), qs)
+    return {f'p{q}': float(v) for q, v in zip(qs, values)}
+
+
+def score_candles(candles, model_path=None):
+    """
+    Score a (n, 5) OHLCV array with the cached model; returns one dict per row.
+    """
+    cache = model_cache.get_cache(model_path)
+    try:
+        predictor = cache.derived('flat_forest', compile_model)
+    except TypeError:
+        predictor = cache.get()
+
+    open_p, high_p, low_p, close_p, volume = candles.T
+    X = build_feature_matrix(open_p, high_p, low_p, close_p, volume)
+    raw_score = predictor.predict(X)
+    monitor = get_monitor(cache)
+    if monitor is not None:
+        monitor.update(X)
+    score = normalize_score_array(raw_score, volume, X[:, 5])
+    level = liquidity_level_array(score)
+    trend = predict_trend_array(open_p, close_p, volume)
+    return [
+        {'raw_score': float(r), 'liquidity_score': float(s), 'liquidity_level': str(lv), 'trend': str(t)}
+        for r, s, lv, t in zip(raw_score, score, level, trend)
+    ]
+
+
+class MicroBatcher:
+    """
+    Collects candles submitted from many threads and scores them in batches.
+    """
+
+    def __init__(self, max_batch=64, max_wait_ms=2.0, model_path=None, window=10_000):
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.model_path = model_path
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=window)
+        self._batch_sizes = deque(maxlen=window)
+        self._started = time.monotonic()
+        self.requests = 0
+        self.batches = 0
+        self.errors = 0
+        self._thread = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, candle):
+        """
+        Queue one (open, high, low, close, volume) tuple; returns a Future.
+        """
+        future = Future()
+        self._queue.put((candle, future, time.perf_counter()))
+        return future
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                             else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            candles = np.array([item[0] for item in batch], dtype=np.float64)
+            try:
+                results = score_candles(candles, self.model_path)
+            except Exception as e:
+                with self._lock:
+                    self.errors += len(batch)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            done = time.perf_counter()
+            for (_, future, queued), result in zip(batch, results):
+                future.set_result(result)
+            with self._lock:
+                self.requests += len(batch)
+                self.batches += 1
+                self._batch_sizes.append(len(batch))
+                self._latencies_ms.extend((done - queued) * 1000 for _, _, queued in batch)
+
+    def metrics(self):
+        with self._lock:
+            uptime = time.monotonic() - self._started
+            sizes = list(self._batch_sizes)
+            return {
+                'uptime_s': uptime,
+                'requests': self.requests,
+                'batches': self.batches,
+                'errors': self.errors,
+                'queue_depth': self._queue.qsize(),
+                'throughput_rps': self.requests / uptime if uptime else 0.0,
+                'mean_batch_size': float(np.mean(sizes)) if sizes else 0.0,
+                'max_batch_size': max(sizes) if sizes else 0,
+                'latency_ms': _percentiles(self._latencies_ms),
+                'model': model_cache.get_cache(self.model_path).stats(),
+            }
+
+
+def _parse_candle(payload):
+    try:
+        candle = tuple(float(payload[f]) for f in CANDLE_FIELDS)
+    except KeyError as e:
+        raise ValueError(f"missing field {e.args[0]!r}")
+    except (TypeError, ValueError):
+        raise ValueError(f"fields {', '.join(CANDLE_FIELDS)} must be numbers")
+    if not all(np.isfinite(candle)):
+        raise ValueError("fields must be finite numbers")
+    return candle
+
+
+def make_handler(batcher, request_timeout=10.0):
+    class ScoringHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _send(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            if self.path == '/metrics':
+                self._send(200, batcher.metrics())
+            elif self.path == '/drift':
+                monitor = get_monitor(model_cache.get_cache(batcher.model_path))
+                if monitor is None:
+                    self._send(404, {'error': 'no training summary for this model'})
+                else:
+                    self._send(200, monitor.report(FEATURE_COLUMNS))
+            elif self.path == '/health':
+                self._send(200, {'status': 'ok'})
+            else:
+                self._send(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send(404, {'error': 'not found'})
+                return
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length) or b'{}')
+                many = isinstance(payload, dict) and 'candles' in payload
+                candles = [_parse_candle(c) for c in payload['candles']] if many else [_parse_candle(payload)]
+            except (ValueError, TypeError, AttributeError) as e:
+                self._send(400, {'error': str(e)})
+                return
+
+            try:
+                results = [f.result(request_timeout) for f in [batcher.submit(c) for c in candles]]
+            except Exception as e:
+                self._send(500, {'error': f"prediction failed: {e}"})
+                return
+            self._send(200, {'predictions': results} if many else results[0])
+
+        def log_message(self, format, *args):
+            pass
+
+    return ScoringHandler
+
+
+def serve(host='127.0.0.1', port=8600, max_batch=64, max_wait_ms=2.0, model_path=None):
+    """
+    Build (but don't start) the HTTP server; returns (server, batcher).
+    """
+    # load and check the feature schema once up front, not on the first request
+    check_schema(model_cache.get_model(model_path), FEATURE_COLUMNS)
+    batcher = MicroBatcher(max_batch, max_wait_ms, model_path)
+    server = _ScoringServer((host, port), make_handler(batcher))
+    return server, batcher
+
+
+def load_test(url, concurrency=32, total=5000, seed=0):
+    """
+    Fire total single-candle requests from concurrency client threads at url.
+    """
+    import http.client
+    from urllib.parse import urlsplit
+
+    target = urlsplit(url)
+    rng = np.random.default_rng(seed)
+    open_p = rng.lognormal(3, 2, total)
+    close_p = open_p * rng.uniform(0.95, 1.05, total)
+    bodies = [json.dumps({'open': o, 'high': max(o, c) * 1.01, 'low': min(o, c) * 0.99,
+                          'close': c, 'volume': v}).encode()
+              for o, c, v in zip(open_p, close_p, rng.lognormal(12, 2, total))]
+
+    latencies, failures = [], []
+    lock = threading.Lock()
+    counter = iter(range(total))
+
+    def client():
+        conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+        local, bad = [], 0
+        for i in counter:
+            start = time.perf_counter()
+            try:
+                conn.request('POST', '/predict', bodies[i], {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                # a reset or timeout counts as a failed request; start a fresh connection
+                conn.close()
+                conn = http.client.HTTPConnection(target.hostname, target.port, timeout=30)
+                ok = False
+            local.append((time.perf_counter() - start) * 1000)
+            bad += not ok
+        conn.close()
+        with lock:
+            latencies.extend(local)
+            failures.append(bad)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    return {
+        'requests': len(latencies),
+        'failures': sum(failures),
+        'concurrency': concurrency,
+        'elapsed_s': elapsed,
+        'throughput_rps': len(latencies) / elapsed,
+        'latency_ms': _percentiles(latencies),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP scoring service with request micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--model', default=None, help="model pickle or .npz (default: bundled model)")
+    parser.add_argument('--registry', default=None,
+                        help="pick the model from this model_registry directory instead of --model")
+    parser.add_argument('--latency-budget-ms', type=float, default=None,
+                        help="with --registry: single-row p99 budget the chosen model must meet")
+    parser.add_argument('--max-batch', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0)
+    parser.add_argument('--load-test', action='store_true',
+                        help="start the service on a free local port and load-test it")
+    parser.add_argument('--url', default=None, help="load-test an already running service instead")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    args = parser.parse_args(argv)
+
+    if args.registry:
+        from model_registry import resolve
+
+        args.model = resolve(args.registry, args.latency_budget_ms)
+        if args.model is None:
+            raise SystemExit(f"no model in {args.registry} fits a {args.latency_budget_ms} ms budget")
+        print(f"Serving {args.model}", file=sys.stderr)
+
+    if args.load_test or args.url:
+        server = None
+        url = args.url
+        if not url:
+            server, batcher = serve(args.host, 0, args.max_batch, args.max_wait_ms, args.model)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            url = f"http://{args.host}:{server.server_address[1]}"
+        client = load_test(url, args.concurrency, args.requests)
+        print(json.dumps({'client': client,
+                          'server': batcher.metrics() if server else None}, indent=2))
+        if server:
+            server.shutdown()
+        return
+
+    server, _ = serve(args.host, args.port, args.max_batch, args.max_wait_ms, args.model)
+    print(f"Scoring service on http://{args.host}:{server.server_address[1]}  (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
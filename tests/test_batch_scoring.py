@@ -0,0 +1,24 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+pd = pytest.importorskip('pandas')
+
+from batch_scoring import score_frame
+
+
+class ConstantModel:
+    def predict(self, X):
+        return np.full(len(X), 0.5)
+
+
+def test_non_numeric_row_gets_nan_score():
+    frame = pd.DataFrame({
+        'Open': ['x', 100.0], 'High': [105.0, 105.0], 'Low': [95.0, 95.0],
+        'Close': [102.0, 102.0], 'Volume': [1e6, 1e6],
+    })
+    out = score_frame(ConstantModel(), frame)
+    assert np.isnan(out['raw_score'].iloc[0])
+    assert np.isnan(out['liquidity_score'].iloc[0])
+    assert out['liquidity_level'].iloc[0] == ''
+    assert np.isfinite(out['liquidity_score'].iloc[1])
+    assert out['liquidity_level'].iloc[1] != ''
@@ -0,0 +1,107 @@
+import warnings
+
+import pytest
+
+np = pytest.importorskip('numpy')
+pytest.importorskip('sklearn')
+pytest.importorskip('joblib')
+
+import model_cache
+from forest_engine import FlatForest, _float32_floor
+from liquidity import build_feature_matrix
+
+
+@pytest.fixture(scope='module')
+def models():
+    model = model_cache.get_model()
+    return model, FlatForest.from_sklearn(model)
+
+
+def _sklearn_predict(model, X):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')  # fitted on a DataFrame, fed an array
+        return model.predict(X)
+
+
+def test_parity_on_random_rows(models):
+    model, flat = models
+    rng = np.random.default_rng(0)
+    n = 5_000
+    open_p = rng.lognormal(0, 4, n)
+    close_p = open_p * rng.uniform(0.9, 1.1, n)
+    high_p = np.maximum(open_p, close_p) * rng.uniform(1.0, 1.05, n)
+    low_p = np.minimum(open_p, close_p) * rng.uniform(0.95, 1.0, n)
+    X = build_feature_matrix(open_p, high_p, low_p, close_p, rng.lognormal(12, 3, n))
+    assert np.allclose(flat.predict(X), _sklearn_predict(model, X))
+
+
+def test_parity_on_extremes(models):
+    model, flat = models
+    big = float(np.finfo(np.float32).max) / 2
+    X = np.array([
+        np.zeros(flat.n_features),
+        np.full(flat.n_features, big),
+        np.full(flat.n_features, -big),
+        np.full(flat.n_features, np.finfo(np.float32).tiny),
+    ])
+    assert np.allclose(flat.predict(X), _sklearn_predict(model, X))
+
+
+def _splits(model):
+    """
+    (flat node index, feature, float64 threshold) of every split in the forest.
+    """
+    nodes, features, thresholds, offset = [], [], [], 0
+    for est in model.estimators_:
+        tree = est.tree_
+        split = np.flatnonzero(tree.children_left != -1)
+        nodes.append(split + offset)
+        features.append(tree.feature[split])
+        thresholds.append(tree.threshold[split])
+        offset += tree.node_count
+    return np.concatenate(nodes), np.concatenate(features), np.concatenate(thresholds)
+
+
+def test_parity_at_thresholds(models):
+    model, flat = models
+    rng = np.random.default_rng(1)
+    _, features, thresholds = _splits(model)
+    # thresholds beyond float32 range can't be fed to sklearn as inputs
+    usable = np.flatnonzero(np.abs(thresholds) < np.finfo(np.float32).max)
+    picked = rng.choice(usable, size=min(2_000, len(usable)), replace=False)
+    features, thresholds = features[picked], thresholds[picked]
+    rows = np.arange(len(picked))
+
+    # each row sits exactly on one split's threshold, then one float32 step either side
+    X = rng.lognormal(0, 3, (len(picked), flat.n_features))
+    on = thresholds.astype(np.float32)
+    for value in (on, np.nextafter(on, np.float32(-np.inf)), np.nextafter(on, np.float32(np.inf))):
+        X[rows, features] = value
+        assert np.allclose(flat.predict(X), _sklearn_predict(model, X))
+
+
+def test_float32_floor_of_out_of_range_thresholds():
+    top = np.finfo(np.float32).max
+    floored = _float32_floor(np.array([1e39, -1e39, np.inf, 0.1]))
+    # beyond float32 range a split sends every finite float32 input the same
+    # way: it floors to the largest float32 (above) or -inf (below); the
+    # leaves' inf stays inf
+    assert floored[0] == top
+    assert floored[1] == -np.inf
+    assert floored[2] == np.inf
+    assert floored[3] <= 0.1 < np.nextafter(floored[3], np.float32(np.inf))
+
+
+def test_out_of_range_thresholds_match_sklearn_at_float32_extremes(models):
+    model, flat = models
+    nodes, features, thresholds = _splits(model)
+    wide = np.abs(thresholds) >= np.finfo(np.float32).max
+    if not wide.any():
+        pytest.skip("bundled model has no thresholds beyond float32 range")
+    assert np.isfinite(flat.threshold[nodes[wide & (thresholds > 0)]]).all()
+    # the float32 extremes are the closest a valid input can get to such a split
+    top = np.finfo(np.float32).max
+    X = np.zeros((2, flat.n_features))
+    X[0, features[wide]] = top
+    X[1, features[wide]] = -top
+    assert np.allclose(flat.predict(X), _sklearn_predict(model, X))
@@ -0,0 +1,32 @@
+import os
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from history_store import HistoryStore, _TS_FILE, _coin_dir
+
+
+def _candles(ts):
+    ts = np.asarray(ts, dtype=np.int64)
+    close = ts.astype(np.float64)
+    return ts, close, close + 1, close - 1, close, close * 10
+
+
+def test_append_after_torn_timestamp_write(tmp_path):
+    store = HistoryStore(str(tmp_path))
+    store.append('Bitcoin', *_candles([1, 2, 3]))
+
+    # an interrupted append: half a timestamp and one stray field value
+    path = _coin_dir(str(tmp_path), 'Bitcoin')
+    with open(os.path.join(path, 'close.f8'), 'ab') as fh:
+        fh.write(np.float64(99.0).tobytes())
+    with open(os.path.join(path, _TS_FILE), 'ab') as fh:
+        fh.write(b'\x04\x00\x00\x00')
+    assert store.count('Bitcoin') == 3
+
+    assert store.append('Bitcoin', *_candles([4, 5])) == 2
+    assert os.path.getsize(os.path.join(path, _TS_FILE)) == 5 * 8
+    view = HistoryStore(str(tmp_path)).range('Bitcoin')
+    np.testing.assert_array_equal(view.ts.astype(np.int64), [s * 10 ** 9 for s in range(1, 6)])
+    np.testing.assert_array_equal(view.close, [1.0, 2.0, 3.0, 4.0, 5.0])
@@ -0,0 +1,24 @@
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from indicator_engine import IndicatorEngine
+
+
+@pytest.mark.parametrize('chunks', [(1, 3, 7, 50), (2, 2), (61,), (4, 0, 26)])
+def test_chunked_backfill_then_update_matches_streaming(chunks):
+    closes = np.random.default_rng(0).lognormal(3, 0.05, 80)
+
+    streamed = IndicatorEngine()
+    expected = np.array([streamed.update('BTC', c) for c in closes])
+
+    engine = IndicatorEngine()
+    got, start = [], 0
+    for size in chunks:
+        got.append(np.column_stack(engine.backfill('BTC', closes[start:start + size])))
+        start += size
+    got.extend(np.array([engine.update('BTC', c)]) for c in closes[start:])
+
+    np.testing.assert_allclose(np.concatenate(got), expected, rtol=1e-12, atol=1e-12)
+    np.testing.assert_allclose(engine.latest('BTC'), streamed.latest('BTC'), rtol=1e-12, atol=1e-12)
+    assert engine.count('BTC') == streamed.count('BTC') == len(closes)
@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+from liquidity import (
+    classify_liquidity, classify_liquidity_array, normalize_score, normalize_score_array,
+    predict_trend, predict_trend_array,
+)
+
+
+def _same(a, b):
+    return a == b or (math.isnan(a) and math.isnan(b))
+
+
+@pytest.mark.parametrize('raw_score, volume, market_cap', [
+    (0.0, 1e6, 1e8),
+    (1.0, 1e6, 1e8),
+    (0.5, 1e6, 0.0),
+    (-0.1, 1e6, 1e8),
+    (1.2, 6e7, 1e8),
+    (5e4, 1e6, 0.0),
+    (-5e4, 1e6, -1.0),
+    (float('nan'), 1e6, 1e8),
+    (float('nan'), 1e6, 0.0),
+    (2.0, float('nan'), 1e8),
+    (2.0, 1e6, float('nan')),
+])
+def test_normalize_score_array_matches_scalar(raw_score, volume, market_cap):
+    expected = normalize_score(raw_score, volume, market_cap)
+    assert _same(float(normalize_score_array([raw_score], [volume], [market_cap])[0]), expected)
+
+
+@pytest.mark.parametrize('score', [
+    0.0, 0.3499999, 0.35, 0.35000001, 0.5, 0.6499999, 0.65, 0.65000001, 1.0, -1.0, float('nan'),
+])
+def test_classify_liquidity_array_matches_scalar(score):
+    assert classify_liquidity_array([score])[0] == classify_liquidity(score)
+
+
+@pytest.mark.parametrize('open_p, close_p, volume, avg_volume', [
+    (100.0, 101.0, 1e6, None),
+    (100.0, 101.5, 1e6, None),
+    (100.0, 99.0, 1e6, None),
+    (100.0, 98.0, 1e6, None),
+    (100.0, 100.0, 1e6, None),
+    (0.0, 5.0, 1e6, None),
+    (0.0, 5.0, 1e6, 1e6),
+    (100.0, 110.0, 2e6, 1e6),
+    (100.0, 90.0, 4e5, 1e6),
+    (100.0, 110.0, 1e6, 1e6),
+    (100.0, 110.0, 2e6, 0.0),
+    (100.0, float('nan'), 1e6, None),
+])
+def test_predict_trend_array_matches_scalar(open_p, close_p, volume, avg_volume):
+    expected = predict_trend(open_p, close_p, volume, avg_volume)
+    assert predict_trend_array([open_p], [close_p], [volume], avg_volume)[0] == expected
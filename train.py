@@ -0,0 +1,264 @@
+"""
+Command-line training pipeline extracted from crypto_price_prediction.ipynb.
+
+    python train.py coin_gecko_2022-03-17.csv --output artifacts/crypto_liquidity_model.pkl
+    python train.py snapshots/                # a directory of daily snapshots
+
+Steps, each timed:
+  0. snapshots – for a directory: ingest.py parses only new or changed
+                files (worker processes) into a de-duplicated Parquet
+                dataset, which is then read in place of a CSV
+  1. ingest   – typed, chunked CSV read with per-chunk cleaning
+                (a Parquet dataset from ingest.py is read as is)
+  2. features – the notebook's feature engineering (training_data.py)
+  3. cache    – the prepared frame is stored as Parquet, keyed on the
+                source file's SHA-256, so reruns on the same data skip 1–2
+  4. search   – optional hyper-parameter search over the notebook's grid:
+                exhaustive GridSearchCV, or successive halving, which scores
+                every candidate on a small budget (rows or trees) and only
+                gives survivors more; --search compare runs both and
+                records the wall time and best CV score of each
+  5. fit      – RandomForestRegressor on all cores (n_jobs=-1)
+  6. evaluate – MAE / RMSE / R² on the notebook's held-out split
+  7. save     – model written atomically, plus <output>.metrics.json and
+                <output>.drift.json (training-split feature summary that
+                drift_monitor.py compares live inputs with); --pipeline
+                also writes a FeaturePipeline (feature order + model) that
+                predicts from plain arrays
+
+The saved model can be dropped in place of the app's pickle: model_cache
+notices the new file and reloads it.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from drift_monitor import save_summary, summarize, summary_path_for
+from model_cache import atomic_dump, file_sha256
+from training_data import (
+    MODEL_FEATURES, TARGET, prepare_frame, read_snapshot_chunks, regression_metrics, split,
+)
+
+# Bump when feature engineering changes so stale cached frames are ignored.
+FEATURE_VERSION = 1
+DEFAULT_CACHE_DIR = '.cache/training'
+DEFAULT_OUTPUT = 'artifacts/crypto_liquidity_model.pkl'
+
+# The notebook's GridSearchCV grid, scored the same way (3-fold, MSE).
+PARAM_GRID = {
+    'n_estimators': [100, 200],
+    'max_depth': [None, 10, 20],
+    'min_samples_split': [2, 5],
+}
+CV_FOLDS = 3
+SCORING = 'neg_mean_squared_error'
+
+
+class StageTimer:
+    def __init__(self):
+        self.timings = {}
+
+    @contextmanager
+    def __call__(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
+            print(f"  {name:<9} {self.timings[name]:8.2f} s", file=sys.stderr)
+
+
+def load_prepared(path, cache_dir=DEFAULT_CACHE_DIR, chunksize=100_000, timer=None):
+    """
+    Prepared training frame for a snapshot CSV, from the Parquet cache when
+    the same file (by content hash) was prepared before. A directory is
+    first brought up to date by ingest.py and its dataset used instead.
+    """
+    timer = timer or StageTimer()
+    if os.path.isdir(path):
+        from ingest import ingest
+
+        with timer('snapshots'):
+            path = ingest(path)['dataset']
+    cache_path = None
+    if cache_dir:
+        key = f"{file_sha256(path)[:16]}-v{FEATURE_VERSION}"
+        cache_path = os.path.join(cache_dir, f"{key}.parquet")
+        if os.path.exists(cache_path):
+            with timer('cache'):
+                return pd.read_parquet(cache_path), True
+
+    with timer('ingest'):
+        if path.endswith('.parquet'):
+            # already typed, cleaned and de-duplicated by ingest.py
+            cleaned = pd.read_parquet(path)
+        else:
+            cleaned = read_snapshot_chunks(path, chunksize)
+    with timer('features'):
+        frame = prepare_frame(cleaned, cleaned=True)
+    if cache_path:
+        with timer('cache'):
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = cache_path + '.tmp'
+            frame.to_parquet(tmp, index=False)
+            os.replace(tmp, cache_path)
+    return frame, False
+
+
+def metrics_path_for(model_path):
+    return os.path.splitext(model_path)[0] + '.metrics.json'
+
+
+def build_model(args):
+    from sklearn.ensemble import RandomForestRegressor
+
+    return RandomForestRegressor(
+        n_estimators=args.n_estimators,
+        max_depth=args.max_depth,
+        min_samples_split=args.min_samples_split,
+        random_state=args.random_state,
+        n_jobs=args.n_jobs,
+    )
+
+
+def run_search(kind, X, y, args):
+    """
+    Search PARAM_GRID with 'grid' (exhaustive) or 'halving' (successive
+    halving). Candidates are fitted in parallel worker processes; each
+    forest is single-threaded so the cores go to the candidates.
+    """
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import GridSearchCV
+
+    base = RandomForestRegressor(random_state=args.random_state, n_jobs=1)
+    if kind == 'grid':
+        search = GridSearchCV(base, PARAM_GRID, cv=CV_FOLDS, scoring=SCORING,
+                              n_jobs=args.n_jobs, refit=False)
+    else:
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        grid = dict(PARAM_GRID)
+        budget = {}
+        if args.halving_resource == 'n_estimators':
+            budget = {'resource': 'n_estimators', 'max_resources': max(grid.pop('n_estimators')),
+                      'min_resources': 10}
+        search = HalvingGridSearchCV(base, grid, cv=CV_FOLDS, scoring=SCORING, factor=args.halving_factor,
+                                     n_jobs=args.n_jobs, refit=False, random_state=args.random_state,
+                                     **budget)
+
+    start = time.perf_counter()
+    search.fit(X, y)
+    elapsed = time.perf_counter() - start
+
+    results = search.cv_results_
+    best_params = dict(search.best_params_)
+    if kind == 'halving' and args.halving_resource == 'n_estimators':
+        best_params['n_estimators'] = max(PARAM_GRID['n_estimators'])
+    return {
+        'kind': kind,
+        'resource': args.halving_resource if kind == 'halving' else None,
+        'search_seconds': elapsed,
+        'best_params': best_params,
+        'best_cv_mse': float(-search.best_score_),
+        'candidates': len(results['params']),
+        'fits': int(len(results['params']) * CV_FOLDS),
+        'iterations': int(getattr(search, 'n_iterations_', 1)),
+    }
+
+
+def add_model_arguments(parser):
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--max-depth', type=int, default=None)
+    parser.add_argument('--min-samples-split', type=int, default=2)
+    parser.add_argument('--random-state', type=int, default=42)
+    parser.add_argument('--n-jobs', type=int, default=-1, help="worker processes/threads (-1 = all cores)")
+    parser.add_argument('--search', choices=['none', 'grid', 'halving', 'compare'], default='none',
+                        help="hyper-parameter search before the final fit")
+    parser.add_argument('--halving-resource', choices=['n_samples', 'n_estimators'], default='n_samples',
+                        help="budget successive halving grows for surviving candidates")
+    parser.add_argument('--halving-factor', type=int, default=3)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the liquidity RandomForest from a CoinGecko snapshot.")
+    parser.add_argument('data', help="snapshot CSV (coin, symbol, price, 1h, 24h, 7d, 24h_volume, mkt_cap, date), "
+                                     "a directory of them, or an ingest.py dataset (.parquet)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--pipeline', default=None, metavar='PATH',
+                        help="also write a feature pipeline artifact (MODEL_FEATURES order + model)")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="'' disables the Parquet cache")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    add_model_arguments(parser)
+    args = parser.parse_args(argv)
+
+    timer = StageTimer()
+    total_start = time.perf_counter()
+    print("Training…", file=sys.stderr)
+
+    frame, cache_hit = load_prepared(args.data, args.cache_dir, args.chunksize, timer)
+    X_train, X_test, y_train, y_test = split(frame)
+
+    searches = []
+    if args.search != 'none':
+        kinds = ['grid', 'halving'] if args.search == 'compare' else [args.search]
+        with timer('search'):
+            for kind in kinds:
+                searches.append(run_search(kind, X_train.to_numpy(), y_train.to_numpy(), args))
+                print(f"    {kind:<8} best CV MSE {searches[-1]['best_cv_mse']:.5g} in "
+                      f"{searches[-1]['search_seconds']:.2f} s ({searches[-1]['fits']} fits)",
+                      file=sys.stderr)
+        for name, value in searches[-1]['best_params'].items():
+            setattr(args, name, value)
+
+    model = build_model(args)
+    with timer('fit'):
+        model.fit(X_train.to_numpy(), y_train.to_numpy())
+    with timer('evaluate'):
+        metrics = regression_metrics(y_test, model.predict(X_test.to_numpy()))
+    with timer('save'):
+        model.set_params(n_jobs=None)  # all cores for fitting, not for 1-row serving
+        atomic_dump(model, args.output)
+        drift_summary = summary_path_for(args.output)
+        save_summary(summarize(X_train.to_numpy(), MODEL_FEATURES, metadata={
+            'data': os.path.abspath(args.data), 'rows': 'training split'}), drift_summary)
+        if args.pipeline:
+            from feature_pipeline import FeaturePipeline
+
+            # no scaler: the notebook's StandardScaler never reached the model,
+            # and tree splits are unaffected by per-feature scaling anyway
+            FeaturePipeline(MODEL_FEATURES, model, metadata={
+                'source': os.path.abspath(args.output), 'feature_set': 'training', 'metrics': metrics,
+            }).save(args.pipeline)
+
+    report = {
+        'data': os.path.abspath(args.data),
+        'rows': {'total': len(frame), 'train': len(X_train), 'test': len(X_test)},
+        'features': MODEL_FEATURES,
+        'target': TARGET,
+        'params': dict(model.get_params(), n_jobs=args.n_jobs),
+        'cache_hit': cache_hit,
+        'search': searches,
+        'metrics': metrics,
+        'timings_s': dict(timer.timings, total=time.perf_counter() - total_start),
+        'model_bytes': os.path.getsize(args.output),
+        'pipeline': os.path.abspath(args.pipeline) if args.pipeline else None,
+        'drift_summary': os.path.abspath(drift_summary),
+    }
+    with open(metrics_path_for(args.output), 'w') as fh:
+        json.dump(report, fh, indent=2, default=str)
+
+    print(f"MAE {metrics['MAE']:.4f} | RMSE {metrics['RMSE']:.4f} | R² {metrics['R2']:.4f}", file=sys.stderr)
+    print(f"Model: {args.output}\nMetrics: {metrics_path_for(args.output)}\nDrift summary: {drift_summary}",
+          file=sys.stderr)
+    if args.pipeline:
+        print(f"Pipeline: {args.pipeline}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+"""
+Dataset preparation from crypto_price_prediction.ipynb, as plain functions.
+
+Cleaning, feature engineering and the train/test split follow the
+notebook so artifacts built or evaluated from the command line use the
+same columns and the same held-out rows as the model that ships.
+"""
+import numpy as np
+import pandas as pd
+
+# Column types of a CoinGecko snapshot (coin_gecko_2022-03-17.csv).
+SNAPSHOT_DTYPES = {
+    'coin': 'string',
+    'symbol': 'string',
+    'price': 'float64',
+    '1h': 'float64',
+    '24h': 'float64',
+    '7d': 'float64',
+    '24h_volume': 'float64',
+    'mkt_cap': 'float64',
+    'date': 'string',
+}
+
+# Model inputs in training order, and the regression target.
+MODEL_FEATURES = [
+    'price', '1h', '24h', '7d', '24h_volume', 'mkt_cap',
+    'volatility_7d', 'volatility_24h', 'ma_price', 'ma_volume',
+]
+TARGET = 'liquidity_ratio'
+
+TEST_SIZE = 0.2
+RANDOM_STATE = 42
+
+
+def read_snapshot(path):
+    """
+    Read one raw snapshot CSV with explicit dtypes.
+    """
+    return pd.read_csv(path, dtype=SNAPSHOT_DTYPES, usecols=list(SNAPSHOT_DTYPES))
+
+
+def read_snapshot_chunks(path, chunksize=100_000):
+    """
+    Read a snapshot CSV in typed chunks, cleaning each chunk as it arrives so
+    only the surviving rows are held in memory.
+    """
+    reader = pd.read_csv(path, dtype=SNAPSHOT_DTYPES, usecols=list(SNAPSHOT_DTYPES),
+                         chunksize=chunksize)
+    with reader:
+        chunks = [clean_snapshot(chunk) for chunk in reader]
+    return pd.concat(chunks, ignore_index=True) if chunks else clean_snapshot(
+        pd.DataFrame({c: pd.Series(dtype=t) for c, t in SNAPSHOT_DTYPES.items()}))
+
+
+def clean_snapshot(df):
+    """
+    Drop incomplete rows and parse the date column.
+    """
+    df = df.dropna().copy()
+    df['date'] = pd.to_datetime(df['date'], errors='coerce')
+    return df
+
+
+def add_features(df):
+    """
+    Notebook feature engineering: liquidity ratio target, absolute 24h/7d
+    changes as volatility, and 10-coin moving averages of price and volume
+    taken over coins ranked by market cap.
+    """
+    df = df.copy()
+    df['liquidity_ratio'] = df['24h_volume'] / df['mkt_cap']
+    df['volatility_7d'] = df['7d'].abs()
+    df['volatility_24h'] = df['24h'].abs()
+
+    # rolling over coins ranked by market cap, written back to each coin's own row
+    ranked = df.sort_values(by='mkt_cap', ascending=False)
+    df['ma_price'] = ranked['price'].rolling(window=10, min_periods=1).mean()
+    df['ma_volume'] = ranked['24h_volume'].rolling(window=10, min_periods=1).mean()
+    return df
+
+
+def prepare_frame(df, cleaned=False):
+    """
+    Raw snapshot rows -> cleaned frame with MODEL_FEATURES and TARGET,
+    dropping rows whose target is undefined (zero market cap).
+    Pass cleaned=True for rows that already went through clean_snapshot().
+    """
+    df = add_features(df if cleaned else clean_snapshot(df))
+    df = df.replace([np.inf, -np.inf], np.nan).dropna(subset=[TARGET])
+    return df.reset_index(drop=True)
+
+
+def split(df):
+    """
+    The notebook's train/test split: (X_train, X_test, y_train, y_test).
+    """
+    from sklearn.model_selection import train_test_split
+
+    X = df[MODEL_FEATURES]
+    y = df[TARGET]
+    return train_test_split(X, y, test_size=TEST_SIZE, random_state=RANDOM_STATE)
+
+
+def regression_metrics(y_true, y_pred):
+    """
+    MAE / RMSE / R², as reported by the notebook's evaluate_model().
+    """
+    from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+
+    return {
+        'MAE': float(mean_absolute_error(y_true, y_pred)),
+        'RMSE': float(np.sqrt(mean_squared_error(y_true, y_pred))),
+        'R2': float(r2_score(y_true, y_pred)),
+    }
@@ -0,0 +1,154 @@
+"""
+Static UI markup for final.py, built once per process, and cold-start timing.
+
+The navbar and background CSS used to be rebuilt on every Streamlit rerun
+and pointed at remote images. Here they are module-level strings (modules
+persist across reruns) that reference the precompressed copies under
+static/ produced by build_assets.py — WebP with a JPEG fallback, picked
+per viewport width — and fall back to the remote URLs for anything that
+hasn't been built.
+
+record_render() measures each script run and, once per process, the time
+from process start to the first completed render.
+"""
+import os
+import sys
+import threading
+import time
+
+_IMPORTED_AT = time.time()
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+STATIC_DIR = os.path.join(_HERE, 'static')
+STATIC_URL = 'app/static'  # where Streamlit serves STATIC_DIR (enableStaticServing)
+
+BACKGROUND_SOURCE = os.path.join(_HERE, '53540861975_5538e666cf_c.jpg')
+BACKGROUND_URL = ("https://raw.githubusercontent.com/jayasri21072006/crypto-liquidity-predictor/"
+                  "main/53540861975_5538e666cf_c.jpg")
+BACKGROUND_WIDTHS = (400, 640, 800)
+
+ICON_URLS = {
+    'twitter': "https://cdn-icons-png.flaticon.com/512/733/733579.png",
+    'facebook': "https://cdn-icons-png.flaticon.com/512/733/733547.png",
+}
+ICON_SIZES = (24, 48)
+
+
+def _built(name):
+    return os.path.isfile(os.path.join(STATIC_DIR, name))
+
+
+def _icon_attrs(name):
+    """
+    src/srcset for a navbar icon: local 1x/2x PNGs if built, else the remote URL.
+    """
+    small, large = ICON_SIZES
+    if not _built(f'{name}-{small}.png'):
+        return f'src="{ICON_URLS[name]}"'
+    src = f'{STATIC_URL}/{name}-{small}.png'
+    if _built(f'{name}-{large}.png'):
+        return f'src="{src}" srcset="{src} 1x, {STATIC_URL}/{name}-{large}.png 2x"'
+    return f'src="{src}"'
+
+
+def _background_rule(width):
+    webp, jpg = f'{STATIC_URL}/bg-{width}.webp', f'{STATIC_URL}/bg-{width}.jpg'
+    return (f'background-image: url("{jpg}"); '
+            f'background-image: image-set(url("{webp}") type("image/webp"), url("{jpg}") type("image/jpeg"));')
+
+
+def _background_css():
+    widths = [w for w in BACKGROUND_WIDTHS if _built(f'bg-{w}.webp') and _built(f'bg-{w}.jpg')]
+    if not widths:
+        default, queries = f'background-image: url("{BACKGROUND_URL}");', ''
+    else:
+        # largest variant by default, smaller ones for narrower viewports
+        default = _background_rule(widths[-1])
+        queries = ''.join(
+            f"\n    @media (max-width: {w}px) {{ html, body {{ {_background_rule(w)} }} }}"
+            for w in reversed(widths[:-1])
+        )
+    return f"""
+    <style>
+    html, body {{
+        height: 100%;
+        margin: 0;
+        padding: 0;
+        {default}
+        background-size: cover;
+        background-position: center;
+        background-repeat: no-repeat;
+    }}{queries}
+    .stApp {{
+        background-color: rgba(0, 0, 0, 0.6) !important;
+        color: white;
+        height: 100%;
+    }}
+    </style>
+    """
+
+
+NAVBAR_HTML = f"""
+<nav style="background-color:#102a44; color:white; display:flex; align-items:center; padding:12px 30px; justify-content:space-between; border-radius:0 0 10px 10px; box-shadow:0 4px 8px rgba(0,0,0,0.1); font-family: 'Poppins', Arial, sans-serif; width: 100vw; position: fixed; top: 0; left: 0; z-index: 9999; box-sizing: border-box;">
+  <div style="display:flex; align-items:center;">
+    <div style="font-weight:700; font-size:26px; background: linear-gradient(90deg, #34e89e, #0f3443); -webkit-background-clip: text; -webkit-text-fill-color: transparent; user-select:none; cursor:default;">CryptoPredictions</div>
+  </div>
+  <ul class="nav-links" style="list-style:none; display:flex; gap: 25px; margin:0; padding:0;">
+    <li><a href="https://cryptonews.com" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Market Updates</a></li>
+    <li><a href="https://cryptopredictions.com/?results=200" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Coin List</a></li>
+    <li><a href="https://cryptopredictions.com/blog/" target="_blank" style="color:white; text-decoration:none; font-weight:600;">Insights Blog</a></li>
+  </ul>
+  <div style="display:flex; align-items:center; gap:20px;">
+    <div>
+      <a href="https://twitter.com" target="_blank"><img {_icon_attrs('twitter')} style="width:24px; height:24px;"></a>
+      <a href="https://facebook.com" target="_blank"><img {_icon_attrs('facebook')} style="width:24px; height:24px; margin-left: 10px;"></a>
+    </div>
+    <select style="background:transparent; border:none; color:white; font-weight:600; font-size:15px;">
+      <option value="en" selected>English 🇬🇧</option>
+      <option value="es">Español 🇪🇸</option>
+      <option value="fr">Français 🇫🇷</option>
+    </select>
+  </div>
+</nav>
+"""
+
+BACKGROUND_CSS = _background_css()
+
+
+# --- Cold-start timing ---
+def process_start_time():
+    """
+    Wall-clock time this process started (from /proc on Linux), or the time
+    this module was first imported where /proc isn't available.
+    """
+    try:
+        with open('/proc/self/stat') as fh:
+            stat = fh.read()
+        # fields after "(comm)"; starttime is field 22, in clock ticks since boot
+        start_ticks = int(stat[stat.rindex(')') + 2:].split()[19])
+        with open('/proc/uptime') as fh:
+            uptime = float(fh.read().split()[0])
+        return time.time() - (uptime - start_ticks / os.sysconf('SC_CLK_TCK'))
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED_AT
+
+
+_lock = threading.Lock()
+_first_render = None
+
+
+def record_render(run_started):
+    """
+    Timing for a script run that began at run_started (time.perf_counter()):
+    {'run_ms', 'first_render_s', 'first'}. first_render_s is process start →
+    end of the first run in this process; it is logged once to stderr.
+    """
+    global _first_render
+    run_ms = (time.perf_counter() - run_started) * 1000
+    with _lock:
+        first = _first_render is None
+        if first:
+            _first_render = time.time() - process_start_time()
+            print(f"[ui_assets] time to first render: {_first_render:.2f} s "
+                  f"(first script run {run_ms:.0f} ms)", file=sys.stderr)
+    return {'run_ms': run_ms, 'first_render_s': _first_render, 'first': first}